@@ -3,57 +3,100 @@ import numpy as np
 class FieldEngine:
     """
     Motor de Campo Vetorial (V5 Physics).
-    Aplica conceitos de Cálculo Vetorial (Divergência e Gradiente) para 
+    Aplica conceitos de Cálculo Vetorial (Divergência e Gradiente) para
     analisar a dinâmica muscular como um fluxo de fluido.
-    
+
     Conceitos:
     - Divergência Positiva (>0): Expansão (Surpresa, Alegria aberta)
     - Divergência Negativa (<0): Compressão (Raiva, Dor, Beijo)
     - Gradiente: Direção da intenção do movimento.
+
+    As regiões são pré-compiladas em arrays de índices + um operador de
+    centralização (posição -> vetor raio), então todas as regiões saem de
+    um único gather + einsum, tanto por frame quanto em lote (T frames).
     """
-    
+
     # CORREÇÃO AQUI: Adicionado o parâmetro 'config'
     def __init__(self, config):
         # Pontos centrais das regiões de interesse (Indices MediaPipe)
         self.REGIONS = {
             # Região da Testa (AU4 vs AU1/2)
             "brow_region": [107, 336, 9, 66, 296, 55, 285],
-            
+
             # Região da Boca (AU12 vs AU18/23)
             "mouth_region": [13, 14, 61, 291, 0, 17, 37, 267],
-            
+
             # Região do Nariz (AU9)
             "nose_region": [1, 2, 98, 327, 168, 6, 197]
         }
         self.prev_landmarks = None
         # O config pode ser usado futuramente para ajustar sensibilidade física
-        self.config = config 
+        self.config = config
+
+        self._compile_regions()
+
+    def _compile_regions(self):
+        """
+        Concatena os índices de todas as regiões (K pontos) e monta:
+        - _starts: início de cada região (para np.add.reduceat)
+        - _centering: operador (K, K) que leva posição -> (posição - centróide da região)
+        """
+        self.region_names = list(self.REGIONS.keys())
+        # Chaves do resultado de analyze(), na ordem em que são geradas
+        self.result_names = [f"{name}_{kind}" for name in self.region_names for kind in ("div", "flux")]
+        indices = [np.asarray(self.REGIONS[name]) for name in self.region_names]
+        self._idx = np.concatenate(indices)
+        self._counts = np.array([len(ix) for ix in indices])
+        self._starts = np.concatenate([[0], np.cumsum(self._counts)[:-1]])
+
+        seg = np.repeat(np.arange(len(indices)), self._counts)
+        same_region = (seg[:, np.newaxis] == seg[np.newaxis, :])
+        self._centering = np.eye(len(seg)) - same_region / self._counts[seg][:, np.newaxis]
+
+    def _gather(self, landmarks):
+        """Pega só os K pontos usados: objetos do MediaPipe ou array (..., 478, >=2)."""
+        if isinstance(landmarks, np.ndarray):
+            return landmarks[..., self._idx, :2].astype(float)
+        return np.array([[landmarks[i].x, landmarks[i].y] for i in self._idx])
+
+    def _region_fields(self, velocity, positions):
+        """
+        velocity, positions: (..., K, 2).
+        Retorna (divergência, fluxo) por região: (..., n_regions) cada.
+        """
+        # Vetor raio (do centróide da região até o ponto), normalizado
+        radius = np.einsum('jk,...kd->...jd', self._centering, positions)
+        norm = np.linalg.norm(radius, axis=-1, keepdims=True)
+        radial_unit = np.divide(radius, norm, out=np.zeros_like(radius), where=norm > 0)
+
+        # Produto escalar: Projeção da velocidade na direção radial
+        # Se V aponta para fora (mesma direção do raio) -> Positivo (Expansão)
+        # Se V aponta para dentro (oposto ao raio) -> Negativo (Compressão)
+        radial_speed = np.einsum('...kd,...kd->...k', velocity, radial_unit)
+        divergence = np.add.reduceat(radial_speed, self._starts, axis=-1)
+
+        # Magnitude do Fluxo (Energia Cinética da região)
+        speed = np.linalg.norm(velocity, axis=-1)
+        flux = np.add.reduceat(speed, self._starts, axis=-1) / self._counts
+        return divergence, flux
 
     def calculate_divergence(self, vectors, positions):
         """
-        Calcula div F (Divergência) aproximada.
+        Calcula div F (Divergência) aproximada de UMA região.
         Mede se os vetores estão fugindo (div > 0) ou indo para (div < 0) o centróide.
         """
         if len(vectors) < 2: return 0.0
-        
-        # Centróide da região
-        center = np.mean(positions, axis=0)
-        divergence = 0.0
-        
-        for i, vec in enumerate(vectors):
-            pos = positions[i]
-            # Vetor raio (do centro até o ponto)
-            radius_vec = pos - center
-            # Normaliza o raio
-            norm = np.linalg.norm(radius_vec)
-            if norm > 0: radius_vec /= norm
-            
-            # Produto escalar: Projeção da velocidade na direção radial
-            # Se V aponta para fora (mesma direção do raio) -> Positivo (Expansão)
-            # Se V aponta para dentro (oposto ao raio) -> Negativo (Compressão)
-            divergence += np.dot(vec, radius_vec)
-            
-        return divergence
+        radius = positions - np.mean(positions, axis=0)
+        norm = np.linalg.norm(radius, axis=1, keepdims=True)
+        radial_unit = np.divide(radius, norm, out=np.zeros_like(radius), where=norm > 0)
+        return float(np.einsum('kd,kd->', vectors, radial_unit))
+
+    def reset(self):
+        """
+        Esquece o frame anterior. Chamar quando o referencial canônico muda
+        (calibração/reset) ou o rosto some: senão o salto vira velocidade.
+        """
+        self.prev_landmarks = None
 
     def analyze(self, current_landmarks, dt):
         """
@@ -61,34 +104,54 @@ class FieldEngine:
         """
         # Se dt for zero ou muito pequeno, evita divisão por zero
         if dt < 0.001: dt = 0.001
-            
-        curr_np = np.array([[lm.x, lm.y] for lm in current_landmarks])
-        
+
+        curr_np = self._gather(current_landmarks)
+
         if self.prev_landmarks is None:
             self.prev_landmarks = curr_np
             return {}
 
-        results = {}
-        
         # 1. Campo de Velocidade (V = dS/dt)
         # Quão rápido cada ponto moveu desde o último frame
         velocity_field = (curr_np - self.prev_landmarks) / dt
 
-        # 2. Analisar Regiões
-        for name, indices in self.REGIONS.items():
-            region_vels = velocity_field[indices]
-            region_pos = curr_np[indices]
-            
-            # A. Divergência (Classificação de Estado)
-            div = self.calculate_divergence(region_vels, region_pos)
-            
-            # Escala para leitura humana (ex: -0.05 vira -50)
-            results[f"{name}_div"] = div * 100.0
+        # 2. Analisar Regiões (todas de uma vez)
+        divergence, flux = self._region_fields(velocity_field, curr_np)
 
-            # B. Magnitude do Fluxo (Energia Cinética da região)
-            # Quanto essa região está se movendo no total?
-            flux_mag = np.mean(np.linalg.norm(region_vels, axis=1))
-            results[f"{name}_flux"] = flux_mag * 1000.0
+        results = {}
+        for i, name in enumerate(self.region_names):
+            # Escala para leitura humana (ex: -0.05 vira -50)
+            results[f"{name}_div"] = float(divergence[i]) * 100.0
+            results[f"{name}_flux"] = float(flux[i]) * 1000.0
 
         self.prev_landmarks = curr_np
         return results
+
+    def analyze_batch(self, landmarks, timestamps=None, dt=1.0 / 30.0):
+        """
+        Modo offline: landmarks (T, 478, >=2) normalizados.
+        timestamps (T,) em segundos (opcional; senão usa 'dt' fixo).
+        Retorna dict de arrays (T,) com as mesmas chaves de analyze().
+        A linha 0 é 0.0 (não há frame anterior). Não altera o estado streaming.
+        """
+        pos = self._gather(np.asarray(landmarks))
+        T = len(pos)
+        results = {}
+        for name in self.region_names:
+            results[f"{name}_div"] = np.zeros(T)
+            results[f"{name}_flux"] = np.zeros(T)
+        if T < 2:
+            return results
+
+        if timestamps is not None:
+            dts = np.maximum(np.diff(np.asarray(timestamps, dtype=float)), 0.001)
+        else:
+            dts = np.full(T - 1, max(dt, 0.001))
+
+        velocity = (pos[1:] - pos[:-1]) / dts[:, np.newaxis, np.newaxis]
+        divergence, flux = self._region_fields(velocity, pos[1:])
+
+        for i, name in enumerate(self.region_names):
+            results[f"{name}_div"][1:] = divergence[:, i] * 100.0
+            results[f"{name}_flux"][1:] = flux[:, i] * 1000.0
+        return results
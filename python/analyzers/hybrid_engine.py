@@ -1,47 +1,208 @@
+import json
 import math
+import os
 import numpy as np
 
 class HybridEngine:
     """
     ENGINE V9.2: SMOOTH & CLEAN
     Adiciona Filtro Temporal (EMA) para eliminar 'flicker' e lixo de leitura.
+
+    V9.3 (Matricial): o mapeamento Blendshapes -> AUs (config/au_mappings.json)
+    é compilado numa matriz fixa 52x21 (já com os termos cruzados AU4/AU1 e
+    AU12/Dimple). O frame vira 1 produto matriz-vetor + operações elementares
+    sobre arrays (curva, EMA, tara, noise gate, clamp).
     """
-    def __init__(self, config):
-        self.sensitivity = 2.8 
+    # Ordem canônica das 52 blendshapes do MediaPipe FaceLandmarker
+    BLENDSHAPE_NAMES = [
+        '_neutral', 'browDownLeft', 'browDownRight', 'browInnerUp',
+        'browOuterUpLeft', 'browOuterUpRight', 'cheekPuff', 'cheekSquintLeft',
+        'cheekSquintRight', 'eyeBlinkLeft', 'eyeBlinkRight', 'eyeLookDownLeft',
+        'eyeLookDownRight', 'eyeLookInLeft', 'eyeLookInRight', 'eyeLookOutLeft',
+        'eyeLookOutRight', 'eyeLookUpLeft', 'eyeLookUpRight', 'eyeSquintLeft',
+        'eyeSquintRight', 'eyeWideLeft', 'eyeWideRight', 'jawForward', 'jawLeft',
+        'jawOpen', 'jawRight', 'mouthClose', 'mouthDimpleLeft', 'mouthDimpleRight',
+        'mouthFrownLeft', 'mouthFrownRight', 'mouthFunnel', 'mouthLeft',
+        'mouthLowerDownLeft', 'mouthLowerDownRight', 'mouthPressLeft',
+        'mouthPressRight', 'mouthPucker', 'mouthRight', 'mouthRollLower',
+        'mouthRollUpper', 'mouthShrugLower', 'mouthShrugUpper', 'mouthSmileLeft',
+        'mouthSmileRight', 'mouthStretchLeft', 'mouthStretchRight',
+        'mouthUpperUpLeft', 'mouthUpperUpRight', 'noseSneerLeft', 'noseSneerRight',
+    ]
+
+    # Landmarks usados na pose (nariz, orelhas) e na divergência da testa
+    IDX_NOSE, IDX_EAR_L, IDX_EAR_R = 1, 234, 454
+    BROW_INDICES = [107, 336, 9, 66, 296]
+
+    def __init__(self, config, mappings_path=None):
+        self.sensitivity = 2.8
         self.noise_gate = 0.04 # Subi levemente (era 0.03) para cortar ruído de fundo
-        
+
         # Fator de Suavização (0.0 a 1.0)
         # Maior = Mais rápido / Menor = Mais suave
         # 0.6 é o equilíbrio perfeito para microexpressões.
-        self.alpha = 0.6 
-        
-        # Memória para o filtro temporal
-        self.prev_aus = {}
+        self.alpha = 0.6
+
+        # Constante de tempo equivalente (segundos): alpha foi ajustado a 30 fps.
+        # Com timestamps reais o alpha efetivo vira 1 - exp(-dt / tau), então a
+        # suavização é a mesma em 30, 60 fps ou com frames pulados.
+        self.reference_dt = 1.0 / 30.0
+        self.ema_tau = -self.reference_dt / math.log(1.0 - self.alpha)
+
+        # Matriz Blendshapes -> AUs (52 x 21)
+        if mappings_path is None:
+            mappings_path = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'au_mappings.json'
+            )
+        self.au_names, self.au_matrix = self._compile_mappings(mappings_path)
+        self.n_aus = len(self.au_names)
+        self.idx_au4 = self.au_names.index("AU4")
+        self._bs_index = {name: i for i, name in enumerate(self.BLENDSHAPE_NAMES)}
+
+        # Memória para o filtro temporal (estado do EMA, uma posição por AU)
+        self.ema_state = np.zeros(self.n_aus)
+        self.prev_timestamp = None
 
         # Estados de Calibração
         self.baseline_div = None
         self.calibrated_physics = False
-        
-        # Tara Manual
-        self.manual_offsets = {}
+        self.last_div = None  # Divergência do último frame (calibração automática)
+
+        # Tara Manual (vetor alinhado com au_names)
+        self.manual_offsets = np.zeros(self.n_aus)
         self.is_calibrated_manual = False
 
-    def calibrate(self, current_aus):
+    # ------------------------------------------------------------------
+    # COMPILAÇÃO DO MAPEAMENTO
+    # ------------------------------------------------------------------
+    def _compile_mappings(self, mappings_path):
+        """
+        Converte o JSON de mapeamento em uma matriz (52, n_AUs).
+        Tipos suportados: direct, average, composite (base + additions,
+        multiplier) e reference. Blendshapes desconhecidas contam como 0.
+        """
+        with open(mappings_path, 'r', encoding='utf-8') as f:
+            mappings = json.load(f)['mappings']
+
+        resolved = {}
+        for au, spec in mappings.items():
+            resolved[au] = self._compile_spec(spec, resolved)
+
+        au_names = list(mappings.keys())
+        matrix = np.stack([resolved[au] for au in au_names], axis=1)
+        return au_names, matrix
+
+    def _compile_spec(self, spec, resolved):
+        if isinstance(spec, str):
+            return resolved[spec]
+
+        kind = spec.get('type')
+        if kind == 'reference':
+            return resolved[spec['source']].copy()
+
+        if kind in ('direct', 'average'):
+            col = np.zeros(len(self.BLENDSHAPE_NAMES))
+            names = spec['blendshapes']
+            for name in names:
+                if name in self.BLENDSHAPE_NAMES:
+                    col[self.BLENDSHAPE_NAMES.index(name)] += 1.0
+            return col / len(names) if kind == 'average' else col
+
+        if kind == 'composite':
+            col = self._compile_spec(spec['base'], resolved).copy()
+            for add in spec.get('additions', []):
+                col += self._compile_spec(add['source'], resolved) * add.get('multiplier', 1.0)
+            return col * spec.get('multiplier', 1.0)
+
+        raise ValueError(f"Tipo de mapeamento desconhecido: {kind}")
+
+    # ------------------------------------------------------------------
+    # CALIBRAÇÃO
+    # ------------------------------------------------------------------
+    def calibrate(self, current_aus, baseline_div=None):
+        """
+        current_aus: dict ou vetor de níveis neutros (suavizados).
+        baseline_div (opcional): divergência neutra da testa; sem ela, a
+        referência da física continua a do primeiro frame.
+        """
         print(">>> CALIBRANDO... ROSTO NEUTRO DEFINIDO.")
         # Salva os valores SUAVIZADOS atuais como tara
-        self.manual_offsets = current_aus.copy()
+        self.manual_offsets = self.to_vector(current_aus)
         self.is_calibrated_manual = True
+        if baseline_div is not None:
+            self.baseline_div = float(baseline_div)
+            self.calibrated_physics = True
 
     def reset_calibration(self):
         print(">>> CALIBRAÇÃO RESETADA.")
-        self.manual_offsets = {}
+        self.manual_offsets = np.zeros(self.n_aus)
         self.is_calibrated_manual = False
 
+    def get_state(self):
+        """Snapshot serializável (JSON) da calibração: tara, baseline da física e EMA."""
+        return {
+            "manual_offsets": self.to_dict(self.manual_offsets),
+            "is_calibrated_manual": self.is_calibrated_manual,
+            "baseline_div": self.baseline_div,
+            "ema_state": self.to_dict(self.ema_state),
+        }
+
+    def load_state(self, state):
+        """
+        Restaura um snapshot de get_state(). AUs que não existem mais são
+        ignoradas; as novas começam em 0. O relógio do EMA recomeça
+        (timestamps de outra sessão não valem aqui).
+        """
+        self.manual_offsets = self.to_vector(state.get("manual_offsets", {}))
+        self.is_calibrated_manual = bool(state.get("is_calibrated_manual", False))
+        self.baseline_div = state.get("baseline_div")
+        self.calibrated_physics = self.baseline_div is not None
+        self.ema_state = self.to_vector(state.get("ema_state", {}))
+        self.prev_timestamp = None
+
+    # ------------------------------------------------------------------
+    # CONVERSÕES
+    # ------------------------------------------------------------------
+    def to_vector(self, aus):
+        """Dicionário {AU: valor} -> vetor alinhado com au_names."""
+        if isinstance(aus, np.ndarray):
+            return aus.astype(float)
+        return np.array([aus.get(k, 0.0) for k in self.au_names], dtype=float)
+
+    def to_dict(self, vec):
+        """Vetor alinhado com au_names -> dicionário {AU: valor}."""
+        return dict(zip(self.au_names, vec.tolist()))
+
+    def blendshape_vector(self, blendshapes):
+        """Lista de Categories do MediaPipe (ou array) -> vetor de 52 scores."""
+        if isinstance(blendshapes, np.ndarray):
+            return blendshapes.astype(float)
+        n = len(self.BLENDSHAPE_NAMES)
+        # Caminho rápido: o MediaPipe devolve as 52 na ordem canônica
+        if len(blendshapes) == n and blendshapes[-1].category_name == self.BLENDSHAPE_NAMES[-1]:
+            return np.fromiter((b.score for b in blendshapes), dtype=float, count=n)
+        scores = np.zeros(n)
+        for b in blendshapes:
+            i = self._bs_index.get(b.category_name)
+            if i is not None:
+                scores[i] = b.score
+        return scores
+
+    def _landmark_points(self, landmarks, indices):
+        """Extrai (x, y) normalizados de landmarks (objetos ou array (..., N, >=2))."""
+        if isinstance(landmarks, np.ndarray):
+            return landmarks[..., indices, :2]
+        return [(landmarks[i].x, landmarks[i].y) for i in indices]
+
+    # ------------------------------------------------------------------
+    # FÍSICA / POSE
+    # Versão por frame (streaming) e vetorizada (batch) seguem a mesma regra.
+    # ------------------------------------------------------------------
     def _calculate_rotation_penalty(self, landmarks):
-        if not landmarks: return 1.0
-        nose = landmarks[1].x
-        ear_l = landmarks[234].x
-        ear_r = landmarks[454].x
+        if landmarks is None or len(landmarks) == 0: return 1.0
+        (nose, _), (ear_l, _), (ear_r, _) = self._landmark_points(
+            landmarks, [self.IDX_NOSE, self.IDX_EAR_L, self.IDX_EAR_R]
+        )
         face_width = abs(ear_r - ear_l)
         if face_width == 0: return 1.0
         ratio = abs(nose - ear_l) / face_width
@@ -50,84 +211,149 @@ class HybridEngine:
             return min((deviation - 0.12) * 6.0, 1.0)
         return 0.0
 
-    def _calculate_divergence(self, landmarks, indices, w, h):
-        pts = np.array([[landmarks[i].x * w, landmarks[i].y * h] for i in indices])
+    def _calculate_divergence(self, landmarks, w, h):
+        pts = np.asarray(self._landmark_points(landmarks, self.BROW_INDICES), dtype=float) * np.array([w, h])
         center = np.mean(pts, axis=0)
-        return np.sum(np.linalg.norm(pts - center, axis=1))
-
-    def process(self, blendshapes, landmarks, w, h):
-        bs = {b.category_name: b.score for b in blendshapes}
-        rot_penalty = self._calculate_rotation_penalty(landmarks)
-        current_gain = self.sensitivity * (1.0 - (rot_penalty * 0.8))
-
-        aus = {}
-        
-        # --- CÁLCULO BRUTO ---
-        aus["AU1"] = bs.get('browInnerUp', 0)
-        aus["AU2"] = (bs.get('browOuterUpLeft', 0) + bs.get('browOuterUpRight', 0)) / 2
-        raw_au4 = (bs.get('browDownLeft', 0) + bs.get('browDownRight', 0)) / 2
-        aus["AU4"] = raw_au4 + (aus["AU1"] * 0.1)
-
-        aus["AU5"] = (bs.get('eyeWideLeft', 0) + bs.get('eyeWideRight', 0)) / 2
-        aus["AU6"] = (bs.get('cheekSquintLeft', 0) + bs.get('cheekSquintRight', 0)) / 2
-        aus["AU7"] = (bs.get('eyeSquintLeft', 0) + bs.get('eyeSquintRight', 0)) / 2
-        aus["AU43"] = (bs.get('eyeBlinkLeft', 0) + bs.get('eyeBlinkRight', 0)) / 2
-        aus["AU45"] = aus["AU43"]
-
-        aus["AU9"] = (bs.get('noseSneerLeft', 0) + bs.get('noseSneerRight', 0)) / 2
-        aus["AU10"] = (bs.get('mouthUpperUpLeft', 0) + bs.get('mouthUpperUpRight', 0)) / 2
-
-        smile = (bs.get('mouthSmileLeft', 0) + bs.get('mouthSmileRight', 0)) / 2
-        dimple = (bs.get('mouthDimpleLeft', 0) + bs.get('mouthDimpleRight', 0)) / 2
-        aus["AU12"] = smile + (dimple * 1.3)
-        aus["AU14"] = dimple
-        aus["AU15"] = (bs.get('mouthFrownLeft', 0) + bs.get('mouthFrownRight', 0)) / 2
-        aus["AU17"] = bs.get('chinRaise', 0)
-        aus["AU18"] = bs.get('mouthPucker', 0)
-        aus["AU20"] = (bs.get('mouthStretchLeft', 0) + bs.get('mouthStretchRight', 0)) / 2
-        press = (bs.get('mouthPressLeft', 0) + bs.get('mouthPressRight', 0)) / 2
-        aus["AU23"] = press * 0.9
-        aus["AU24"] = press
-        aus["AU25"] = bs.get('jawOpen', 0)
-        aus["AU26"] = bs.get('jawDrop', 0)
-        roll = (bs.get('mouthRollUpper', 0) + bs.get('mouthRollLower', 0)) / 2
-        aus["AU28"] = roll
+        return float(np.sum(np.linalg.norm(pts - center, axis=1)))
 
-        # Validação Física (Divergência)
-        brow_indices = [107, 336, 9, 66, 296]
-        curr_div = self._calculate_divergence(landmarks, brow_indices, w, h)
+    def _rotation_penalty_batch(self, landmarks):
+        """landmarks: (T, N, >=2). Mesma regra de _calculate_rotation_penalty."""
+        pose_pts = self._landmark_points(landmarks, [self.IDX_NOSE, self.IDX_EAR_L, self.IDX_EAR_R])
+        nose, ear_l, ear_r = pose_pts[:, 0, 0], pose_pts[:, 1, 0], pose_pts[:, 2, 0]
+        face_width = np.abs(ear_r - ear_l)
+        safe_width = np.where(face_width == 0, 1.0, face_width)
+        deviation = np.abs(np.abs(nose - ear_l) / safe_width - 0.5)
+        penalty = np.where(deviation > 0.12, np.minimum((deviation - 0.12) * 6.0, 1.0), 0.0)
+        return np.where(face_width == 0, 1.0, penalty)
+
+    def _divergence_batch(self, landmarks, w, h):
+        """landmarks: (T, N, >=2). Espalhamento (px) da testa em volta do centróide."""
+        pts = self._landmark_points(landmarks, self.BROW_INDICES) * np.array([w, h])
+        center = np.mean(pts, axis=1, keepdims=True)
+        return np.sum(np.linalg.norm(pts - center, axis=-1), axis=1)
+
+    def _effective_alpha(self, timestamp):
+        """Alpha do EMA para o intervalo real desde o último frame."""
+        if timestamp is None or self.prev_timestamp is None:
+            return self.alpha
+        dt = max(timestamp - self.prev_timestamp, 0.0)
+        return 1.0 - math.exp(-dt / self.ema_tau)
+
+    def _batch_alphas(self, timestamps, T):
+        """Alpha do EMA por frame do lote (mesma regra de _effective_alpha)."""
+        if timestamps is None:
+            self.prev_timestamp = None
+            return np.full(T, self.alpha)
+        ts = np.asarray(timestamps, dtype=float)
+        prev = np.concatenate([[np.nan if self.prev_timestamp is None else self.prev_timestamp], ts[:-1]])
+        alphas = 1.0 - np.exp(-np.maximum(ts - prev, 0.0) / self.ema_tau)
+        if self.prev_timestamp is None:
+            alphas[0] = self.alpha
+        self.prev_timestamp = float(ts[-1])
+        return alphas
+
+    # ------------------------------------------------------------------
+    # PIPELINE
+    # ------------------------------------------------------------------
+    def _raw_aus(self, scores):
+        # Produto com a matriz (52, n_AUs): 1 frame (52,) ou lote inteiro (T, 52)
+        return scores @ self.au_matrix
+
+    def _pre_ema(self, raw, rot_penalty, curr_div):
+        """
+        Validação física, curva e ganho. raw (..., n_AUs), rot_penalty e
+        curr_div escalares ou (T,). Fixa a baseline da física no 1º frame.
+        """
+        curr_div = np.asarray(curr_div, dtype=float)
         if not self.calibrated_physics:
-            self.baseline_div = curr_div
+            self.baseline_div = float(curr_div.flat[0])
             self.calibrated_physics = True
+        self.last_div = float(curr_div.flat[-1])
+
+        # Validação Física (Divergência)
+        raw = np.array(raw, dtype=float)
         div_delta = curr_div - self.baseline_div
-        if aus["AU4"] > 0.15 and div_delta > 6.0:
-            aus["AU4"] *= 0.2
-
-        # --- FILTRAGEM TEMPORAL E PÓS-PROCESSAMENTO ---
-        final_aus = {}
-        for k, v in aus.items():
-            # 1. Aplica Ganho e Curva
-            val = math.pow(v, 0.75) * current_gain
-            
-            # 2. SUAVIZAÇÃO TEMPORAL (EMA - Exponential Moving Average)
-            # Valor = (Atual * Alpha) + (Anterior * (1-Alpha))
-            prev = self.prev_aus.get(k, 0.0)
-            smoothed_val = (val * self.alpha) + (prev * (1.0 - self.alpha))
-            
-            # Atualiza memória
-            self.prev_aus[k] = smoothed_val
-            
-            # Usa o valor suavizado daqui pra frente
-            val = smoothed_val
-
-            # 3. APLICA A TARA MANUAL
-            if self.is_calibrated_manual:
-                offset = self.manual_offsets.get(k, 0.0)
-                val = max(0.0, val - offset)
-
-            # 4. Noise Gate (Corta ruído residual)
-            if val < self.noise_gate: val = 0.0
-            
-            final_aus[k] = min(val, 1.0)
-
-        return final_aus, rot_penalty
+        au4 = raw[..., self.idx_au4]
+        raw[..., self.idx_au4] = np.where((au4 > 0.15) & (div_delta > 6.0), au4 * 0.2, au4)
+
+        # 1. Aplica Ganho e Curva
+        current_gain = self.sensitivity * (1.0 - (np.asarray(rot_penalty, dtype=float) * 0.8))
+        return np.power(np.maximum(raw, 0.0), 0.75) * np.expand_dims(current_gain, -1)
+
+    def _post_ema(self, val):
+        """Tara, noise gate e clamp sobre (..., n_AUs) já suavizado."""
+        # 3. APLICA A TARA MANUAL
+        if self.is_calibrated_manual:
+            val = np.maximum(0.0, val - self.manual_offsets)
+
+        # 4. Noise Gate (Corta ruído residual) + clamp
+        val = np.where(val < self.noise_gate, 0.0, val)
+        return np.minimum(val, 1.0)
+
+    def _post_process(self, raw, rot_penalty, curr_div, timestamp):
+        """Um frame: validação física, curva/ganho, EMA, tara, gate e clamp."""
+        val = self._pre_ema(raw, rot_penalty, curr_div)
+
+        # 2. SUAVIZAÇÃO TEMPORAL (EMA - Exponential Moving Average)
+        # Valor = (Atual * Alpha) + (Anterior * (1-Alpha))
+        alpha = self._effective_alpha(timestamp)
+        self.prev_timestamp = timestamp
+        self.ema_state = (val * alpha) + (self.ema_state * (1.0 - alpha))
+        return self._post_ema(self.ema_state)
+
+    def process_vector(self, blendshapes, landmarks, w, h, timestamp=None, rotation_penalty=None):
+        """Igual a process(), mas devolve o vetor de AUs (alinhado com au_names)."""
+        raw = self._raw_aus(self.blendshape_vector(blendshapes))
+        if rotation_penalty is None:
+            rot_penalty = self._calculate_rotation_penalty(landmarks)
+        else:
+            rot_penalty = rotation_penalty
+        curr_div = self._calculate_divergence(landmarks, w, h)
+        return self._post_process(raw, rot_penalty, curr_div, timestamp), rot_penalty
+
+    def process(self, blendshapes, landmarks, w, h, timestamp=None, rotation_penalty=None):
+        """
+        timestamp (s, opcional): instante real de captura do frame. Quando
+        informado, o EMA usa o dt real; sem ele, assume o alpha fixo por frame.
+        rotation_penalty (opcional): vinda do HeadPoseEstimator (core/head_pose.py).
+        Sem ela, usa a estimativa simplificada nariz/orelhas.
+        """
+        final_aus, rot_penalty = self.process_vector(
+            blendshapes, landmarks, w, h, timestamp, rotation_penalty
+        )
+        return self.to_dict(final_aus), rot_penalty
+
+    def process_batch(self, blendshape_scores, landmarks, w, h, timestamps=None, rotation_penalties=None):
+        """
+        Modo offline: processa uma sequência inteira.
+        - blendshape_scores: (T, 52)
+        - landmarks: (T, 478, >=2) normalizados
+        - timestamps: (T,) em segundos (opcional)
+        - rotation_penalties: (T,) do HeadPoseEstimator (opcional)
+        Retorna (aus (T, n_AUs), rot_penalties (T,)) iguais ao streaming
+        frame a frame até o arredondamento de ponto flutuante (~1e-15, ver
+        inputs/check_hybrid_batch.py); o estado do EMA/calibração continua no objeto.
+        """
+        scores = np.asarray(blendshape_scores, dtype=float)
+        landmarks = np.asarray(landmarks, dtype=float)
+        if rotation_penalties is None:
+            rot_penalty = self._rotation_penalty_batch(landmarks)
+        else:
+            rot_penalty = np.asarray(rotation_penalties, dtype=float)
+        curr_div = self._divergence_batch(landmarks, w, h)
+
+        T = len(scores)
+        if T == 0:
+            return np.empty((0, self.n_aus)), rot_penalty
+
+        # Tudo vetorizado (1 produto (T, 52) x (52, n_AUs)); só o EMA é recursivo
+        val = self._pre_ema(self._raw_aus(scores), rot_penalty, curr_div)
+        alphas = self._batch_alphas(timestamps, T)
+
+        ema = np.empty_like(val)
+        state = self.ema_state
+        for t in range(T):
+            state = (val[t] * alphas[t]) + (state * (1.0 - alphas[t]))
+            ema[t] = state
+        self.ema_state = state
+        return self._post_ema(ema), rot_penalty
@@ -0,0 +1,116 @@
+import numpy as np
+from core.signal_processing import TimeRingBuffer
+
+
+class NeutralCalibrator:
+    """
+    Calibração Neutra Automática (substitui a tecla 'C' sem operador).
+
+    Mantém um anel curto (ring_seconds) com, por frame: níveis das AUs (antes
+    da tara), divergência da testa, energia de movimento e penalidade de
+    rotação. Estatística robusta por canal: mediana + MAD (desvio absoluto
+    mediano), que ignora piscadas e picos isolados de jitter.
+
+    A referência neutra (mediana da janela) é confirmada quando a janela
+    está QUIETA e ESTÁVEL e os frames quietos (um a um: movimento e rotação
+    abaixo dos limites) somam min_seconds. Só a mediana não basta: depois de
+    um movimento ela aquieta com metade da janela ainda em movimento.
+    - movimento mediano <= max_motion e rotação mediana <= max_rotation_penalty
+    - nenhuma AU varia mais que max_mad e a testa varia menos que max_div_mad
+    O nível absoluto da maioria das AUs não é limitado: o viés de repouso do
+    cliente (ex: AU7 alto com o rosto parado) é justamente o que a tara remove.
+    Só as AUs expressivas de viés de repouso baixo (max_neutral_levels) têm
+    teto: um sorriso ou lábios apertados mantidos parados são ESTÁVEIS, mas
+    não NEUTROS, e não podem virar tara da sessão (nem do snapshot).
+    """
+    def __init__(self, config, au_names):
+        cal_cfg = config.get('auto_calibration', {}) or {}
+        sch_cfg = config.get('scheduler', {}) or {}
+        self.enabled = cal_cfg.get('enabled', True)
+        self.ring_seconds = cal_cfg.get('ring_seconds', 1.5)
+        self.min_seconds = cal_cfg.get('min_seconds', 1.0)
+        self.max_mad = cal_cfg.get('max_mad', 0.05)
+        self.max_div_mad = cal_cfg.get('max_div_mad', 2.0)
+        # Sem valor próprio, usa o mesmo limiar de movimento do agendador
+        self.max_motion = cal_cfg.get('max_motion', sch_cfg.get('motion_threshold', 0.004))
+        self.max_rotation_penalty = cal_cfg.get('max_rotation_penalty', 0.1)
+
+        self.au_names = list(au_names)
+        self.n_aus = len(self.au_names)
+        # Teto de plausibilidade (mediana antes da tara) das AUs expressivas
+        ceilings = cal_cfg.get('max_neutral_levels', {}) or {}
+        ceilings = {k: v for k, v in ceilings.items() if k in self.au_names}
+        self.ceiling_names = list(ceilings)
+        self.ceiling_idx = np.array([self.au_names.index(k) for k in self.ceiling_names], dtype=int)
+        self.ceilings = np.array([ceilings[k] for k in self.ceiling_names], dtype=float)
+        self.rejected = False  # Já avisou que a janela estável não é neutra
+        # Canais: AUs | divergência | movimento | rotação; até 120 fps
+        self.i_div, self.i_motion, self.i_rot = self.n_aus, self.n_aus + 1, self.n_aus + 2
+        self.ring = TimeRingBuffer(int(self.ring_seconds * 120) + 1, self.n_aus + 3)
+
+        self.committed = False
+        self.confidence = 0.0  # 0..1 (HUD): quanto da janela quieta já foi coberto
+
+    def update(self, timestamp, au_levels, divergence, motion, rotation_penalty):
+        """
+        au_levels: vetor (n_aus,) ANTES da tara (HybridEngine.ema_state).
+        divergence: espalhamento da testa do frame (HybridEngine.last_div).
+        motion: energia de movimento (AnalyzerScheduler.motion_energy).
+        Retorna (níveis neutros (n_aus,), baseline_div) no frame em que
+        confirma a calibração; None nos demais.
+        """
+        if not self.enabled or self.committed:
+            return None
+
+        self.ring.append(np.append(au_levels, (divergence, motion, rotation_penalty)), timestamp)
+        data, ts = self.ring.window(self.ring_seconds)
+
+        median = np.median(data, axis=0)
+        mad = np.median(np.abs(data - median), axis=0)
+        quiet = (
+            median[self.i_motion] <= self.max_motion
+            and median[self.i_rot] <= self.max_rotation_penalty
+        )
+        stable = np.all(mad[:self.n_aus] <= self.max_mad) and mad[self.i_div] <= self.max_div_mad
+        if not (quiet and stable):
+            # Movimento/expressão ainda na janela: espera sair (sem confirmar)
+            self.confidence = 0.0
+            return None
+
+        # Tempo coberto pelos frames quietos (cada intervalo conta para o frame que o fecha)
+        frame_quiet = (
+            (data[1:, self.i_motion] <= self.max_motion)
+            & (data[1:, self.i_rot] <= self.max_rotation_penalty)
+        )
+        coverage = float(np.diff(ts)[frame_quiet].sum())
+        self.confidence = min(coverage / self.min_seconds, 1.0) if self.min_seconds > 0 else 1.0
+        if coverage < self.min_seconds:
+            return None
+
+        # Plausibilidade: estável, mas com expressão mantida -> não confirma
+        over = median[self.ceiling_idx] > self.ceilings
+        if np.any(over):
+            if not self.rejected:
+                held = ", ".join(
+                    f"{name}={median[i]:.2f}"
+                    for name, i, o in zip(self.ceiling_names, self.ceiling_idx, over) if o
+                )
+                print(f">>> CALIBRAÇÃO AUTOMÁTICA ADIADA: expressão mantida ({held})")
+                self.rejected = True
+            self.confidence = 0.0
+            return None
+        self.rejected = False
+
+        self.committed = True
+        return median[:self.n_aus], float(median[self.i_div])
+
+    def mark_calibrated(self):
+        """Calibração já existe (tecla 'C' ou snapshot restaurado): não recalibra."""
+        self.committed = True
+        self.confidence = 1.0
+
+    def reset(self):
+        self.ring.clear()
+        self.committed = False
+        self.confidence = 0.0
+        self.rejected = False
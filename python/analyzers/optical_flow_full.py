@@ -1,14 +1,30 @@
 import cv2
 import numpy as np
+from core.frame_pool import FramePool
 
 class FullFaceFlowEngine:
     """
     MOTOR V10 FULL: Monitora tensão física em 5 zonas críticas.
     Compatível com a lista de 21 AUs do JSON.
+
+    Backend do fluxo denso (config 'optical_flow.backend'):
+    - "farneback": original, mais sensível
+    - "dis": DIS (OpenCV), preset ultrarrápido, bem mais barato por zona
     """
-    def __init__(self):
+    BACKENDS = ("farneback", "dis")
+    DIS_MIN_SIDE = 32
+
+    def __init__(self, config=None):
         self.prev_gray = None
         self.initialized = False
+
+        flow_cfg = (config or {}).get('optical_flow', {}) or {}
+        self.backend = flow_cfg.get('backend', 'farneback')
+        if self.backend not in self.BACKENDS:
+            raise ValueError(f"optical_flow.backend inválido: {self.backend} (use {self.BACKENDS})")
+        self.dis = None
+        if self.backend == 'dis':
+            self.dis = cv2.DISOpticalFlow_create(cv2.DISOPTICAL_FLOW_PRESET_ULTRAFAST)
         
         # 1. Definição das Zonas (Landmark Indices do MediaPipe 468)
         # Escolhidos estrategicamente para pegar a musculatura correta
@@ -31,8 +47,114 @@ class FullFaceFlowEngine:
         }
         
         # Armazena o 'recorte' anterior de cada zona para comparação
+        # (cópias próprias: o cinza do frame vem de um buffer reutilizado)
         self.prev_crops = {}
 
+        # Buffers reutilizados: cinza do frame, bordas do DIS e gradientes
+        self.pool = FramePool()
+
+    def _get_crop(self, gray, landmarks, indices, w, h):
+        """Recorta a ROI (com padding) de uma zona. Retorna None se inválida."""
+        # 1. Obter Bounding Box da Zona baseada nos Landmarks
+        if isinstance(landmarks, np.ndarray):
+            pts = (landmarks[indices, :2] * np.array([w, h])).astype(np.int32)
+        else:
+            pts = np.array([[landmarks[i].x * w, landmarks[i].y * h] for i in indices], dtype=np.int32)
+        x, y, rw, rh = cv2.boundingRect(pts)
+
+        # Proteção: Se a área for muito pequena (erro de tracking ou longe demais), ignora
+        if rw < 5 or rh < 5:
+            return None
+
+        # 2. Recortar a ROI com Margem de Segurança (Padding)
+        # O padding é crucial para ver o movimento da pele "puxando" as bordas
+        pad = 10
+        # Garante que não vamos tentar ler pixels fora da imagem (evita crash)
+        y1, y2 = max(0, y-pad), min(h, y+rh+pad)
+        x1, x2 = max(0, x-pad), min(w, x+rw+pad)
+
+        crop = gray[y1:y2, x1:x2]
+
+        # Se o recorte falhou ou tem tamanho zero
+        if crop.size == 0:
+            return None
+        return crop
+
+    def _gray(self, frame):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.pool.get('gray', frame.shape[:2]))
+
+    def _store_crop(self, name, crop):
+        """Guarda uma cópia do recorte da zona (reaproveita o buffer se o tamanho não mudou)."""
+        prev = self.prev_crops.get(name)
+        if prev is not None and prev.shape == crop.shape:
+            np.copyto(prev, crop)
+        else:
+            self.prev_crops[name] = crop.copy()
+
+    @staticmethod
+    def _gradient_sum(a, axis):
+        """
+        Soma de np.gradient(a, axis) sem alocar o gradiente: as diferenças
+        centrais internas se cancelam (soma telescópica) e sobram as bordas.
+        """
+        first, second = np.take(a, 0, axis), np.take(a, 1, axis)
+        last, before = np.take(a, -1, axis), np.take(a, -2, axis)
+        edges = (second - first).sum() + (last - before).sum()
+        if a.shape[axis] < 3:
+            return float(edges)
+        return float(edges + 0.5 * ((last + before).sum() - (first + second).sum()))
+
+    def _dense_flow(self, prev, curr):
+        """Fluxo denso (H, W, 2) entre dois recortes do mesmo tamanho."""
+        h, w = prev.shape
+        if self.dis is not None:
+            # DIS quebra (segfault) em recortes baixos e largos (< 32 px de lado):
+            # completa a borda por replicação e devolve só a região original.
+            # copyMakeBorder também garante imagens contínuas (exigência do DIS).
+            pad_h, pad_w = max(0, self.DIS_MIN_SIDE - h), max(0, self.DIS_MIN_SIDE - w)
+            shape = (h + pad_h, w + pad_w)
+            prev = cv2.copyMakeBorder(prev, 0, pad_h, 0, pad_w, cv2.BORDER_REPLICATE,
+                                      dst=self.pool.get('dis_prev', shape))
+            curr = cv2.copyMakeBorder(curr, 0, pad_h, 0, pad_w, cv2.BORDER_REPLICATE,
+                                      dst=self.pool.get('dis_curr', shape))
+            # Saída sem buffer: o DIS lê um 'flow' não vazio como entrada (muda o resultado)
+            return self.dis.calc(prev, curr, None)[:h, :w]
+        # Farneback configurado para alta sensibilidade (winsize pequeno)
+        return cv2.calcOpticalFlowFarneback(
+            prev, curr, self.pool.get('flow', (h, w, 2), np.float32),
+            pyr_scale=0.5, levels=1, winsize=10,
+            iterations=2, poly_n=5, poly_sigma=1.1, flags=0
+        )
+
+    @staticmethod
+    def apply_boosts(aus, strains):
+        """
+        Boosts físicos (V10) sobre as AUs do HybridEngine (altera 'aus' in-place).
+        Compressão na testa/nariz confirma AU4/AU9; tensão forte na boca reforça
+        as AUs de boca que já estão ativas.
+        """
+        if strains.get("brow", 0) < -3.0:
+            aus["AU4"] = max(aus["AU4"], 0.45)
+        if strains.get("nose", 0) < -2.5:
+            aus["AU9"] = max(aus["AU9"], 0.40)
+        if abs(strains.get("mouth", 0)) > 4.0:
+            for m_au in ["AU12", "AU24", "AU25"]:
+                if aus.get(m_au, 0) > 0.1:
+                    aus[m_au] += 0.15
+        return aus
+
+    def update_reference(self, frame, landmarks, w, h):
+        """
+        Atualiza apenas os recortes de referência, sem calcular o fluxo.
+        Usado pelo agendador em frames pulados: quando o analisador voltar
+        a rodar, o fluxo mede o movimento de 1 frame (e não o acumulado).
+        """
+        gray = self._gray(frame)
+        for name, indices in self.rois_def.items():
+            crop = self._get_crop(gray, landmarks, indices, w, h)
+            if crop is not None:
+                self._store_crop(name, crop)
+
     def analyze(self, frame, landmarks, w, h):
         """
         Calcula o Fluxo Óptico (Tensão) para cada zona.
@@ -41,7 +163,7 @@ class FullFaceFlowEngine:
         Valores Positivos = Expansão (Abertura)
         """
         # Converte para P&B (Optical Flow não precisa de cor)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        gray = self._gray(frame)
         results = {}
         
         # Inicializa dicionário com 0.0 para segurança
@@ -49,25 +171,8 @@ class FullFaceFlowEngine:
             results[zone] = 0.0
         
         for name, indices in self.rois_def.items():
-            # 1. Obter Bounding Box da Zona baseada nos Landmarks
-            pts = np.array([[landmarks[i].x * w, landmarks[i].y * h] for i in indices], dtype=np.int32)
-            x, y, rw, rh = cv2.boundingRect(pts)
-            
-            # Proteção: Se a área for muito pequena (erro de tracking ou longe demais), ignora
-            if rw < 5 or rh < 5: 
-                continue
-            
-            # 2. Recortar a ROI com Margem de Segurança (Padding)
-            # O padding é crucial para ver o movimento da pele "puxando" as bordas
-            pad = 10
-            # Garante que não vamos tentar ler pixels fora da imagem (evita crash)
-            y1, y2 = max(0, y-pad), min(h, y+rh+pad)
-            x1, x2 = max(0, x-pad), min(w, x+rw+pad)
-            
-            crop_curr = gray[y1:y2, x1:x2]
-            
-            # Se o recorte falhou ou tem tamanho zero
-            if crop_curr.size == 0:
+            crop_curr = self._get_crop(gray, landmarks, indices, w, h)
+            if crop_curr is None:
                 continue
 
             # Recupera o frame anterior dessa zona específica
@@ -75,30 +180,26 @@ class FullFaceFlowEngine:
             
             # Se não temos histórico ou o tamanho mudou (zoom/movimento rápido), reseta
             if prev is None or crop_curr.shape != prev.shape:
-                self.prev_crops[name] = crop_curr
+                self._store_crop(name, crop_curr)
                 continue # Retorna 0.0 neste frame
 
-            # 3. Fluxo Óptico Denso (Algoritmo de Farneback)
-            # Configurado para alta sensibilidade (winsize pequeno)
-            flow = cv2.calcOpticalFlowFarneback(
-                prev, crop_curr, None, 
-                pyr_scale=0.5, levels=1, winsize=10, 
-                iterations=2, poly_n=5, poly_sigma=1.1, flags=0
-            )
+            # 3. Fluxo Óptico Denso
+            flow = self._dense_flow(prev, crop_curr)
             
             # 4. Cálculo Vetorial: Divergência (Strain)
-            # Mede a "taxa de deformação" da textura da pele
-            du_dx = np.gradient(flow[..., 0], axis=1) # Derivada X
-            dv_dy = np.gradient(flow[..., 1], axis=0) # Derivada Y
-            divergence = du_dx + dv_dy
+            # Mede a "taxa de deformação" da textura da pele:
+            # média de du/dx + dv/dy (np.gradient), sem materializar os gradientes
+            du_dx = self._gradient_sum(flow[..., 0], axis=1) # Derivada X
+            dv_dy = self._gradient_sum(flow[..., 1], axis=0) # Derivada Y
+            divergence = (du_dx + dv_dy) / (flow.shape[0] * flow.shape[1])
             
             # A média da divergência na região é o nosso sinal físico
             # Multiplicamos por 2000 para transformar números como 0.0005 em 1.0 (legível)
-            strain = np.mean(divergence) * 2000.0
+            strain = divergence * 2000.0
             
             results[name] = strain
             
             # Atualiza memória para o próximo frame
-            self.prev_crops[name] = crop_curr
+            self._store_crop(name, crop_curr)
             
         return results
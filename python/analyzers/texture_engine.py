@@ -22,6 +22,13 @@ class TextureEngine:
             "au9_nose_R": 6    # Centro do nariz
         }
 
+        # Scratch pré-alocado da ROI (CV_32F basta para Sobel 3x3 sobre uint8)
+        size = (self.roi_size, self.roi_size)
+        self.gray = np.empty(size, np.uint8)
+        self.sobel_x = np.empty(size, np.float32)
+        self.sobel_y = np.empty(size, np.float32)
+        self.magnitude = np.empty(size, np.float32)
+
     def analyze(self, frame_bgr, landmarks):
         """
         Retorna dicionário com intensidade de textura (0.0 a 255.0+).
@@ -58,7 +65,8 @@ class TextureEngine:
             idx_center=center_idx,
             idx_align_1=self.idx_align_L, 
             idx_align_2=self.idx_align_R, 
-            output_size=self.roi_size
+            output_size=self.roi_size,
+            dst=self.gray
         )
         
         if roi is None:
@@ -66,12 +74,12 @@ class TextureEngine:
             
         # 2. Filtro de Borda (Sobel)
         # Detecta mudanças bruscas de intensidade (rugas)
-        sobel_x = cv2.Sobel(roi, cv2.CV_64F, 1, 0, ksize=3)
-        sobel_y = cv2.Sobel(roi, cv2.CV_64F, 0, 1, ksize=3)
+        cv2.Sobel(roi, cv2.CV_32F, 1, 0, dst=self.sobel_x, ksize=3)
+        cv2.Sobel(roi, cv2.CV_32F, 0, 1, dst=self.sobel_y, ksize=3)
         
         # Magnitude do gradiente
-        magnitude = np.sqrt(sobel_x**2 + sobel_y**2)
+        cv2.magnitude(self.sobel_x, self.sobel_y, self.magnitude)
         
         # 3. Score = Média da intensidade das bordas
         # Quanto mais rugas, maior este número.
-        return np.mean(magnitude)
+        return cv2.mean(self.magnitude)[0]
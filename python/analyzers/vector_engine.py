@@ -38,28 +38,73 @@ class VectorEngine:
             "jaw_bottom": 152
         }
 
-    def analyze(self, landmarks):
+        # Pares de distância (nome, ponto A, ponto B), calculados todos de uma vez
+        self.PAIRS = [
+            ("brow_inner_L", "brow_inner_L", "nose_bridge"),
+            ("brow_inner_R", "brow_inner_R", "nose_bridge"),
+            ("brow_outer_L", "brow_outer_L", "nose_bridge"),
+            ("brow_outer_R", "brow_outer_R", "nose_bridge"),
+            ("eye_open_L", "lid_top_L", "lid_bottom_L"),
+            ("eye_open_R", "lid_top_R", "lid_bottom_R"),
+            ("lip_nose", "lip_top", "nose_tip"),
+            ("mouth_w", "mouth_L", "mouth_R"),
+            ("corner_nose_L", "mouth_L", "nose_tip"),
+            ("corner_nose_R", "mouth_R", "nose_tip"),
+            ("corner_chin_L", "mouth_L", "chin"),
+            ("corner_chin_R", "mouth_R", "chin"),
+            ("lip_gap", "lip_top", "lip_bottom"),
+        ]
+        self._compile()
+
+    def _compile(self):
+        """Pré-compila os pares em arrays de índices (globais e locais aos pontos usados)."""
+        self._points = sorted(set(self.IDX.values()))
+        local = {idx: i for i, idx in enumerate(self._points)}
+        self._local = {name: local[idx] for name, idx in self.IDX.items()}
+        self._pairs = [(self.IDX[a], self.IDX[b]) for _, a, b in self.PAIRS]
+        self._local_pairs = np.array([[self._local[a], self._local[b]] for _, a, b in self.PAIRS])
+        self._pair_pos = {name: i for i, (name, _, _) in enumerate(self.PAIRS)}
+
+    def analyze(self, landmarks, head_pose=None):
         """
         Calcula sinais para todas as AUs geométricas.
+        Aceita objetos do MediaPipe (478) ou arrays (478, 3) / (T, 478, 3);
+        no caso (T, ...), cada sinal vira um array (T,).
+        head_pose (opcional): dict do HeadPoseEstimator. Quando informado,
+        head_yaw/head_pitch/head_roll saem em GRAUS (em vez das razões).
         """
+        if isinstance(landmarks, np.ndarray):
+            pts = GeometryUtils.landmarks_to_array(landmarks, self._points)
+            d = GeometryUtils.pairwise_distances(pts, self._local_pairs)
+
+            def dist(name):
+                return d[..., self._pair_pos[name]]
+
+            def coord(name, axis):
+                return pts[..., self._local[name], axis]
+        else:
+            # 1 frame de objetos: floats puros (mais barato que montar arrays)
+            d = GeometryUtils.euclidean_distances(landmarks, self._pairs)
+
+            def dist(name):
+                return d[self._pair_pos[name]]
+
+            def coord(name, axis):
+                p = landmarks[self.IDX[name]]
+                return p.x if axis == 0 else p.y
+
         signals = {}
 
         # ------------------------------------------------------------------
         # GRUPO 1: SOBRANCELHAS (AU1, AU2, AU4)
         # ------------------------------------------------------------------
         # AU1: Inner Brow Raiser (Distância sobrancelha interna -> olho interno ou nariz)
-        d_brow_inner = (
-            GeometryUtils.euclidean_distance(landmarks[self.IDX["brow_inner_L"]], landmarks[self.IDX["nose_bridge"]]) +
-            GeometryUtils.euclidean_distance(landmarks[self.IDX["brow_inner_R"]], landmarks[self.IDX["nose_bridge"]])
-        ) / 2.0
+        d_brow_inner = (dist("brow_inner_L") + dist("brow_inner_R")) / 2.0
         signals["au1_inner_brow"] = d_brow_inner * self.brow_sens
 
         # AU2: Outer Brow Raiser (Distância sobrancelha externa -> canto olho)
         # Simplificado: medindo contra nariz para estabilidade
-        d_brow_outer = (
-            GeometryUtils.euclidean_distance(landmarks[self.IDX["brow_outer_L"]], landmarks[self.IDX["nose_bridge"]]) +
-            GeometryUtils.euclidean_distance(landmarks[self.IDX["brow_outer_R"]], landmarks[self.IDX["nose_bridge"]])
-        ) / 2.0
+        d_brow_outer = (dist("brow_outer_L") + dist("brow_outer_R")) / 2.0
         signals["au2_outer_brow"] = d_brow_outer * self.brow_sens
 
         # AU4: Brow Lowerer (Já tínhamos, usa a mesma métrica mas a lógica interpreta invertido)
@@ -71,10 +116,8 @@ class VectorEngine:
         # GRUPO 2: OLHOS (AU5, AU7, AU43, AU45)
         # ------------------------------------------------------------------
         # Abertura do olho (Distância pálpebra sup - inf)
-        eye_open_L = GeometryUtils.euclidean_distance(landmarks[self.IDX["lid_top_L"]], landmarks[self.IDX["lid_bottom_L"]])
-        eye_open_R = GeometryUtils.euclidean_distance(landmarks[self.IDX["lid_top_R"]], landmarks[self.IDX["lid_bottom_R"]])
-        avg_eye_open = (eye_open_L + eye_open_R) / 2.0
-        
+        avg_eye_open = (dist("eye_open_L") + dist("eye_open_R")) / 2.0
+
         # AU5 (Olho arregalado) vs AU43/45 (Olho fechado)
         signals["au5_eye_open"] = avg_eye_open
 
@@ -83,26 +126,19 @@ class VectorEngine:
         # ------------------------------------------------------------------
         # AU10: Upper Lip Raiser (Lábio sup -> Nariz)
         # Distância DIMINUI quando AU10 ativa
-        d_lip_nose = GeometryUtils.euclidean_distance(landmarks[self.IDX["lip_top"]], landmarks[self.IDX["nose_tip"]])
-        signals["au10_upper_lip"] = d_lip_nose * self.mouth_sens
+        signals["au10_upper_lip"] = dist("lip_nose") * self.mouth_sens
 
         # AU12: Lip Corner Puller (Já tínhamos)
-        d_mouth_w = GeometryUtils.euclidean_distance(landmarks[self.IDX["mouth_L"]], landmarks[self.IDX["mouth_R"]])
+        d_mouth_w = dist("mouth_w")
         # Distância Canto Boca -> Nariz (Diminui no sorriso)
-        d_corner_nose = (
-            GeometryUtils.euclidean_distance(landmarks[self.IDX["mouth_L"]], landmarks[self.IDX["nose_tip"]]) +
-            GeometryUtils.euclidean_distance(landmarks[self.IDX["mouth_R"]], landmarks[self.IDX["nose_tip"]])
-        ) / 2.0
+        d_corner_nose = (dist("corner_nose_L") + dist("corner_nose_R")) / 2.0
         signals["au12_mouth_dist"] = d_corner_nose * self.mouth_sens
 
         # ------------------------------------------------------------------
         # GRUPO 4: BOCA INFERIOR / LARGURA (AU14, AU15, AU20)
         # ------------------------------------------------------------------
         # AU15: Lip Corner Depressor (Canto boca -> Queixo)
-        d_corner_chin = (
-            GeometryUtils.euclidean_distance(landmarks[self.IDX["mouth_L"]], landmarks[self.IDX["chin"]]) +
-            GeometryUtils.euclidean_distance(landmarks[self.IDX["mouth_R"]], landmarks[self.IDX["chin"]])
-        ) / 2.0
+        d_corner_chin = (dist("corner_chin_L") + dist("corner_chin_R")) / 2.0
         signals["au15_chin_dist"] = d_corner_chin * self.mouth_sens
 
         # AU20: Lip Stretcher (Largura horizontal da boca)
@@ -118,30 +154,32 @@ class VectorEngine:
         # ------------------------------------------------------------------
         # Altura da parte vermelha dos lábios (Thickness)
         # AU23/24 (Apertar lábios): Essa distância diminui
-        lip_thickness = GeometryUtils.euclidean_distance(landmarks[self.IDX["lip_top"]], landmarks[self.IDX["lip_bottom"]])
-        signals["au23_lip_tight"] = lip_thickness 
+        signals["au23_lip_tight"] = dist("lip_gap")
 
         # Abertura da boca (Mandíbula)
         # AU25/26/27
-        mouth_open_vertical = GeometryUtils.euclidean_distance(landmarks[self.IDX["lip_top"]], landmarks[self.IDX["lip_bottom"]])
-        signals["au25_lip_open"] = mouth_open_vertical
+        signals["au25_lip_open"] = dist("lip_gap")
 
         # ------------------------------------------------------------------
         # GRUPO 6: CABEÇA (AU51-54)
         # ------------------------------------------------------------------
+        if head_pose is not None:
+            signals["head_yaw"] = head_pose["yaw"]
+            signals["head_pitch"] = head_pose["pitch"]
+            signals["head_roll"] = head_pose["roll"]
+            return signals
+
         # Yaw (Esquerda/Direita - AU51/52)
-        nose_x = landmarks[self.IDX["nose_tip"]].x
-        ear_L = landmarks[self.IDX["face_left"]].x
-        ear_R = landmarks[self.IDX["face_right"]].x
+        nose_x = coord("nose_tip", 0)
+        ear_L = coord("face_left", 0)
+        ear_R = coord("face_right", 0)
         face_width = abs(ear_R - ear_L)
         # Ratio 0.5 = Centro. >0.5 Dir, <0.5 Esq.
-        yaw_ratio = (nose_x - ear_L) / (face_width + 0.0001)
-        signals["head_yaw"] = yaw_ratio
+        signals["head_yaw"] = (nose_x - ear_L) / (face_width + 0.0001)
 
         # Pitch (Cima/Baixo - AU53/54)
-        nose_y = landmarks[self.IDX["nose_tip"]].y
-        eyes_mid_y = (landmarks[self.IDX["lid_top_L"]].y + landmarks[self.IDX["lid_top_R"]].y) / 2
-        nose_eye_dist = abs(nose_y - eyes_mid_y)
-        signals["head_pitch"] = nose_eye_dist
+        nose_y = coord("nose_tip", 1)
+        eyes_mid_y = (coord("lid_top_L", 1) + coord("lid_top_R", 1)) / 2
+        signals["head_pitch"] = abs(nose_y - eyes_mid_y)
 
         return signals
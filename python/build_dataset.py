@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Monta a base de features rotulada a partir de Videos_microexpressão.
+
+Cada clipe (AUS/AU4.mp4, HEAD/HEAD51.mp4, ...) passa pelo mesmo caminho do
+main5 (FaceLandmarker -> One-Euro -> pose) e por todos os motores:
+HybridEngine (21 AUs), VectorEngine, TextureEngine, FullFaceFlowEngine e
+a Física de Campo (em lote, sobre os landmarks canônicos).
+
+Saída: um único .npz comprimido, uma linha por frame:
+    features (N, F) float32 + feature_names
+    label, clip, timestamp, frame, face   (colunas de identificação)
+    landmarks (N, 478, 3) float32         (landmarks suavizados, p/ recalcular offline)
+    fingerprint                           (hash de config + código + clipes)
+
+Se o fingerprint do arquivo existente bater com o atual, nada é refeito.
+
+Uso:
+    python build_dataset.py
+    python build_dataset.py --videos Videos_microexpressão/AUS --out outputs/dataset_aus.npz
+"""
+
+import os
+import sys
+import time
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import yaml
+import numpy as np
+
+# Garante que o Python encontre os módulos na raiz
+ROOT_DIR = Path(__file__).resolve().parent
+sys.path.append(str(ROOT_DIR))
+
+VIDEO_EXTS = {".mp4", ".mov", ".mkv", ".avi", ".webm", ".m4v"}
+
+# Sobe quando o layout do .npz mudar (invalida as bases antigas)
+DATASET_VERSION = 1
+
+DEFAULT_VIDEOS = ROOT_DIR / "Videos_microexpressão"
+DEFAULT_OUT = ROOT_DIR / "outputs" / "dataset_microexpressao.npz"
+CONFIG_PATH = ROOT_DIR / "config" / "thresholds_config.yaml"
+MAPPINGS_PATH = ROOT_DIR / "config" / "au_mappings.json"
+
+# Código que altera as features: mudou -> a base é refeita
+SOURCE_DIRS = ("analyzers", "core", "modules")
+
+
+def clip_label(video_path: Path) -> str:
+    """Rótulo do clipe = nome do arquivo (AU4.mp4 -> 'AU4', HEAD51.mp4 -> 'HEAD51')."""
+    return video_path.stem.upper()
+
+
+def collect_videos(paths: List[str]) -> List[Path]:
+    videos = []
+    for p in paths:
+        p = Path(p).expanduser()
+        if p.is_dir():
+            videos.extend(f for f in p.rglob("*") if f.suffix.lower() in VIDEO_EXTS)
+        elif p.suffix.lower() in VIDEO_EXTS:
+            videos.append(p)
+    return sorted(set(v.resolve() for v in videos))
+
+
+def load_config(config_path: Path = CONFIG_PATH) -> dict:
+    with open(config_path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def config_fingerprint(cfg: dict, videos: List[Path]) -> str:
+    """
+    Hash de tudo que muda as features: config (yaml já parseado), mapeamento
+    de AUs, código dos motores e a lista de clipes (caminho, tamanho, mtime).
+    """
+    h = hashlib.sha256()
+    h.update(f"v{DATASET_VERSION}".encode())
+    h.update(json.dumps(cfg, sort_keys=True, default=str).encode())
+    if MAPPINGS_PATH.exists():
+        h.update(MAPPINGS_PATH.read_bytes())
+    sources = [Path(__file__).resolve()]
+    for d in SOURCE_DIRS:
+        sources.extend(sorted((ROOT_DIR / d).glob("*.py")))
+    for src in sources:
+        h.update(src.name.encode())
+        h.update(src.read_bytes())
+    for v in videos:
+        st = v.stat()
+        h.update(f"{v.parent.name}/{v.name}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def extract_clip(video_path: Path, cfg: dict) -> Dict:
+    """
+    Roda um clipe inteiro (em um processo do pool) e devolve as colunas cruas.
+    Os motores são criados aqui: MediaPipe não atravessa processos.
+    """
+    from modules.landmark_tracker import LandmarkTracker
+    from modules.landmark_smoother import LandmarkSmoother
+    from analyzers.hybrid_engine import HybridEngine
+    from analyzers.vector_engine import VectorEngine
+    from analyzers.texture_engine import TextureEngine
+    from analyzers.optical_flow_full import FullFaceFlowEngine
+    from analyzers.field_engine import FieldEngine
+    from core.head_pose import HeadPoseEstimator
+    from core.canonical_landmarks import CanonicalLandmarks
+
+    tracker = LandmarkTracker(str(ROOT_DIR / "face_landmarker.task"), config=cfg)
+    smoother = LandmarkSmoother(cfg)
+    head_pose = HeadPoseEstimator(cfg)
+    hybrid = HybridEngine(cfg)
+    vector = VectorEngine(cfg)
+    texture = TextureEngine(cfg)
+    flow = FullFaceFlowEngine(cfg)
+    field = FieldEngine(cfg)
+    canonical = CanonicalLandmarks(cfg)
+
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise RuntimeError(f"Não foi possível abrir: {video_path}")
+
+    rows, timestamps, frames, faces = [], [], [], []
+    landmarks = []
+    canonical_lm = []
+    frame_idx = 0
+    t0 = time.perf_counter()
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        # Tempo do vídeo (s): a física não depende do fps do arquivo
+        ts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        h, w = frame.shape[:2]
+
+        row = {}
+        packet = tracker.process_frame(frame)
+        found = bool(packet and packet.face_blendshapes and packet.face_landmarks)
+        if found:
+            lm, bs = smoother.process(
+                packet.face_landmarks[0],
+                hybrid.blendshape_vector(packet.face_blendshapes[0]),
+                ts,
+            )
+            matrices = packet.facial_transformation_matrixes
+            face_matrix = smoother.process_matrix(matrices[0] if matrices else None, ts)
+            pose = head_pose.estimate(lm, w, h, face_matrix)
+            aus, _ = hybrid.process(bs, lm, w, h, timestamp=ts, rotation_penalty=pose["rotation_penalty"])
+
+            row.update(aus)
+            row.update(vector.analyze(lm, head_pose=pose))
+            row.update(texture.analyze(frame, lm))
+            row.update({f"flow_{k}": v for k, v in flow.analyze(frame, lm, w, h).items()})
+            row["rotation_penalty"] = pose["rotation_penalty"]
+            landmarks.append(lm.astype(np.float32))
+            canonical_lm.append(canonical.transform(lm, w, h, face_matrix))
+        else:
+            landmarks.append(np.full((478, 3), np.nan, dtype=np.float32))
+
+        rows.append(row)
+        timestamps.append(ts)
+        frames.append(frame_idx)
+        faces.append(found)
+        frame_idx += 1
+    cap.release()
+    elapsed = time.perf_counter() - t0
+
+    # Física de Campo em lote (só nos frames com rosto, com os tempos reais)
+    faces = np.asarray(faces, dtype=bool)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if faces.any():
+        field_cols = field.analyze_batch(np.asarray(canonical_lm), timestamps=timestamps[faces])
+        face_rows = np.flatnonzero(faces)
+        for name, col in field_cols.items():
+            for i, value in zip(face_rows, col.tolist()):
+                rows[i][name] = value
+
+    return {
+        "clip": video_path.name,
+        "label": clip_label(video_path),
+        "rows": rows,
+        "timestamp": timestamps,
+        "frame": np.asarray(frames, dtype=np.int32),
+        "face": faces,
+        "landmarks": np.asarray(landmarks, dtype=np.float32).reshape(-1, 478, 3),
+        "ms_per_frame": 1000.0 * elapsed / max(1, frame_idx),
+    }
+
+
+def assemble(results: List[Dict], fingerprint: str) -> Dict[str, np.ndarray]:
+    """Junta os clipes numa matriz única (colunas = união das features, ordem estável)."""
+    feature_names = []
+    seen = set()
+    for res in results:
+        for row in res["rows"]:
+            for name in row:
+                if name not in seen:
+                    seen.add(name)
+                    feature_names.append(name)
+    col = {name: j for j, name in enumerate(feature_names)}
+
+    n = sum(len(res["rows"]) for res in results)
+    features = np.full((n, len(feature_names)), np.nan, dtype=np.float32)
+    i = 0
+    for res in results:
+        for row in res["rows"]:
+            for name, value in row.items():
+                features[i, col[name]] = value
+            i += 1
+
+    def cat(key, dtype=None):
+        arrays = [np.asarray(res[key]) for res in results]
+        return np.concatenate(arrays).astype(dtype) if arrays else np.zeros(0, dtype=dtype)
+
+    return {
+        "features": features,
+        "feature_names": np.array(feature_names, dtype=str),
+        "label": np.concatenate([[res["label"]] * len(res["rows"]) for res in results]).astype(str),
+        "clip": np.concatenate([[res["clip"]] * len(res["rows"]) for res in results]).astype(str),
+        "timestamp": cat("timestamp", np.float64),
+        "frame": cat("frame", np.int32),
+        "face": cat("face", bool),
+        "landmarks": np.concatenate([res["landmarks"] for res in results]),
+        "fingerprint": np.array(fingerprint),
+        "version": np.array(DATASET_VERSION),
+    }
+
+
+def stored_fingerprint(path: Path) -> Optional[str]:
+    """Lê só o fingerprint de um .npz existente (o resto não é descomprimido)."""
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as data:
+            return str(data["fingerprint"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def load_dataset(path=DEFAULT_OUT) -> Dict[str, np.ndarray]:
+    """Carrega a base inteira como dict de arrays."""
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def build_dataset(videos: List[Path], out_path: Path, cfg: dict, workers: int = 1, force: bool = False) -> bool:
+    """
+    Monta (ou reaproveita) a base. Retorna True se a base foi refeita.
+    """
+    fingerprint = config_fingerprint(cfg, videos)
+    if not force and stored_fingerprint(out_path) == fingerprint:
+        print(f"[SKIP ] Base atualizada (fingerprint {fingerprint[:12]}): {out_path}")
+        return False
+
+    results = {}
+    workers = max(1, min(int(workers), len(videos)))
+    if workers == 1:
+        for vp in videos:
+            results[vp] = extract_clip(vp, cfg)
+            print(f"[CLIP ] {vp.name}: {len(results[vp]['rows'])} frames ({results[vp]['ms_per_frame']:.1f} ms/frame)")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(extract_clip, vp, cfg): vp for vp in videos}
+            not_done = set(futures)
+            while not_done:
+                done, not_done = wait(not_done, timeout=2.0, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    vp = futures[fut]
+                    results[vp] = fut.result()
+                    print(f"[CLIP ] {vp.name}: {len(results[vp]['rows'])} frames ({results[vp]['ms_per_frame']:.1f} ms/frame)")
+                if done:
+                    print(f"[PROGRESS] Clipes: {len(results)}/{len(videos)}")
+
+    # Ordem fixa (a dos caminhos), independente de quem terminou primeiro
+    data = assemble([results[vp] for vp in videos], fingerprint)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.stem + ".tmp.npz")
+    np.savez_compressed(tmp_path, **data)
+    os.replace(tmp_path, out_path)
+
+    n, f = data["features"].shape
+    print(f"[SAVED] {out_path} | {n} frames x {f} features | {len(videos)} clipes | rosto em {int(data['face'].sum())} frames")
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Monta a base de features rotulada a partir dos clipes de AU/HEAD.")
+    ap.add_argument("--videos", nargs="+", default=[str(DEFAULT_VIDEOS)], help="Vídeos ou pastas (default: Videos_microexpressão).")
+    ap.add_argument("--out", default=str(DEFAULT_OUT), help="Arquivo .npz de saída.")
+    ap.add_argument("--config", default=str(CONFIG_PATH), help="YAML de configuração (default: config/thresholds_config.yaml).")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, min(4, (os.cpu_count() or 1))),
+        help="Clipes processados em paralelo (processos). 1 = sequencial.",
+    )
+    ap.add_argument("--force", action="store_true", help="Refaz a base mesmo com o fingerprint igual.")
+    args = ap.parse_args()
+
+    videos = collect_videos(args.videos)
+    if not videos:
+        raise SystemExit("Nenhum vídeo encontrado nos caminhos fornecidos.")
+
+    build_dataset(videos, Path(args.out).expanduser().resolve(), load_config(Path(args.config)), args.workers, args.force)
+
+
+if __name__ == "__main__":
+    main()
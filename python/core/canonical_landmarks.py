@@ -0,0 +1,98 @@
+import numpy as np
+from core.geometry_utils import GeometryUtils
+
+
+class CanonicalLandmarks:
+    """
+    Landmarks no Referencial da Cabeça (movimento rígido cancelado).
+
+    A cada frame, ajusta uma transformação de similaridade (rotação, escala,
+    translação) entre pontos ÓSSEOS estáveis e os mesmos pontos de um frame
+    de referência, e aplica nos 478 pontos de uma vez. O que sobra de
+    movimento é músculo, não cabeça.
+
+    Fontes da rotação:
+    - "kabsch": ajuste Kabsch/Umeyama nas âncoras (padrão, autocontido).
+    - "matrix": rotação da matriz de transformação facial do MediaPipe,
+      relativa à matriz da referência; escala e translação saem das âncoras.
+
+    As coordenadas são isotrópicas (x*w, y*h, z*w) durante o ajuste e voltam
+    normalizadas (÷ w, h, w), então os consumidores (FieldEngine, VectorEngine)
+    recebem o mesmo tipo de array (478, 3) que já aceitam.
+    """
+    # Pontos rígidos: ponte/dorso do nariz, cantos dos olhos, laterais da face e testa
+    ANCHOR_INDICES = [168, 6, 197, 195, 5, 4, 1, 33, 133, 362, 263, 234, 454, 127, 356, 10]
+
+    # Imagem (y para baixo, z para dentro) <-> modelo do MediaPipe (y para cima, z para fora)
+    _FLIP_YZ = np.diag([1.0, -1.0, -1.0])
+
+    def __init__(self, config):
+        cl_cfg = config.get('canonical', {}) or {}
+        self.enabled = cl_cfg.get('enabled', True)
+        self.source = cl_cfg.get('source', 'kabsch')
+
+        self.reference = None         # (478, 3) isotrópico
+        self.reference_rotation = None
+        self.anchors = np.array(self.ANCHOR_INDICES)
+
+    def _to_array(self, landmarks, w, h):
+        pts = GeometryUtils.landmarks_to_array(landmarks)
+        return pts[..., :3] * np.array([w, h, w], dtype=float)
+
+    def _image_rotation(self, transformation_matrix):
+        R = np.asarray(transformation_matrix, dtype=float)[:3, :3]
+        return self._FLIP_YZ @ R @ self._FLIP_YZ
+
+    def set_reference(self, landmarks, w, h, transformation_matrix=None):
+        """Define o frame de referência (ex: rosto neutro na calibração)."""
+        self.reference = self._to_array(landmarks, w, h)
+        self.reference_rotation = None
+        if transformation_matrix is not None:
+            self.reference_rotation = self._image_rotation(transformation_matrix)
+
+    def reset(self):
+        self.reference = None
+        self.reference_rotation = None
+
+    def transform(self, landmarks, w, h, transformation_matrix=None):
+        """
+        landmarks: objetos do MediaPipe ou array (478, 3) normalizados.
+        Retorna array (478, 3) normalizado, no referencial da cabeça.
+        O primeiro frame vira a referência se nenhuma foi definida.
+        """
+        pts = self._to_array(landmarks, w, h)
+        if not self.enabled:
+            return pts / np.array([w, h, w])
+        if self.reference is None:
+            self.set_reference(landmarks, w, h, transformation_matrix)
+
+        ref_anchors = self.reference[self.anchors]
+        use_matrix = (self.source == 'matrix' and transformation_matrix is not None
+                      and self.reference_rotation is not None)
+        if use_matrix:
+            src = pts[self.anchors]
+            mu_src, mu_dst = src.mean(axis=0), ref_anchors.mean(axis=0)
+            # Rotação que leva a pose atual para a pose da referência
+            R = self.reference_rotation @ self._image_rotation(transformation_matrix).T
+            spread_src = np.sqrt(np.sum((src - mu_src) ** 2))
+            spread_dst = np.sqrt(np.sum((ref_anchors - mu_dst) ** 2))
+            scale = GeometryUtils.safe_ratio(spread_dst, spread_src, 1.0)
+        else:
+            scale, R, mu_src, mu_dst = GeometryUtils.rigid_align(pts[self.anchors], ref_anchors)
+
+        aligned = GeometryUtils.apply_similarity(pts, scale, R, mu_src, mu_dst)
+        return aligned / np.array([w, h, w])
+
+    def transform_batch(self, landmarks, w, h):
+        """
+        Sequência (T, 478, 3) -> (T, 478, 3) canônica (Kabsch em lote).
+        Usa a referência atual, ou o primeiro frame da sequência.
+        """
+        pts = np.asarray(landmarks, dtype=float)[..., :3] * np.array([w, h, w])
+        if not self.enabled:
+            return pts / np.array([w, h, w])
+        reference = self.reference if self.reference is not None else pts[0]
+
+        scale, R, mu_src, mu_dst = GeometryUtils.rigid_align(pts[:, self.anchors], reference[self.anchors])
+        aligned = GeometryUtils.apply_similarity(pts, scale, R, mu_src, mu_dst)
+        return aligned / np.array([w, h, w])
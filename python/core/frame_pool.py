@@ -0,0 +1,29 @@
+import numpy as np
+
+
+class FramePool:
+    """
+    Buffers reutilizáveis para os 'dst=' do OpenCV no loop quente.
+
+    Cada nome tem um buffer linear que só cresce; get() devolve uma view
+    CONTÍGUA do tamanho pedido. Recortes que mudam de tamanho a cada frame
+    (ROI da face, zonas do fluxo) reaproveitam a mesma memória, e em regime
+    o loop não aloca nada.
+
+    A view só vale até o próximo get() do mesmo nome: quem precisar guardar
+    o conteúdo entre frames deve copiar para um buffer próprio.
+    """
+    def __init__(self):
+        self.buffers = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape))
+        buf = self.buffers.get(name)
+        if buf is None or buf.dtype != dtype or buf.size < size:
+            buf = np.empty(size, dtype)
+            self.buffers[name] = buf
+        return buf[:size].reshape(shape)
+
+    def nbytes(self):
+        return sum(buf.nbytes for buf in self.buffers.values())
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class _NullSpan:
+    """Span vazio: usado quando o tracer está desligado (custo ~zero)."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class FrameTracer:
+    """
+    Tracer de Latência por Frame (Timeline no formato Chrome trace_event).
+
+    Cada frame capturado recebe um ID. Cada estágio do pipeline (captura,
+    landmarks, fluxo óptico, scoring da janela, escrita do JSON, HUD...) grava
+    um span (início/fim) num anel limitado em memória. O dump gera um JSON
+    que abre direto em chrome://tracing ou https://ui.perfetto.dev, permitindo
+    inspecionar individualmente os frames lentos.
+
+    Desligado por padrão (opt-in): quando 'enabled' é False, span() devolve
+    um contexto vazio e nada é gravado.
+    """
+    def __init__(self, enabled=False, ring_size=20000, output_path=None):
+        self.enabled = enabled
+        self.output_path = output_path
+
+        # Anel limitado: (nome, frame_id, inicio, fim) em segundos (perf_counter)
+        self.events = deque(maxlen=ring_size)
+
+        self.frame_id = -1
+        self.frame_start = None
+        self._pid = os.getpid()
+        self._tid = threading.get_ident()
+        self._t0 = time.perf_counter()
+
+    @classmethod
+    def from_config(cls, config, output_dir):
+        cfg = config.get('tracing', {}) or {}
+        output_file = cfg.get('output_file', 'trace_main5.json')
+        return cls(
+            enabled=bool(cfg.get('enabled', False)),
+            ring_size=int(cfg.get('ring_size', 20000)),
+            output_path=os.path.join(output_dir, output_file),
+        )
+
+    def begin_frame(self, capture_ts=None):
+        """
+        Abre um novo frame. Chamar ANTES do cap.read(): o span 'capture'
+        fica com o ID deste frame e o span do frame começa na captura.
+        'capture_ts' (opcional) fixa outro instante de início.
+        Retorna o ID do frame (-1 se desligado).
+        """
+        if not self.enabled:
+            return -1
+        self.frame_id += 1
+        self.frame_start = capture_ts if capture_ts is not None else time.perf_counter()
+        return self.frame_id
+
+    def end_frame(self):
+        """Fecha o frame atual: span da captura até a emissão da decisão/HUD."""
+        if not self.enabled or self.frame_start is None:
+            return
+        self.record("frame", self.frame_start, time.perf_counter())
+        self.frame_start = None
+
+    def span(self, name):
+        """Context manager que mede um estágio do frame atual."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, start, end):
+        self.events.append((name, self.frame_id, start, end))
+
+    def to_trace_events(self):
+        """Converte o anel para a lista 'traceEvents' (eventos completos 'X', em µs)."""
+        trace = [{
+            "name": "thread_name", "ph": "M", "pid": self._pid, "tid": self._tid,
+            "args": {"name": "main5 loop"},
+        }]
+        for name, frame_id, start, end in list(self.events):
+            trace.append({
+                "name": name,
+                "cat": "frame" if name == "frame" else "stage",
+                "ph": "X",
+                "ts": (start - self._t0) * 1e6,
+                "dur": max(end - start, 0.0) * 1e6,
+                "pid": self._pid,
+                "tid": self._tid,
+                "args": {"frame_id": frame_id},
+            })
+        return trace
+
+    def dump(self, path=None):
+        """Salva o anel atual em JSON (Chrome trace_event). Retorna o caminho."""
+        if not self.enabled:
+            return None
+        path = path or self.output_path
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.to_trace_events(), "displayTimeUnit": "ms"}, f)
+        print(f">>> TRACE SALVO: {path} ({len(self.events)} spans)")
+        return path
@@ -5,7 +5,15 @@ class GeometryUtils:
     """
     Utilitários para cálculos geométricos 3D (Landmarks).
     Foca em distâncias relativas e vetores para ignorar escala.
+
+    Há duas famílias de funções:
+    - Escalares (objetos do MediaPipe, um par de pontos por chamada).
+    - Vetorizadas (arrays): recebem (N, 3) ou (T, N, 3) e processam todos
+      os pares/pontos de uma vez, sem loops Python.
     """
+    # Cantos externos dos olhos (distância interocular)
+    IDX_EYE_L = 33
+    IDX_EYE_R = 263
 
     @staticmethod
     def euclidean_distance(p1, p2):
@@ -36,14 +44,127 @@ class GeometryUtils:
             dt: Delta tempo entre frames
         """
         if dt <= 0: return 0.0
-        
-        # Velocidade do Ponto de Interesse
-        v_point = (np.array(pos_curr) - np.array(pos_prev)) / dt
-        
-        # Velocidade da Cabeça (Ruído)
-        v_head = (np.array(anchor_curr) - np.array(anchor_prev)) / dt
-        
-        # Velocidade Limpa (Vetor Resultante)
-        v_clean = np.linalg.norm(v_point - v_head)
-        
-        return v_clean
+
+        # Velocidade do Ponto de Interesse menos a Velocidade da Cabeça (Ruído),
+        # componente a componente (sem alocar arrays por chamada)
+        v_clean = [
+            ((pc - pp) - (ac - ap)) / dt
+            for pc, pp, ac, ap in zip(pos_curr, pos_prev, anchor_curr, anchor_prev)
+        ]
+
+        # Velocidade Limpa (Norma do Vetor Resultante)
+        return math.sqrt(sum(v * v for v in v_clean))
+
+    @staticmethod
+    def euclidean_distances(landmarks, pairs):
+        """
+        Distâncias 3D de uma lista de pares (a, b) de índices, direto dos
+        objetos do MediaPipe. Para 1 frame é mais barato que montar arrays.
+        """
+        out = []
+        for a, b in pairs:
+            p1, p2 = landmarks[a], landmarks[b]
+            out.append(math.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2 + (p1.z - p2.z)**2))
+        return out
+
+    @staticmethod
+    def safe_ratio(num, den, default=0.0):
+        """num / den com 'default' onde den == 0. Aceita escalares ou arrays."""
+        if not isinstance(den, np.ndarray) or den.ndim == 0:
+            return num / den if den != 0 else default
+        num, den = np.broadcast_arrays(np.asarray(num, dtype=float), np.asarray(den, dtype=float))
+        return np.divide(num, den, out=np.full(den.shape, float(default)), where=den != 0)
+
+    # ------------------------------------------------------------------
+    # Versões vetorizadas (arrays (N, 3) ou (T, N, 3))
+    # ------------------------------------------------------------------
+    @staticmethod
+    def landmarks_to_array(landmarks, indices=None):
+        """
+        Converte landmarks em array float (N, 3).
+        Aceita a lista de objetos do MediaPipe ou um array já pronto
+        (..., 478, 3), que é apenas indexado (sem cópia dos objetos).
+        Com 'indices', só os pontos pedidos são extraídos (mais barato).
+        """
+        if isinstance(landmarks, np.ndarray):
+            return landmarks if indices is None else landmarks[..., indices, :]
+        if indices is None:
+            return np.array([(p.x, p.y, p.z) for p in landmarks])
+        return np.array([(landmarks[i].x, landmarks[i].y, landmarks[i].z) for i in indices])
+
+    @staticmethod
+    def pairwise_distances(points, pairs):
+        """
+        Distâncias Euclidianas para uma lista de pares de índices.
+        points: (..., N, D). pairs: (P, 2). Retorna (..., P).
+        """
+        pairs = np.asarray(pairs)
+        diff = points[..., pairs[:, 0], :] - points[..., pairs[:, 1], :]
+        return np.linalg.norm(diff, axis=-1)
+
+    @staticmethod
+    def relative_velocities(pos_curr, pos_prev, anchor_idx, dt):
+        """
+        Velocidade de todos os pontos SUBTRAINDO a velocidade da âncora (cabeça).
+        pos_curr, pos_prev: (..., N, D). anchor_idx: índice da âncora em N.
+        dt: escalar ou (...,) (ex: diff dos timestamps de uma sequência).
+        Retorna o módulo da velocidade limpa (..., N).
+        """
+        dt = np.maximum(np.asarray(dt, dtype=float), 1e-6)[..., np.newaxis]
+        disp = pos_curr - pos_prev
+        clean = disp - disp[..., anchor_idx:anchor_idx + 1, :]
+        return np.linalg.norm(clean, axis=-1) / dt
+
+    @staticmethod
+    def interocular_distance(points, w=1.0, h=1.0, left=IDX_EYE_L, right=IDX_EYE_R):
+        """
+        IOD em pixels (x*w, y*h) para (..., N, >=2). Retorna (...,).
+        Com w = h = 1, fica nas coordenadas normalizadas.
+        """
+        dx = (points[..., right, 0] - points[..., left, 0]) * w
+        dy = (points[..., right, 1] - points[..., left, 1]) * h
+        return np.hypot(dx, dy)
+
+    @staticmethod
+    def normalize_by_iod(values, iod):
+        """Divide medidas (..., P) pela IOD (...,); IOD zero vira 0."""
+        return GeometryUtils.safe_ratio(values, np.asarray(iod, dtype=float)[..., np.newaxis])
+
+    @staticmethod
+    def rigid_align(src, dst, with_scale=True):
+        """
+        Ajuste rígido (Kabsch / Umeyama) de 'src' em 'dst' por mínimos quadrados.
+        src: (..., K, 3) pontos atuais. dst: (K, 3) referência.
+        Retorna (scale (...,), R (..., 3, 3), mu_src (..., 3), mu_dst (3,))
+        tal que alinhado = scale * (p - mu_src) @ R^T + mu_dst.
+        Vale para 1 frame ou uma sequência (SVD em lote).
+        """
+        mu_src = src.mean(axis=-2)
+        mu_dst = dst.mean(axis=-2)
+        S = src - mu_src[..., np.newaxis, :]
+        D = dst - mu_dst
+
+        # Covariância cruzada (..., 3, 3) e sua SVD
+        H = np.einsum('...ki,kj->...ij', S, D)
+        U, sigma, Vt = np.linalg.svd(H)
+
+        # Corrige reflexão (det = -1) trocando o sinal do último eixo
+        d = np.sign(np.linalg.det(np.swapaxes(Vt, -1, -2) @ np.swapaxes(U, -1, -2)))
+        d = np.where(d == 0, 1.0, d)
+        signs = np.ones(sigma.shape)
+        signs[..., -1] = d
+        R = np.swapaxes(Vt, -1, -2) @ (signs[..., :, np.newaxis] * np.swapaxes(U, -1, -2))
+
+        if with_scale:
+            var_src = np.einsum('...ki,...ki->...', S, S)
+            scale = GeometryUtils.safe_ratio(np.sum(sigma * signs, axis=-1), var_src, 1.0)
+        else:
+            scale = np.ones(sigma.shape[:-1])
+        return scale, R, mu_src, mu_dst
+
+    @staticmethod
+    def apply_similarity(points, scale, R, mu_src, mu_dst):
+        """Aplica o resultado de rigid_align a todos os pontos (..., N, 3)."""
+        centered = points - mu_src[..., np.newaxis, :]
+        rotated = centered @ np.swapaxes(R, -1, -2)
+        return np.asarray(scale)[..., np.newaxis, np.newaxis] * rotated + mu_dst
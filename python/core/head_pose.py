@@ -0,0 +1,144 @@
+import math
+import cv2
+import numpy as np
+
+
+class HeadPoseEstimator:
+    """
+    Pose da Cabeça (Yaw / Pitch / Roll em graus), UMA vez por frame.
+
+    Fontes:
+    - "matrix": matriz de transformação facial do próprio MediaPipe
+      (output_facial_transformation_matrixes no LandmarkTracker). Custo zero.
+      Com o recorte ROI do tracker, a matriz é relativa ao recorte: a rotação
+      continua válida (só a translação muda), que é o que usamos.
+    - "pnp": solvePnP com um modelo 3D genérico de 6 pontos, intrínsecos
+      cacheados pelo tamanho do frame e chute inicial do frame anterior.
+      Usado também como fallback quando a matriz não vem no resultado.
+
+    Convenção (vista da câmera, frame espelhado do main5):
+    - yaw > 0: nariz para a direita da imagem
+    - pitch > 0: cabeça para BAIXO (HEAD54 no scoring)
+    - roll > 0: cabeça inclinada no sentido anti-horário na imagem
+    """
+    # Modelo 3D genérico (unidades arbitrárias, y para cima, z para a câmera)
+    MODEL_POINTS = np.array([
+        (0.0, 0.0, 0.0),          # Ponta do nariz
+        (0.0, -330.0, -65.0),     # Queixo
+        (-225.0, 170.0, -135.0),  # Canto externo do olho (esq. da imagem)
+        (225.0, 170.0, -135.0),   # Canto externo do olho (dir. da imagem)
+        (-150.0, -150.0, -125.0), # Canto da boca (esq.)
+        (150.0, -150.0, -125.0),  # Canto da boca (dir.)
+    ])
+    PNP_INDICES = [1, 152, 33, 263, 61, 291]
+
+    # Câmera do OpenCV (y para baixo, z para frente) -> eixos do modelo
+    _CV_TO_MODEL = np.diag([1.0, -1.0, -1.0])
+
+    def __init__(self, config):
+        hp_cfg = config.get('head_pose', {}) or {}
+        self.source = hp_cfg.get('source', 'matrix')
+        # Fração do limite (safety) a partir da qual a penalidade começa a subir
+        self.penalty_start = hp_cfg.get('penalty_start', 0.4)
+
+        safety = config.get('safety', {}) or {}
+        self.max_yaw = safety.get('max_head_rotation_yaw', 30.0)
+        self.max_pitch = safety.get('max_head_rotation_pitch', 25.0)
+
+        # Intrínsecos cacheados (recalculados só se o tamanho do frame mudar)
+        self.frame_size = None
+        self.camera_matrix = None
+        self.dist_coeffs = np.zeros((4, 1))
+
+        # Chute inicial do solvePnP (pose do frame anterior)
+        self.rvec = None
+        self.tvec = None
+
+        self.last_pose = self._pose(0.0, 0.0, 0.0)
+
+    # ------------------------------------------------------------------
+    # Conversões
+    # ------------------------------------------------------------------
+    @staticmethod
+    def rotation_to_euler(R):
+        """Matriz de rotação (3x3) -> (yaw, pitch, roll) em graus."""
+        yaw = math.degrees(math.asin(-max(-1.0, min(1.0, R[2][0]))))
+        pitch = math.degrees(math.atan2(R[2][1], R[2][2]))
+        roll = math.degrees(math.atan2(R[1][0], R[0][0]))
+        return yaw, pitch, roll
+
+    def rotation_penalty(self, yaw, pitch):
+        """
+        0.0 (frontal) a 1.0 (no limite de 'safety'): sobe linearmente a partir
+        de 'penalty_start' x limite, pelo eixo mais comprometido (yaw ou pitch).
+        """
+        ratio = max(abs(yaw) / self.max_yaw, abs(pitch) / self.max_pitch)
+        penalty = (ratio - self.penalty_start) / (1.0 - self.penalty_start)
+        return min(max(penalty, 0.0), 1.0)
+
+    def _pose(self, yaw, pitch, roll):
+        return {
+            "yaw": yaw,
+            "pitch": pitch,
+            "roll": roll,
+            "rotation_penalty": self.rotation_penalty(yaw, pitch),
+        }
+
+    # ------------------------------------------------------------------
+    # Fontes
+    # ------------------------------------------------------------------
+    def _camera(self, w, h):
+        if self.frame_size != (w, h):
+            # Aproximação padrão: foco = largura, centro óptico no meio do frame
+            self.camera_matrix = np.array([[w, 0, w / 2.0], [0, w, h / 2.0], [0, 0, 1.0]])
+            self.frame_size = (w, h)
+            self.rvec = self.tvec = None
+        return self.camera_matrix
+
+    def _solve_pnp(self, landmarks, w, h):
+        if isinstance(landmarks, np.ndarray):
+            image_points = landmarks[self.PNP_INDICES, :2] * np.array([w, h])
+        else:
+            image_points = np.array([[landmarks[i].x * w, landmarks[i].y * h] for i in self.PNP_INDICES])
+        camera_matrix = self._camera(w, h)
+
+        if self.rvec is None:
+            ok, rvec, tvec = cv2.solvePnP(
+                self.MODEL_POINTS, image_points, camera_matrix, self.dist_coeffs,
+                flags=cv2.SOLVEPNP_ITERATIVE
+            )
+        else:
+            ok, rvec, tvec = cv2.solvePnP(
+                self.MODEL_POINTS, image_points, camera_matrix, self.dist_coeffs,
+                self.rvec, self.tvec, useExtrinsicGuess=True, flags=cv2.SOLVEPNP_ITERATIVE
+            )
+        if not ok:
+            self.rvec = self.tvec = None
+            return None
+
+        self.rvec, self.tvec = rvec, tvec
+        R, _ = cv2.Rodrigues(rvec)
+        return self._CV_TO_MODEL @ R
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def estimate(self, landmarks, w, h, transformation_matrix=None):
+        """
+        landmarks: objetos do MediaPipe ou array (478, >=2) normalizados.
+        transformation_matrix: matriz 4x4 do MediaPipe (opcional).
+        Retorna {"yaw", "pitch", "roll", "rotation_penalty"}.
+        """
+        if transformation_matrix is not None and self.source == 'matrix':
+            R = np.asarray(transformation_matrix)[:3, :3]
+        else:
+            R = self._solve_pnp(landmarks, w, h)
+            if R is None:
+                return self.last_pose
+
+        self.last_pose = self._pose(*self.rotation_to_euler(R))
+        return self.last_pose
+
+    def reset(self):
+        self.rvec = self.tvec = None
+        self.last_pose = self._pose(0.0, 0.0, 0.0)
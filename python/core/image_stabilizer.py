@@ -8,25 +8,31 @@ class ImageStabilizer:
     """
 
     @staticmethod
-    def extract_stabilized_roi(frame_bgr, landmarks, idx_center, idx_align_1, idx_align_2, output_size=64):
+    def _point(landmarks, idx, w, h):
+        """Landmark em pixels: objeto do MediaPipe ou array (478, >=2)."""
+        if isinstance(landmarks, np.ndarray):
+            return float(landmarks[idx, 0]) * w, float(landmarks[idx, 1]) * h
+        p = landmarks[idx]
+        return p.x * w, p.y * h
+
+    @staticmethod
+    def extract_stabilized_roi(frame_bgr, landmarks, idx_center, idx_align_1, idx_align_2, output_size=64, dst=None):
         """
         Recorta uma ROI quadrada estabilizada.
         
         Args:
             frame_bgr: Imagem original.
-            landmarks: Lista de landmarks do MediaPipe.
+            landmarks: Lista de landmarks do MediaPipe (ou array (478, >=2) normalizado).
             idx_center: Índice do landmark central da ROI (ex: canto do olho).
             idx_align_1, idx_align_2: Índices para calcular o ângulo (ex: cantos dos olhos).
             output_size: Tamanho final da imagem quadrada (px).
+            dst: Buffer opcional (output_size, output_size) uint8 para a saída em cinza.
         """
         h, w, _ = frame_bgr.shape
         
         # 1. Obter coordenadas de alinhamento
-        p1 = landmarks[idx_align_1]
-        p2 = landmarks[idx_align_2]
-        
-        x1, y1 = p1.x * w, p1.y * h
-        x2, y2 = p2.x * w, p2.y * h
+        x1, y1 = ImageStabilizer._point(landmarks, idx_align_1, w, h)
+        x2, y2 = ImageStabilizer._point(landmarks, idx_align_2, w, h)
         
         # 2. Calcular ângulo de rotação (Roll)
         dy = y2 - y1
@@ -35,18 +41,13 @@ class ImageStabilizer:
         angle_deg = np.degrees(angle_rad)
         
         # 3. Obter centro da ROI
-        pc = landmarks[idx_center]
-        cx, cy = pc.x * w, pc.y * h
+        cx, cy = ImageStabilizer._point(landmarks, idx_center, w, h)
         
         # 4. Criar Matriz de Rotação (Affine)
-        # Rotaciona a imagem inteira ao redor do ponto de interesse para nivelar o horizonte
+        # Rotaciona a imagem ao redor do ponto de interesse para nivelar o horizonte
         M = cv2.getRotationMatrix2D((cx, cy), angle_deg, 1.0)
         
-        # 5. Aplicar Warp (apenas na região necessária para otimizar)
-        # Nota: Aplicamos na imagem toda por simplicidade, mas em C++ faríamos crop antes.
-        stabilized_img = cv2.warpAffine(frame_bgr, M, (w, h))
-        
-        # 6. Recorte Seguro (Safe Crop)
+        # 5. Recorte Seguro (Safe Crop)
         half = output_size // 2
         start_x = int(cx - half)
         start_y = int(cy - half)
@@ -57,9 +58,11 @@ class ImageStabilizer:
         if start_x < 0 or start_y < 0 or end_x > w or end_y > h:
             return None # ROI saiu da tela
             
-        roi = stabilized_img[start_y:end_y, start_x:end_x]
+        # 6. Warp só da ROI: desloca a matriz para a origem do recorte
+        # (mesmo resultado de girar a imagem inteira e recortar depois)
+        M[0, 2] -= start_x
+        M[1, 2] -= start_y
+        roi = cv2.warpAffine(frame_bgr, M, (output_size, output_size))
         
         # Retorna em Grayscale (melhor para gradientes de textura)
-        if roi.size > 0:
-            return cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-        return None
+        return cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY, dst=dst)
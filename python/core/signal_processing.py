@@ -30,32 +30,198 @@ class TemporalDerivative:
     """
     Calcula Velocidade e Aceleração baseada em um buffer curto.
     Essencial para detectar o 'Onset' (Ataque) da microexpressão.
+
+    Mantido por compatibilidade (1 sinal): delega ao SavitzkyGolayDerivative.
     """
     def __init__(self, buffer_size=5):
-        # Guarda tuplas (valor, timestamp)
-        self.history = deque(maxlen=buffer_size)
+        self.engine = SavitzkyGolayDerivative(n_signals=1, buffer_size=buffer_size)
 
     def process(self, value, timestamp):
-        self.history.append((value, timestamp))
-        
-        if len(self.history) < 3:
-            return 0.0, 0.0 # Sem dados suficientes para aceleração
+        velocity, accel = self.engine.process([value], timestamp)
+        return float(velocity[0]), float(accel[0])
+
+
+class TimeRingBuffer:
+    """
+    Buffer circular com timestamps para N canais (ex: as 21 AUs).
+    - Escrita in-place num array pré-alocado (capacity, n_channels).
+    - Espelhado (2x capacidade): cada amostra é gravada em i e i+capacity,
+      então as últimas amostras são sempre uma fatia CONTÍGUA (view sem cópia).
+    - Janela por TEMPO: window(seconds) devolve só o que está dentro do intervalo.
+    """
+    def __init__(self, capacity, n_channels, dtype=np.float64):
+        self.capacity = capacity
+        self.n_channels = n_channels
+        self._data = np.zeros((2 * capacity, n_channels), dtype=dtype)
+        self._timestamps = np.zeros(2 * capacity)
+        self.head = 0   # Próxima posição de escrita (0..capacity-1)
+        self.count = 0  # Amostras válidas
+
+    def __len__(self):
+        return self.count
+
+    def append(self, values, timestamp):
+        i = self.head
+        self._data[i] = values
+        self._data[i + self.capacity] = values
+        self._timestamps[i] = timestamp
+        self._timestamps[i + self.capacity] = timestamp
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last(self, n=None):
+        """Últimas n amostras (views): (data (n, n_channels), timestamps (n,))."""
+        n = self.count if n is None else min(n, self.count)
+        end = self.head + self.capacity
+        return self._data[end - n:end], self._timestamps[end - n:end]
+
+    def window(self, seconds):
+        """Amostras com timestamp >= último - seconds (views)."""
+        data, ts = self.last()
+        if self.count == 0:
+            return data, ts
+        start = np.searchsorted(ts, ts[-1] - seconds, side='left')
+        return data[start:], ts[start:]
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+
+class SavitzkyGolayDerivative:
+    """
+    Motor de Derivadas Multi-Sinal (Savitzky-Golay causal).
+
+    Todos os sinais ficam num único buffer (historico x sinais). A cada frame,
+    velocidade e aceleração de TODOS os sinais saem de 2 produtos
+    vetor-matriz com pesos fixos: ajuste polinomial (grau 2) por mínimos
+    quadrados na janela, derivado no ponto mais recente. Isso suaviza o
+    jitter dos landmarks que a diferença finita de 3 pontos amplificava
+    em falsas "explosões" de aceleração.
+
+    Se o espaçamento dos timestamps não for uniforme (frame pulado, fps
+    variável), o ajuste é refeito com os tempos reais (fallback).
+    """
+    def __init__(self, n_signals, buffer_size=5, poly_order=2, signal_names=None, uniform_tolerance=0.1):
+        self.n_signals = n_signals
+        self.buffer_size = max(3, int(buffer_size))
+        self.poly_order = poly_order
+        self.uniform_tolerance = uniform_tolerance
+        self.signal_names = list(signal_names) if signal_names is not None else None
+
+        self.ring = TimeRingBuffer(self.buffer_size, n_signals)
+
+        # Pesos pré-calculados para passo unitário: t = -(N-1) .. 0
+        t = np.arange(-(self.buffer_size - 1), 1, dtype=float)
+        pinv = np.linalg.pinv(np.vander(t, poly_order + 1, increasing=True))
+        self.w_velocity = pinv[1]
+        self.w_accel = 2.0 * pinv[2]
+
+    def _fit_non_uniform(self, data, ts):
+        """Ajuste por mínimos quadrados com os tempos reais (todos os sinais juntos)."""
+        order = min(self.poly_order, len(ts) - 1)
+        t = ts - ts[-1]
+        coef, *_ = np.linalg.lstsq(np.vander(t, order + 1, increasing=True), data, rcond=None)
+        accel = 2.0 * coef[2] if order >= 2 else np.zeros(self.n_signals)
+        return coef[1], accel
+
+    def process(self, values, timestamp):
+        """
+        values: vetor (n_signals,) ou dict (se signal_names foi informado).
+        Retorna (velocidade, aceleração) no mesmo formato da entrada.
+        """
+        as_dict = isinstance(values, dict)
+        if as_dict:
+            values = [values.get(k, 0.0) for k in self.signal_names]
+        self.ring.append(values, timestamp)
+
+        if len(self.ring) < 3:
+            # Sem dados suficientes para aceleração
+            velocity = accel = np.zeros(self.n_signals)
+        else:
+            data, ts = self.ring.last()
+            dts = np.diff(ts)
+            dt = max(float(np.mean(dts)), 0.001)  # Evita divisão por zero
+            uniform = np.max(np.abs(dts - dt)) <= self.uniform_tolerance * dt
+
+            if len(ts) == self.buffer_size and uniform:
+                velocity = (self.w_velocity @ data) / dt
+                accel = (self.w_accel @ data) / (dt * dt)
+            else:
+                velocity, accel = self._fit_non_uniform(data, ts)
+
+        if as_dict:
+            return (dict(zip(self.signal_names, velocity.tolist())),
+                    dict(zip(self.signal_names, accel.tolist())))
+        return velocity, accel
+
+
+class OneEuroFilter:
+    """
+    Filtro One-Euro (Casiez et al.) vetorizado: um passo por frame para um
+    array inteiro (ex: landmarks (478, 3) ou os 52 blendshapes).
+
+    Passa-baixa adaptativo: parado -> corte baixo (mata o jitter);
+    em movimento -> o corte sobe com a velocidade (pouco atraso).
+      cutoff = min_cutoff + beta * |velocidade suavizada|
+    Usa o dt real entre timestamps (sem timestamp, assume 1 / freq).
+
+    speed_axis: eixo usado para medir a velocidade como norma (ex: -1 para
+    que x, y, z de um mesmo landmark compartilhem o corte). None = por elemento.
+    """
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0, freq=30.0, speed_axis=None):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.default_dt = 1.0 / freq
+        self.speed_axis = speed_axis
+
+        self.x_prev = None
+        self.dx_prev = None
+        self.t_prev = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2.0 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def process(self, values, timestamp=None):
+        """Retorna o array filtrado (mesmo shape de values)."""
+        x = np.asarray(values, dtype=float)
+        if self.x_prev is None:
+            self.x_prev = x.copy()
+            self.dx_prev = np.zeros_like(x)
+            self.t_prev = timestamp
+            return self.x_prev.copy()
+
+        if timestamp is None or self.t_prev is None:
+            dt = self.default_dt
+        else:
+            dt = timestamp - self.t_prev
+            if dt <= 0:
+                # Timestamp repetido: mantém a última saída
+                return self.x_prev.copy()
+        self.t_prev = timestamp
 
-        # Pega os 3 pontos mais recentes
-        y3, t3 = self.history[-1] # Atual
-        y2, t2 = self.history[-2] # Anterior
-        y1, t1 = self.history[-3] # Antepenúltimo
+        # Velocidade suavizada (corte fixo d_cutoff)
+        dx = (x - self.x_prev) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        dx_hat = a_d * dx + (1.0 - a_d) * self.dx_prev
 
-        # Evita divisão por zero
-        dt1 = max(t2 - t1, 0.001)
-        dt2 = max(t3 - t2, 0.001)
+        if self.speed_axis is None:
+            speed = np.abs(dx_hat)
+        else:
+            speed = np.linalg.norm(dx_hat, axis=self.speed_axis, keepdims=True)
 
-        # Velocidade (Derivada Primeira)
-        v1 = (y2 - y1) / dt1
-        v2 = (y3 - y2) / dt2
+        # Corte adaptativo e suavização do sinal
+        a = self._alpha(self.min_cutoff + self.beta * speed, dt)
+        x_hat = a * x + (1.0 - a) * self.x_prev
 
-        # Aceleração (Derivada Segunda)
-        # Quão rápido a velocidade mudou?
-        accel = (v2 - v1) / dt2
+        self.x_prev = x_hat
+        self.dx_prev = dx_hat
+        return x_hat.copy()
 
-        return v2, accel
+    def reset(self):
+        self.x_prev = None
+        self.dx_prev = None
+        self.t_prev = None
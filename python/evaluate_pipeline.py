@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Avaliação precisão x custo das configurações do pipeline sobre os clipes
+rotulados de Videos_microexpressão (AUS/AUxx.mp4, HEAD/HEADxx.mp4).
+
+Configurações (ver CONFIGURATIONS):
+    hybrid            HybridEngine sozinho
+    hybrid+flow       + boosts do FullFaceFlowEngine (Farneback)
+    hybrid+flow_dis   + boosts do FullFaceFlowEngine (DIS)
+    hybrid+texture    + validação de AU6/AU9 pela textura (TextureEngine)
+    hybrid+field      + validação por movimento da região (FieldEngine)
+    full              tudo junto (Farneback)
+
+Métricas por AU (ativação = valor > limiar, default events.onset_threshold):
+    hit    fração dos clipes ALVO (rótulo == AU) em que a AU ativou
+    false  fração dos clipes NÃO-ALVO em que a AU ativou
+Resumo por configuração: hit médio, false médio, % de frames falsos e
+ms/frame (só o estágio da configuração e total com o front-end).
+
+Cada clipe é decodificado e passa UMA vez pelo front-end compartilhado
+(FaceLandmarker -> One-Euro -> pose -> landmarks canônicos); as configurações
+rodam em cima dessa mesma sequência, então só o custo delas é comparado.
+Obs: clipes com co-ativação natural (ex: AU1 + AU2) contam como "false"
+igualmente para todas as configurações; a comparação continua justa.
+
+Uso:
+    python evaluate_pipeline.py
+    python evaluate_pipeline.py --configs hybrid hybrid+flow_dis --videos Videos_microexpressão/AUS
+"""
+
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent
+sys.path.append(str(ROOT_DIR))
+
+from build_dataset import CONFIG_PATH, DEFAULT_VIDEOS, clip_label, collect_videos, load_config
+
+DEFAULT_OUT = ROOT_DIR / "outputs" / "evaluation_report.json"
+
+CONFIGURATIONS = {
+    "hybrid": {},
+    "hybrid+flow": {"flow": "farneback"},
+    "hybrid+flow_dis": {"flow": "dis"},
+    "hybrid+texture": {"texture": True},
+    "hybrid+field": {"field": True},
+    "full": {"flow": "farneback", "texture": True, "field": True},
+}
+
+# Validação por Física de Campo: AU -> região do FieldEngine que precisa se mexer
+FIELD_REGIONS = {
+    "brow_region": ["AU1", "AU2", "AU4"],
+    "nose_region": ["AU9"],
+    "mouth_region": ["AU10", "AU12", "AU14", "AU15", "AU17", "AU18", "AU20",
+                     "AU23", "AU24", "AU25", "AU26", "AU28"],
+}
+
+# Validação por Textura: AU -> sinal do TextureEngine (mesmo mapeamento do TemporalGate)
+TEXTURE_SIGNALS = {
+    "au6_texture": ["AU6"],
+    "au9_texture": ["AU9"],
+}
+
+
+class OnsetValidator:
+    """
+    Valida o INÍCIO de cada ativação: a AU só passa se houve evidência no
+    seu grupo (região/sinal) nos últimos hold_seconds. Uma vez aceita, segue
+    aceita enquanto estiver ativa (expressão sustentada não precisa de
+    movimento contínuo). AUs sem grupo passam direto.
+    """
+    def __init__(self, au_names, groups, hold_seconds=0.5):
+        self.group_names = list(groups)
+        index = {name: i for i, name in enumerate(au_names)}
+        self.group_of = np.full(len(au_names), -1)
+        for g, name in enumerate(self.group_names):
+            for au in groups[name]:
+                if au in index:
+                    self.group_of[index[au]] = g
+        self.validated = self.group_of >= 0
+        self.hold = hold_seconds
+        self.last_evidence = np.full(len(self.group_names), -np.inf)
+        self.latched = np.zeros(len(au_names), dtype=bool)
+
+    def apply(self, active, evidence, timestamp):
+        """active (n_aus,) bool, evidence (n_groups,) bool -> ativação validada."""
+        self.last_evidence[np.asarray(evidence, dtype=bool)] = timestamp
+        recent = np.append(timestamp - self.last_evidence <= self.hold, True)[self.group_of]
+        accepted = active & (~self.validated | self.latched | recent)
+        self.latched = accepted & self.validated
+        return accepted
+
+
+def run_front_end(video_path: Path, cfg: dict) -> Dict:
+    """Decodifica o clipe e roda o front-end compartilhado uma única vez."""
+    from modules.landmark_tracker import LandmarkTracker
+    from modules.landmark_smoother import LandmarkSmoother
+    from analyzers.hybrid_engine import HybridEngine
+    from core.head_pose import HeadPoseEstimator
+    from core.canonical_landmarks import CanonicalLandmarks
+
+    tracker = LandmarkTracker(str(ROOT_DIR / "face_landmarker.task"), config=cfg)
+    smoother = LandmarkSmoother(cfg)
+    head_pose = HeadPoseEstimator(cfg)
+    canonical = CanonicalLandmarks(cfg)
+    bs_mapper = HybridEngine(cfg)
+
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise RuntimeError(f"Não foi possível abrir: {video_path}")
+
+    frames, n_frames, elapsed = [], 0, 0.0
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        ts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        h, w = frame.shape[:2]
+        n_frames += 1
+
+        t0 = time.perf_counter()
+        packet = tracker.process_frame(frame)
+        if packet and packet.face_blendshapes and packet.face_landmarks:
+            lm, bs = smoother.process(
+                packet.face_landmarks[0],
+                bs_mapper.blendshape_vector(packet.face_blendshapes[0]),
+                ts,
+            )
+            matrices = packet.facial_transformation_matrixes
+            face_matrix = smoother.process_matrix(matrices[0] if matrices else None, ts)
+            pose = head_pose.estimate(lm, w, h, face_matrix)
+            lm_canonical = canonical.transform(lm, w, h, face_matrix)
+            frames.append((ts, frame, lm, bs, pose, lm_canonical))
+        elapsed += time.perf_counter() - t0
+    cap.release()
+    return {"frames": frames, "n_frames": n_frames, "front_end_ms": 1000.0 * elapsed}
+
+
+def run_configuration(front: Dict, cfg: dict, options: dict, threshold: float,
+                      field_min_flux: float, hold_seconds: float):
+    """
+    Roda uma configuração sobre a sequência do front-end.
+    Retorna (ativação (T, n_aus) bool, tempo do estágio em ms).
+    """
+    from analyzers.hybrid_engine import HybridEngine
+    from analyzers.optical_flow_full import FullFaceFlowEngine
+    from analyzers.texture_engine import TextureEngine
+    from analyzers.field_engine import FieldEngine
+    from core.signal_processing import RollingBaseline
+    from logic.temporal_gate import TemporalGate
+
+    engine = HybridEngine(cfg)
+    flow = texture = field = None
+    if options.get("flow"):
+        flow_cfg = dict(cfg, optical_flow={**(cfg.get("optical_flow") or {}), "backend": options["flow"]})
+        flow = FullFaceFlowEngine(flow_cfg)
+    if options.get("texture"):
+        texture = TextureEngine(cfg)
+        window = cfg.get("baseline", {}).get("window_size", 90)
+        texture_baselines = {name: RollingBaseline(window) for name in TEXTURE_SIGNALS}
+        texture_validator = OnsetValidator(engine.au_names, TEXTURE_SIGNALS, hold_seconds)
+    if options.get("field"):
+        field = FieldEngine(cfg)
+        field_validator = OnsetValidator(engine.au_names, FIELD_REGIONS, hold_seconds)
+
+    active = np.zeros((len(front["frames"]), engine.n_aus), dtype=bool)
+    prev_ts = None
+    elapsed = 0.0
+    for t, (ts, frame, lm, bs, pose, lm_canonical) in enumerate(front["frames"]):
+        h, w = frame.shape[:2]
+        t0 = time.perf_counter()
+        aus, rot_pen = engine.process(bs, lm, w, h, timestamp=ts, rotation_penalty=pose["rotation_penalty"])
+
+        # Mesma regra do main5: fluxo só com a cabeça quase frontal
+        if flow is not None and rot_pen < 0.3:
+            flow.apply_boosts(aus, flow.analyze(frame, lm, w, h))
+
+        au_active = engine.to_vector(aus) > threshold
+
+        if texture is not None:
+            signals = texture.analyze(frame, lm)
+            evidence = []
+            for name in texture_validator.group_names:
+                baseline = texture_baselines[name]
+                evidence.append(baseline.get_deviation(signals[name]) >= TemporalGate.TEXTURE_MIN_DEVIATION)
+                baseline.update(signals[name])
+            au_active = texture_validator.apply(au_active, evidence, ts)
+
+        if field is not None:
+            dt = ts - prev_ts if prev_ts is not None else 0.0
+            physics = field.analyze(lm_canonical, dt)
+            evidence = [physics.get(f"{name}_flux", 0.0) > field_min_flux for name in field_validator.group_names]
+            au_active = field_validator.apply(au_active, evidence, ts)
+
+        elapsed += time.perf_counter() - t0
+        active[t] = au_active
+        prev_ts = ts
+    return active, 1000.0 * elapsed
+
+
+def evaluate_clip(video_path: Path, cfg: dict, config_names: List[str], threshold: float,
+                  field_min_flux: float, hold_seconds: float) -> Dict:
+    """Front-end uma vez + todas as configurações num clipe."""
+    front = run_front_end(video_path, cfg)
+    result = {
+        "clip": video_path.name,
+        "label": clip_label(video_path),
+        "n_frames": front["n_frames"],
+        "face_frames": len(front["frames"]),
+        "front_end_ms": front["front_end_ms"],
+        "configs": {},
+    }
+    for name in config_names:
+        active, stage_ms = run_configuration(
+            front, cfg, CONFIGURATIONS[name], threshold, field_min_flux, hold_seconds
+        )
+        result["configs"][name] = {
+            "any_active": active.any(axis=0),
+            "active_frames": active.sum(axis=0),
+            "stage_ms": stage_ms,
+        }
+    return result
+
+
+def summarize(results: List[Dict], au_names: List[str], config_names: List[str]) -> Dict:
+    """Agrega hit / false por AU e custo por configuração."""
+    labels = np.array([res["label"] for res in results])
+    frames = np.array([res["face_frames"] for res in results], dtype=float)
+    total_frames = max(1.0, frames.sum())
+    front_ms = sum(res["front_end_ms"] for res in results) / total_frames
+
+    report = {"front_end_ms_per_frame": front_ms, "configs": {}}
+    for name in config_names:
+        any_active = np.array([res["configs"][name]["any_active"] for res in results])      # (clips, n_aus)
+        active_frames = np.array([res["configs"][name]["active_frames"] for res in results])
+        stage_ms = sum(res["configs"][name]["stage_ms"] for res in results) / total_frames
+
+        per_au = {}
+        for j, au in enumerate(au_names):
+            target = labels == au
+            non_target = ~target
+            per_au[au] = {
+                "hit": float(any_active[target, j].mean()) if target.any() else None,
+                "false": float(any_active[non_target, j].mean()) if non_target.any() else None,
+                "false_frames": float(active_frames[non_target, j].sum() / max(1.0, frames[non_target].sum())),
+            }
+        hits = [v["hit"] for v in per_au.values() if v["hit"] is not None]
+        falses = [v["false"] for v in per_au.values() if v["false"] is not None]
+        false_frames = [v["false_frames"] for v in per_au.values()]
+        total_ms = front_ms + stage_ms
+        report["configs"][name] = {
+            "hit_rate": float(np.mean(hits)) if hits else None,
+            "false_rate": float(np.mean(falses)) if falses else None,
+            "false_frame_rate": float(np.mean(false_frames)),
+            "stage_ms_per_frame": stage_ms,
+            "total_ms_per_frame": total_ms,
+            "fps": 1000.0 / total_ms if total_ms > 0 else None,
+            "per_au": per_au,
+        }
+    return report
+
+
+def _fmt(value, pattern="{:.2f}"):
+    return "  -  " if value is None else pattern.format(value)
+
+
+def print_report(report: Dict, au_names: List[str]):
+    configs = report["configs"]
+    print("\n" + "=" * 92)
+    print(f"{'CONFIGURAÇÃO':<18} | {'HIT':>5} | {'FALSE':>5} | {'FRAMES FALSOS':>13} | {'ms ESTÁGIO':>10} | {'ms TOTAL':>8} | {'FPS':>6}")
+    print("-" * 92)
+    for name, row in configs.items():
+        print(
+            f"{name:<18} | {_fmt(row['hit_rate']):>5} | {_fmt(row['false_rate']):>5} | "
+            f"{_fmt(row['false_frame_rate'], '{:.1%}'):>13} | {row['stage_ms_per_frame']:>10.2f} | "
+            f"{row['total_ms_per_frame']:>8.2f} | {_fmt(row['fps'], '{:.1f}'):>6}"
+        )
+    print(f"(front-end compartilhado: {report['front_end_ms_per_frame']:.2f} ms/frame)")
+
+    print("\nPor AU (hit / false):")
+    print(f"{'AU':<6} | " + " | ".join(f"{name:>16}" for name in configs))
+    for au in au_names:
+        cells = []
+        for row in configs.values():
+            v = row["per_au"][au]
+            cells.append(f"{_fmt(v['hit']):>7} / {_fmt(v['false']):<6}")
+        print(f"{au:<6} | " + " | ".join(f"{c:>16}" for c in cells))
+    print("=" * 92)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Tabela precisão x custo das configurações do pipeline.")
+    ap.add_argument("--videos", nargs="+", default=[str(DEFAULT_VIDEOS)], help="Vídeos ou pastas (default: Videos_microexpressão).")
+    ap.add_argument("--configs", nargs="+", default=list(CONFIGURATIONS), choices=list(CONFIGURATIONS), help="Configurações avaliadas.")
+    ap.add_argument("--config", default=str(CONFIG_PATH), help="YAML de configuração (default: config/thresholds_config.yaml).")
+    ap.add_argument("--threshold", type=float, default=None, help="Limiar de ativação (default: events.onset_threshold).")
+    ap.add_argument("--field_min_flux", type=float, default=15.0, help="Fluxo mínimo da região que valida o início de uma AU.")
+    ap.add_argument("--hold_ms", type=float, default=500.0, help="Janela (ms) em que a evidência vale para validar a AU.")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Clipes em paralelo (processos). >1 acelera, mas os tempos ficam menos confiáveis.",
+    )
+    ap.add_argument("--out", default=str(DEFAULT_OUT), help="Relatório JSON de saída.")
+    args = ap.parse_args()
+
+    cfg = load_config(Path(args.config))
+    threshold = args.threshold if args.threshold is not None else cfg.get("events", {}).get("onset_threshold", 0.20)
+    videos = collect_videos(args.videos)
+    if not videos:
+        raise SystemExit("Nenhum vídeo encontrado nos caminhos fornecidos.")
+
+    job = dict(cfg=cfg, config_names=args.configs, threshold=threshold,
+               field_min_flux=args.field_min_flux, hold_seconds=args.hold_ms / 1000.0)
+    workers = max(1, min(int(args.workers), len(videos)))
+    if workers == 1:
+        results = []
+        for vp in videos:
+            results.append(evaluate_clip(vp, **job))
+            print(f"[CLIP ] {vp.name}: {results[-1]['face_frames']}/{results[-1]['n_frames']} frames com rosto")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(partial(evaluate_clip, **job), videos))
+
+    from analyzers.hybrid_engine import HybridEngine
+    au_names = HybridEngine(cfg).au_names
+    report = summarize(results, au_names, args.configs)
+    report.update(threshold=threshold, clips=len(results), field_min_flux=args.field_min_flux, hold_ms=args.hold_ms)
+    print_report(report, au_names)
+
+    out_path = Path(args.out).expanduser().resolve()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"[SAVED] {out_path}")
+
+
+if __name__ == "__main__":
+    main()
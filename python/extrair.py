@@ -4,12 +4,42 @@
 import os
 import cv2
 import argparse
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 import re
-from typing import Tuple
+import json
+import numpy as np
+from typing import Optional, Tuple
 
 VIDEO_EXTS = {".mp4", ".mov", ".mkv", ".avi", ".webm", ".m4v"}
 
+# Modo tensor: arquivos dentro de out_root/<nome_do_video>/
+TENSOR_DATA_FILE = "frames.u8"
+TENSOR_HEADER_FILE = "header.json"
+TENSOR_TIMESTAMPS_FILE = "timestamps.npy"
+
+# Contador global de frames salvos (compartilhado entre processos)
+_PROGRESS = None
+
+def _init_worker(counter) -> None:
+    """Inicializa cada processo do pool com o contador compartilhado."""
+    global _PROGRESS
+    _PROGRESS = counter
+
+def _count_saved(n: int = 1) -> None:
+    if _PROGRESS is not None:
+        with _PROGRESS.get_lock():
+            _PROGRESS.value += n
+
+def _write_frame(out_file: Path, frame, params) -> None:
+    """Encode JPEG + escrita em disco (roda no pool de threads; o OpenCV solta o GIL)."""
+    ok_write = cv2.imwrite(str(out_file), frame, params)
+    if not ok_write:
+        raise RuntimeError(f"Falha ao salvar: {out_file}")
+    _count_saved()
+
 def safe_folder_name(stem: str) -> str:
     """
     Converte o nome do vídeo (stem) em algo seguro para pasta.
@@ -24,6 +54,79 @@ def safe_folder_name(stem: str) -> str:
     stem = re.sub(r"_+", "_", stem)
     return stem.strip("_")
 
+def _frame_time(cap, frame_idx: int, fps_for_ts: float, use_pos_msec: bool) -> float:
+    """Instante (s) do frame recém-capturado com grab()."""
+    if use_pos_msec:
+        pos_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+        if pos_ms > 0 or frame_idx == 0:
+            return pos_ms / 1000.0
+    return (frame_idx / fps_for_ts) if fps_for_ts and fps_for_ts > 0 else 0.0
+
+class FaceCropper:
+    """
+    Recorte quadrado da face guiado por landmarks (LandmarkTracker).
+    O MediaPipe só é importado aqui (lazy): os modos sem --face_crop não pagam o custo.
+    Sem rosto no frame, reaproveita a última caixa (ou o centro do frame).
+    """
+    def __init__(self, margin: float = 0.25):
+        from modules.landmark_tracker import LandmarkTracker
+
+        model_path = Path(__file__).resolve().parent / "face_landmarker.task"
+        self.tracker = LandmarkTracker(str(model_path), config={"tracker": {"roi_crop": True}})
+        self.margin = margin
+        self.box = None
+
+    def crop(self, frame):
+        h, w = frame.shape[:2]
+        if self.tracker.process_frame(frame) is not None:
+            self.box = self.tracker.prev_box
+        if self.box is None:
+            cx, cy, side = w / 2.0, h / 2.0, float(min(w, h))
+        else:
+            x1, y1, x2, y2 = self.box
+            cx, cy = (x1 + x2) / 2.0, (y1 + y2) / 2.0
+            side = max(x2 - x1, y2 - y1) * (1.0 + 2.0 * self.margin)
+        side = max(2, int(round(side)))
+        # getRectSubPix replica a borda se o recorte sair da imagem
+        return cv2.getRectSubPix(frame, (side, side), (cx, cy))
+
+def prepare_frame(frame, resize: Optional[Tuple[int, int]] = None, grayscale: bool = False,
+                  cropper: Optional[FaceCropper] = None):
+    """Recorte de face -> resize (W, H) -> tons de cinza, nessa ordem."""
+    if cropper is not None:
+        frame = cropper.crop(frame)
+    if resize is not None:
+        frame = cv2.resize(frame, resize, interpolation=cv2.INTER_AREA)
+    if grayscale:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return frame
+
+def load_frame_archive(video_dir) -> Tuple[np.memmap, np.ndarray, dict]:
+    """
+    Abre um vídeo salvo no modo tensor sem decodificar nada.
+    Retorna (frames memmap (N, H, W[, C]) uint8, timestamps (N,) em s, header).
+    Ex: frames, ts, _ = load_frame_archive("out/AU4"); frames[10:20] lê só esses bytes.
+    """
+    video_dir = Path(video_dir)
+    with open(video_dir / TENSOR_HEADER_FILE, "r", encoding="utf-8") as f:
+        header = json.load(f)
+    shape = tuple(header["shape"])
+    if shape[0] == 0:
+        frames = np.zeros(shape, dtype=np.uint8)
+    else:
+        frames = np.memmap(video_dir / header["data"], dtype=np.uint8, mode="r", shape=shape)
+    timestamps = np.load(video_dir / header["timestamps"])
+    return frames, timestamps, header
+
+def parse_resize(value: str) -> Optional[Tuple[int, int]]:
+    """'224x224' ou '224' -> (W, H)."""
+    if not value:
+        return None
+    parts = value.lower().split("x")
+    if len(parts) == 1:
+        parts = parts * 2
+    return int(parts[0]), int(parts[1])
+
 def extract_frames_from_video(
     video_path: Path,
     out_root: Path,
@@ -32,13 +135,32 @@ def extract_frames_from_video(
     end: int = -1,
     jpg_quality: int = 95,
     force_fps: float = 0.0,
+    write_threads: int = 4,
+    every_ms: float = 0.0,
+    output_format: str = "jpg",
+    resize: Optional[Tuple[int, int]] = None,
+    grayscale: bool = False,
+    face_crop: bool = False,
+    crop_margin: float = 0.25,
 ) -> Tuple[Path, int]:
     """
     Extrai frames de um vídeo e salva em out_root/<nome_do_video>/frame_XXXXXX_tTTT.jpg
 
     - every: salva 1 a cada N frames
     - start/end: intervalo de frames (end inclusive). end=-1 => até o fim
+    - every_ms: se >0, salva 1 frame a cada N milissegundos de vídeo (timestamps
+      reais via CAP_PROP_POS_MSEC; substitui 'every')
     - force_fps: se >0, usa esse fps só para calcular timestamp no nome (não reamostra)
+    - write_threads: threads de encode/escrita JPEG; a decodificação continua
+      enquanto os frames anteriores são gravados (fila limitada a 2x threads)
+    - output_format: "jpg" (1 arquivo por frame) ou "tensor" (um único arquivo
+      uint8 contíguo N x H x W [x C] + header.json + timestamps.npy, lido com
+      load_frame_archive / np.memmap)
+    - resize (W, H), grayscale, face_crop (+ crop_margin): transformações
+      aplicadas a cada frame salvo, nos dois formatos
+
+    Frames descartados só avançam o decoder com grab() (sem retrieve/conversão BGR).
+    O timestamp do nome vem do CAP_PROP_POS_MSEC (fallback: frame_idx / fps).
     """
     if not video_path.exists():
         raise FileNotFoundError(f"Vídeo não encontrado: {video_path}")
@@ -71,40 +193,123 @@ def extract_frames_from_video(
 
     params = [int(cv2.IMWRITE_JPEG_QUALITY), int(max(0, min(100, jpg_quality)))]
 
+    # Recorte de face: shape fixo exige resize (padrão 224x224)
+    cropper = FaceCropper(crop_margin) if face_crop else None
+    if face_crop and resize is None:
+        resize = (224, 224)
+
+    tensor_mode = output_format == "tensor"
+    tensor_file = open(out_dir / TENSOR_DATA_FILE, "wb") if tensor_mode else None
+    tensor_shape = None
+    timestamps = []
+
     print("\n" + "=" * 80)
     print(f"[VIDEO] {video_path}")
     print(f"[INFO ] src_fps={src_fps:.3f} | total_frames={total_frames}")
     if force_fps and force_fps > 0:
         print(f"[INFO ] force_fps={force_fps:.3f} (apenas para timestamp no nome)")
     print(f"[OUT  ] {out_dir}")
-    print(f"[RANGE] frames {start}..{end} | every={every}")
+    if every_ms and every_ms > 0:
+        print(f"[RANGE] frames {start}..{end} | every_ms={every_ms:.1f}")
+    else:
+        print(f"[RANGE] frames {start}..{end} | every={every}")
     print("=" * 80)
 
     frame_idx = start
     saved = 0
+    next_t = None  # Próximo instante (s) a salvar no modo every_ms
 
-    while True:
-        if frame_idx > end:
-            break
+    # Timestamp real do container, a menos que o usuário force um fps
+    use_pos_msec = not (force_fps and force_fps > 0)
 
-        ok, frame = cap.read()
-        if not ok:
-            break
+    # Escritas em voo (limitadas para não acumular frames decodificados na RAM)
+    write_threads = max(1, int(write_threads))
+    max_pending = 2 * write_threads
+    pending = deque()
 
-        if (frame_idx - start) % every == 0:
-            t = (frame_idx / fps_for_ts) if fps_for_ts and fps_for_ts > 0 else 0.0
-            out_file = out_dir / f"frame_{frame_idx:06d}_t{t:010.3f}.jpg"
-            ok_write = cv2.imwrite(str(out_file), frame, params)
-            if not ok_write:
-                raise RuntimeError(f"Falha ao salvar: {out_file}")
-            saved += 1
+    try:
+        with ThreadPoolExecutor(max_workers=write_threads) as writer:
+            while True:
+                if frame_idx > end:
+                    break
 
-            if saved % 200 == 0:
-                print(f"[INFO ] Salvos: {saved} (último: {out_file.name})")
+                # Avança sem converter o frame; só faz retrieve() dos que serão salvos
+                if not cap.grab():
+                    break
+                t = _frame_time(cap, frame_idx, fps_for_ts, use_pos_msec)
 
-        frame_idx += 1
+                if every_ms and every_ms > 0:
+                    wanted = next_t is None or t >= next_t - 1e-6
+                    if wanted:
+                        next_t = (t if next_t is None else next_t) + every_ms / 1000.0
+                        # Vídeo com buraco maior que o intervalo: realinha no frame atual
+                        if next_t <= t:
+                            next_t = t + every_ms / 1000.0
+                else:
+                    wanted = (frame_idx - start) % every == 0
 
-    cap.release()
+                if wanted:
+                    ok, frame = cap.retrieve()
+                    if not ok:
+                        break
+                    frame = prepare_frame(frame, resize, grayscale, cropper)
+
+                    if tensor_mode:
+                        # Bytes crus em sequência: sem encode, sem 1 arquivo por frame
+                        if tensor_shape is None:
+                            tensor_shape = frame.shape
+                        elif frame.shape != tensor_shape:
+                            raise RuntimeError(
+                                f"Resolução mudou no meio do vídeo ({frame.shape} != {tensor_shape}); use --resize"
+                            )
+                        tensor_file.write(np.ascontiguousarray(frame).tobytes())
+                        timestamps.append(t)
+                        _count_saved()
+                        out_name = f"#{frame_idx}"
+                    else:
+                        out_file = out_dir / f"frame_{frame_idx:06d}_t{t:010.3f}.jpg"
+                        pending.append(writer.submit(_write_frame, out_file, frame, params))
+                        if len(pending) >= max_pending:
+                            # Espera a escrita mais antiga (e propaga erro de disco, se houver)
+                            pending.popleft().result()
+                        out_name = out_file.name
+                    saved += 1
+
+                    if saved % 200 == 0:
+                        print(f"[INFO ] Salvos: {saved} (último: {out_name})")
+
+                frame_idx += 1
+
+            while pending:
+                pending.popleft().result()
+    except BaseException:
+        if tensor_mode:
+            # Sem header/timestamps o .bin parcial não serve: remove (e os de uma
+            # extração anterior na mesma pasta, que não batem mais com ele)
+            tensor_file.close()
+            for name in (TENSOR_DATA_FILE, TENSOR_HEADER_FILE, TENSOR_TIMESTAMPS_FILE):
+                (out_dir / name).unlink(missing_ok=True)
+        raise
+    finally:
+        cap.release()
+
+    if tensor_mode:
+        tensor_file.close()
+        np.save(out_dir / TENSOR_TIMESTAMPS_FILE, np.asarray(timestamps, dtype=np.float64))
+        header = {
+            "video": str(video_path.name),
+            "data": TENSOR_DATA_FILE,
+            "timestamps": TENSOR_TIMESTAMPS_FILE,
+            "dtype": "uint8",
+            "shape": [saved, *(tensor_shape or ())],
+            "layout": "NHW" if grayscale else "NHWC",
+            "color": "GRAY" if grayscale else "BGR",
+            "src_fps": src_fps,
+            "resize": list(resize) if resize else None,
+            "face_crop": bool(face_crop),
+        }
+        with open(out_dir / TENSOR_HEADER_FILE, "w", encoding="utf-8") as f:
+            json.dump(header, f, indent=2, ensure_ascii=False)
     print(f"[DONE ] Frames salvos: {saved}")
     return out_dir, saved
 
@@ -143,9 +348,41 @@ def main():
         help="Pasta raiz de saída (será criado out_root/<nome_do_video>/...).",
     )
     ap.add_argument("--every", type=int, default=1, help="Salvar 1 a cada N frames (default: 1 = todos).")
+    ap.add_argument(
+        "--every_ms",
+        type=float,
+        default=0.0,
+        help="Se >0, salva 1 frame a cada N ms de vídeo (ex: 200 = 5 fps). Substitui --every.",
+    )
+    ap.add_argument(
+        "--format",
+        choices=["jpg", "tensor"],
+        default="jpg",
+        help="jpg = 1 arquivo por frame; tensor = um arquivo uint8 contíguo por vídeo (np.memmap).",
+    )
+    ap.add_argument("--resize", default="", help="Redimensiona cada frame: WxH (ex: 224x224) ou N (quadrado).")
+    ap.add_argument("--grayscale", action="store_true", help="Salva em tons de cinza (1 canal).")
+    ap.add_argument(
+        "--face_crop",
+        action="store_true",
+        help="Recorta a face via landmarks (MediaPipe). Sem --resize usa 224x224.",
+    )
+    ap.add_argument("--crop_margin", type=float, default=0.25, help="Margem do recorte da face (fração do lado).")
     ap.add_argument("--start", type=int, default=0, help="Frame inicial (default: 0).")
     ap.add_argument("--end", type=int, default=-1, help="Frame final inclusive (default: -1 = até o fim).")
     ap.add_argument("--jpg_quality", type=int, default=95, help="Qualidade JPG 0..100 (default: 95).")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, min(4, (os.cpu_count() or 1))),
+        help="Vídeos processados em paralelo (processos). 1 = sequencial.",
+    )
+    ap.add_argument(
+        "--write_threads",
+        type=int,
+        default=4,
+        help="Threads de encode/escrita JPEG por vídeo (default: 4).",
+    )
     ap.add_argument(
         "--force_fps",
         type=float,
@@ -162,18 +399,44 @@ def main():
     if not videos:
         raise SystemExit("Nenhum vídeo encontrado nos caminhos fornecidos.")
 
+    options = dict(
+        out_root=out_root,
+        every=args.every,
+        start=args.start,
+        end=args.end,
+        jpg_quality=args.jpg_quality,
+        force_fps=args.force_fps,
+        write_threads=args.write_threads,
+        every_ms=args.every_ms,
+        output_format=args.format,
+        resize=parse_resize(args.resize),
+        grayscale=args.grayscale,
+        face_crop=args.face_crop,
+        crop_margin=args.crop_margin,
+    )
+
+    counter = mp.Value("q", 0)
+    workers = max(1, min(int(args.workers), len(videos)))
     total_saved = 0
-    for vp in videos:
-        out_dir, saved = extract_frames_from_video(
-            video_path=vp,
-            out_root=out_root,
-            every=args.every,
-            start=args.start,
-            end=args.end,
-            jpg_quality=args.jpg_quality,
-            force_fps=args.force_fps,
-        )
-        total_saved += saved
+
+    if workers == 1:
+        _init_worker(counter)
+        for vp in videos:
+            out_dir, saved = extract_frames_from_video(video_path=vp, **options)
+            total_saved += saved
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(counter,)
+        ) as pool:
+            not_done = {pool.submit(extract_frames_from_video, video_path=vp, **options) for vp in videos}
+            done_videos = 0
+            while not_done:
+                done, not_done = wait(not_done, timeout=2.0, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    out_dir, saved = fut.result()
+                    total_saved += saved
+                    done_videos += 1
+                print(f"[PROGRESS] Vídeos: {done_videos}/{len(videos)} | Frames salvos: {counter.value}")
 
     print("\n" + "-" * 80)
     print(f"[SUMMARY] Vídeos processados: {len(videos)} | Total de frames salvos: {total_saved}")
@@ -0,0 +1,137 @@
+"""
+Verificação: CalibrationStore (snapshot de calibração por cliente).
+
+Num diretório temporário, com os mesmos componentes do main5
+(HybridEngine, GazeTracker, VoiceActivityDetector):
+- save() + restore() em componentes novos reproduz o estado (ida e volta
+  pelo JSON) e a saída do HybridEngine no frame seguinte;
+- clientes diferentes não se misturam;
+- sessão sem tara (saiu antes de calibrar, ou após 'r') não grava nem
+  sobrescreve o snapshot bom; entrada sem "calibrated" não é restaurada;
+- cliente desconhecido, snapshot vencido, versão antiga ou JSON ilegível
+  -> nada é restaurado;
+- sem client_id (ou store desligado) nada é gravado.
+
+Uso: python inputs/check_calibration_store.py
+"""
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from analyzers.hybrid_engine import HybridEngine
+from modules.calibration_store import CalibrationStore
+from modules.gaze_tracker import GazeTracker
+from modules.voice_activity import VoiceActivityDetector
+
+W, H = 1280, 720
+
+
+def components(cfg):
+    return {"hybrid": HybridEngine(cfg), "gaze": GazeTracker(cfg), "vad": VoiceActivityDetector(cfg)}
+
+
+def calibrated(cfg, rng):
+    """Componentes com estado não trivial (tara, baseline, EMA, olhar, boca)."""
+    comps = components(cfg)
+    engine = comps["hybrid"]
+    landmarks = rng.uniform(0.3, 0.7, (478, 3))
+    for t in range(20):
+        engine.process_vector(rng.uniform(0.0, 0.5, 52), landmarks, W, H, timestamp=t * 0.03)
+    engine.calibrate(engine.ema_state, baseline_div=engine.last_div)
+    comps["gaze"].load_state({"iris_center": 0.47, "vertical_offset": 0.03})
+    comps["vad"].load_state({"rest_ratio": 0.08})
+    return comps
+
+
+def main():
+    with open(os.path.join(ROOT_DIR, "config", "thresholds_config.yaml"), "r") as f:
+        cfg = yaml.safe_load(f)
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        store = CalibrationStore(cfg, out_dir)
+        saved = calibrated(cfg, rng)
+        store.save("cliente-a", saved, calibrated=True)
+        assert os.path.exists(store.path) and not os.path.exists(store.path + ".tmp")
+
+        # Ida e volta: estado idêntico e mesma saída no próximo frame
+        restored = components(cfg)
+        assert store.restore("cliente-a", restored)
+        for name in saved:
+            assert json.dumps(restored[name].get_state(), sort_keys=True) == \
+                json.dumps(saved[name].get_state(), sort_keys=True), name
+        scores, landmarks = rng.uniform(0.0, 0.5, 52), rng.uniform(0.3, 0.7, (478, 3))
+        saved["hybrid"].prev_timestamp = None  # o relógio do EMA recomeça na restauração
+        a, _ = saved["hybrid"].process_vector(scores, landmarks, W, H, timestamp=100.0)
+        b, _ = restored["hybrid"].process_vector(scores, landmarks, W, H, timestamp=100.0)
+        assert np.array_equal(a, b)
+        print("OK  save() + restore(): estado e próximo frame idênticos")
+
+        # Outro cliente não sobrescreve nem herda
+        other_saved = calibrated(cfg, rng)
+        other_saved["vad"].load_state({"rest_ratio": 0.2})
+        store.save("cliente-b", other_saved, calibrated=True)
+        other = components(cfg)
+        assert store.restore("cliente-b", other) and other["vad"].rest_ratio == 0.2
+        again = components(cfg)
+        assert store.restore("cliente-a", again) and again["vad"].rest_ratio == 0.08
+        assert not store.restore("cliente-c", components(cfg))
+        print("OK  clientes independentes; desconhecido não restaura")
+
+        # Sessão sem tara (ex: 'r' e saiu): não sobrescreve o snapshot bom
+        reset = calibrated(cfg, rng)
+        reset["hybrid"].reset_calibration()
+        store.save("cliente-a", reset, calibrated=reset["hybrid"].is_calibrated_manual)
+        store.save("cliente-d", components(cfg), calibrated=False)
+        again = components(cfg)
+        assert store.restore("cliente-a", again) and again["hybrid"].is_calibrated_manual
+        assert not store.restore("cliente-d", components(cfg))
+        # Entrada antiga, sem a marca "calibrated": ignorada
+        with open(store.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        del data["clients"]["cliente-b"]["calibrated"]
+        with open(store.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        assert not store.restore("cliente-b", components(cfg))
+        store.save("cliente-b", other_saved, calibrated=True)
+        print("OK  sem tara: não grava nem sobrescreve; entrada sem 'calibrated' ignorada")
+
+        # Vencido, versão antiga e JSON ilegível
+        with open(store.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data["clients"]["cliente-a"]["saved_ts"] -= store.max_age_seconds + 1
+        with open(store.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        assert not store.restore("cliente-a", components(cfg))
+        assert store.restore("cliente-b", components(cfg))
+
+        data["version"] = CalibrationStore.VERSION - 1
+        with open(store.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        assert not store.restore("cliente-b", components(cfg))
+
+        with open(store.path, "w", encoding="utf-8") as f:
+            f.write("{corrompido")
+        assert not store.restore("cliente-b", components(cfg))
+        store.save("cliente-b", saved, calibrated=True)  # regrava por cima do arquivo ruim
+        assert store.restore("cliente-b", components(cfg))
+        print("OK  vencido / versão antiga / ilegível: ignorados")
+
+    # Sem cliente ou desligado: não grava nada
+    with tempfile.TemporaryDirectory() as out_dir:
+        CalibrationStore(cfg, out_dir).save(None, saved, calibrated=True)
+        off = dict(cfg, calibration_store={"enabled": False})
+        CalibrationStore(off, out_dir).save("cliente-a", saved, calibrated=True)
+        assert os.listdir(out_dir) == []
+    print("OK  sem client_id / enabled: false -> nada é gravado")
+
+
+if __name__ == "__main__":
+    main()
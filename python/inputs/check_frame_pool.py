@@ -0,0 +1,90 @@
+"""
+Verificação: buffers reutilizados do loop quente (FramePool) e a soma
+telescópica do fluxo (FullFaceFlowEngine._gradient_sum).
+
+- _gradient_sum(a, axis) tem que bater com np.gradient(a, axis).sum(),
+  inclusive em recortes de 1 e 2 pixels no eixo;
+- a divergência média da zona tem que bater com a fórmula original
+  (np.mean(du/dx + dv/dy));
+- FramePool devolve views contíguas do mesmo buffer (sem realocar ao
+  encolher) e realoca ao crescer ou mudar o dtype.
+
+Uso: python inputs/check_frame_pool.py
+"""
+import os
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from analyzers.optical_flow_full import FullFaceFlowEngine
+from core.frame_pool import FramePool
+
+TOLERANCE = 1e-9
+
+
+def check_gradient_sum(rng):
+    worst = 0.0
+    for shape in [(1, 7), (2, 5), (3, 3), (7, 1), (5, 2), (31, 47), (64, 40)]:
+        a = rng.normal(0.0, 3.0, shape).astype(np.float32)
+        for axis in (0, 1):
+            if a.shape[axis] < 2:
+                continue  # np.gradient exige 2 pontos no eixo
+            expected = float(np.gradient(a, axis=axis).astype(np.float64).sum())
+            got = FullFaceFlowEngine._gradient_sum(a, axis)
+            err = abs(got - expected) / max(1.0, abs(expected))
+            assert err <= 1e-4, f"_gradient_sum {shape} eixo {axis}: {got} != {expected}"
+            worst = max(worst, err)
+    print(f"OK  _gradient_sum == np.gradient(...).sum()   erro relativo máx = {worst:.1e}")
+
+
+def check_divergence(rng):
+    worst = 0.0
+    for _ in range(50):
+        h, w = rng.integers(2, 60, 2)
+        flow = rng.normal(0.0, 1.0, (h, w, 2))
+        expected = np.mean(np.gradient(flow[..., 0], axis=1) + np.gradient(flow[..., 1], axis=0))
+        du_dx = FullFaceFlowEngine._gradient_sum(flow[..., 0], axis=1)
+        dv_dy = FullFaceFlowEngine._gradient_sum(flow[..., 1], axis=0)
+        got = (du_dx + dv_dy) / (h * w)
+        worst = max(worst, abs(got - expected))
+    assert worst <= TOLERANCE, f"divergência: diferença {worst:.3e}"
+    print(f"OK  divergência média da zona                 max |novo - np.gradient| = {worst:.1e}")
+
+
+def check_pool():
+    pool = FramePool()
+    big = pool.get("crop", (40, 60))
+    base = pool.buffers["crop"]
+    assert big.flags["C_CONTIGUOUS"] and big.shape == (40, 60) and big.dtype == np.uint8
+
+    # Encolher (ou mudar a forma com o mesmo tamanho) reaproveita a memória
+    for shape in [(30, 50), (60, 40), (1, 1)]:
+        view = pool.get("crop", shape)
+        assert view.shape == shape and view.flags["C_CONTIGUOUS"]
+        assert np.shares_memory(view, base) and pool.buffers["crop"] is base
+
+    # Crescer ou trocar o dtype realoca
+    pool.get("crop", (80, 80))
+    assert pool.buffers["crop"] is not base and pool.buffers["crop"].size == 6400
+    flow = pool.get("crop", (10, 10, 2), np.float32)
+    assert flow.dtype == np.float32 and flow.shape == (10, 10, 2)
+
+    # Nomes diferentes não compartilham memória
+    other = pool.get("other", (10, 10, 2), np.float32)
+    assert not np.shares_memory(flow, other)
+    assert pool.nbytes() == flow.nbytes + other.nbytes
+    print("OK  FramePool: views contíguas, reaproveita ao encolher, realoca ao crescer/dtype")
+
+
+def main():
+    rng = np.random.default_rng(0)
+    check_gradient_sum(rng)
+    check_divergence(rng)
+    check_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Verificação: MicroExpressionDetector (onset/apex/offset por AU).
+
+Curvas sintéticas a 50 fps com a config padrão (onset 0.20, offset 0.12,
+apex_drop 10%, NOISE < 40 ms, MICRO < 500 ms):
+- pulso curto -> onset, apex no pico, offset classificado MICRO;
+- pulso longo -> MACRO; glitch de 1 frame -> NOISE;
+- histerese: oscilar entre offset e onset não fecha nem reabre o evento;
+- AUs independentes no mesmo frame;
+- reset() descarta o evento aberto (nenhum offset depois dele).
+
+Uso: python inputs/check_microexpression_detector.py
+"""
+import os
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from logic.microexpression_detector import MicroExpressionDetector
+
+AUS = ["AU4", "AU12"]
+DT = 0.02
+CONFIG = {"events": {"onset_threshold": 0.20, "offset_threshold": 0.12,
+                     "apex_drop": 0.10, "min_duration_ms": 40.0}}
+
+
+def run(detector, curves, t0=0.0):
+    """curves: (T, n_aus). Retorna todos os eventos emitidos."""
+    events = []
+    for k, values in enumerate(curves):
+        events.extend(detector.process(values, t0 + k * DT))
+    return events
+
+
+def pulse(peak, rise, hold, fall):
+    """Subida linear até o pico, platô e descida até zero (com zeros nas bordas)."""
+    return np.concatenate([
+        [0.0], np.linspace(0.0, peak, rise + 1)[1:], np.full(hold, peak),
+        np.linspace(peak, 0.0, fall + 1)[1:], [0.0],
+    ])
+
+
+def only(events, au):
+    return [(e["event"], e["class"]) for e in events if e["au"] == au]
+
+
+def main():
+    # Pulso curto na AU4: ~200 ms acima do offset
+    curve = pulse(0.6, 3, 2, 4)
+    events = run(MicroExpressionDetector(CONFIG, AUS), np.column_stack([curve, np.zeros_like(curve)]))
+    assert only(events, "AU4") == [("onset", None), ("apex", "MICRO"), ("offset", "MICRO")], events
+    assert only(events, "AU12") == []
+    apex = next(e for e in events if e["event"] == "apex")
+    assert np.isclose(apex["peak"], 0.6) and np.isclose(apex["timestamp"], 3 * DT)
+    print("OK  pulso curto: onset -> apex no pico -> offset MICRO")
+
+    # Pulso longo (~1 s) -> MACRO
+    curve = pulse(0.5, 5, 50, 5)
+    events = run(MicroExpressionDetector(CONFIG, AUS), np.column_stack([curve, np.zeros_like(curve)]))
+    offset = [e for e in events if e["event"] == "offset"]
+    assert len(offset) == 1 and offset[0]["class"] == "MACRO" and offset[0]["duration_ms"] > 500
+    print("OK  pulso longo: offset MACRO")
+
+    # Glitch de 1 frame -> NOISE
+    curve = np.array([0.0, 0.5, 0.0, 0.0])
+    events = run(MicroExpressionDetector(CONFIG, AUS), np.column_stack([curve, np.zeros_like(curve)]))
+    assert [e["class"] for e in events if e["event"] == "offset"] == ["NOISE"]
+    print("OK  glitch de 1 frame: offset NOISE")
+
+    # Histerese: 0.15..0.25 não fecha (>= 0.12) nem reabre o evento
+    curve = np.array([0.0, 0.25, 0.15, 0.25, 0.15, 0.25, 0.0])
+    events = run(MicroExpressionDetector(CONFIG, AUS), np.column_stack([curve, np.zeros_like(curve)]))
+    kinds = [e["event"] for e in events]
+    assert kinds.count("onset") == 1 and kinds.count("offset") == 1, kinds
+    print("OK  histerese: um onset e um offset")
+
+    # AUs independentes: pulsos defasados nas duas colunas
+    a, b = pulse(0.6, 2, 1, 2), pulse(0.4, 2, 30, 2)
+    n = max(len(a), len(b) + 3)
+    curves = np.zeros((n, 2))
+    curves[:len(a), 0] = a
+    curves[3:3 + len(b), 1] = b
+    events = run(MicroExpressionDetector(CONFIG, AUS), curves)
+    assert only(events, "AU4")[-1] == ("offset", "MICRO")
+    assert only(events, "AU12")[-1] == ("offset", "MACRO")
+    print("OK  AUs independentes no mesmo vetor")
+
+    # reset() no meio do evento: nada fecha depois (não há onset aberto)
+    detector = MicroExpressionDetector(CONFIG, AUS)
+    events = run(detector, np.array([[0.0, 0.0], [0.5, 0.5], [0.6, 0.6]]))
+    assert [e["event"] for e in events] == ["onset", "onset"]
+    detector.reset()
+    events = run(detector, np.array([[0.1, 0.0], [0.0, 0.0]]), t0=10.0)
+    assert events == [], events
+    events = run(detector, np.array([[0.5, 0.0]]), t0=20.0)
+    assert [(e["event"], e["au"], e["timestamp"]) for e in events] == [("onset", "AU4", 20.0)]
+    print("OK  reset(): o evento aberto é descartado; o próximo onset recomeça")
+
+
+if __name__ == "__main__":
+    main()
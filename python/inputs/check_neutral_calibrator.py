@@ -0,0 +1,136 @@
+"""
+Verificação: NeutralCalibrator (calibração neutra automática, sem tecla C).
+
+Sequências sintéticas a 30 fps com a config do projeto:
+- rosto quieto e estável: confirma só quando a janela cobre min_seconds,
+  com a mediana da janela (a piscada isolada não entra) e a divergência;
+- movimento, cabeça girada ou AU variando (MAD) impedem a confirmação;
+  depois de movimento/rotação só confirma com min_seconds de frames
+  quietos (não basta a mediana da janela aquietar);
+- sorriso mantido parado (AU12 acima do teto) é estável, mas não neutro:
+  não confirma, avisa uma vez e confirma quando o rosto relaxa;
+- viés de repouso alto de AU sem teto (AU7) não impede a tara;
+- mark_calibrated() bloqueia; reset() recomeça do zero.
+
+Uso: python inputs/check_neutral_calibrator.py
+"""
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from analyzers.hybrid_engine import HybridEngine
+from analyzers.neutral_calibrator import NeutralCalibrator
+
+FPS = 30.0
+
+
+class Face:
+    """Gera os sinais de um frame: AUs antes da tara, divergência, movimento, rotação."""
+    def __init__(self, au_names, rng):
+        self.au_names = au_names
+        self.rng = rng
+        self.levels = np.full(len(au_names), 0.08)
+        self.levels[au_names.index("AU7")] = 1.1  # Viés de repouso alto (sem teto)
+        self.div, self.motion, self.rot = 210.0, 0.001, 0.0
+
+    def set(self, au, value):
+        self.levels[self.au_names.index(au)] = value
+
+    def frame(self):
+        noise = self.rng.normal(0.0, 0.005, len(self.levels))
+        return (np.clip(self.levels + noise, 0.0, None), self.div + self.rng.normal(0.0, 0.3),
+                self.motion, self.rot)
+
+
+def feed(calibrator, face, seconds, t0, tweak=None):
+    """Roda 'seconds' de frames; devolve (t final, (t do commit, resultado) ou None)."""
+    n = int(round(seconds * FPS))
+    for k in range(n):
+        t = t0 + k / FPS
+        levels, div, motion, rot = face.frame()
+        if tweak is not None:
+            levels, div, motion, rot = tweak(k, levels, div, motion, rot)
+        out = calibrator.update(t, levels, div, motion, rot)
+        if out is not None:
+            return t, (t, out)
+    return t0 + n / FPS, None
+
+
+def main():
+    with open(os.path.join(ROOT_DIR, "config", "thresholds_config.yaml"), "r") as f:
+        cfg = yaml.safe_load(f)
+    au_names = HybridEngine(cfg).au_names
+    rng = np.random.default_rng(0)
+    cal_cfg = cfg["auto_calibration"]
+    min_seconds = cal_cfg["min_seconds"]
+
+    # 1. Quieto desde o início (com uma piscada): confirma ao cobrir min_seconds
+    calibrator, face = NeutralCalibrator(cfg, au_names), Face(au_names, rng)
+    blink = au_names.index("AU45")
+
+    def with_blink(k, levels, div, motion, rot):
+        if k in (10, 11):
+            levels = levels.copy()
+            levels[blink] = 0.9
+        return levels, div, motion, rot
+    _, commit = feed(calibrator, face, 3.0, 0.0, with_blink)
+    assert commit is not None, "rosto quieto não confirmou"
+    t, (levels, div) = commit
+    assert abs(t - min_seconds) <= 1.0 / FPS + 1e-9, f"confirmou em {t:.3f}s (esperado {min_seconds}s)"
+    assert np.allclose(levels, face.levels, atol=0.02) and abs(div - face.div) < 1.0
+    assert levels[blink] < 0.2, "a piscada entrou na referência"
+    assert calibrator.committed and calibrator.confidence == 1.0
+    assert calibrator.update(t + 1.0, *face.frame()) is None  # confirmado: não repete
+    print(f"OK  quieto: confirma em {t:.2f}s (min_seconds {min_seconds}s), mediana ignora a piscada")
+
+    # 2. Movimento / rotação / AU variando: não confirma; depois conta de novo
+    for label, tweak in (
+        ("movimento", lambda k, l, d, m, r: (l, d, cal_cfg["max_motion"] * 3, r)),
+        ("cabeça girada", lambda k, l, d, m, r: (l, d, m, 0.5)),
+        ("AU variando", lambda k, l, d, m, r: (l + 0.15 * (1 + np.sin(2 * np.pi * k / FPS)), d, m, r)),
+    ):
+        calibrator, face = NeutralCalibrator(cfg, au_names), Face(au_names, rng)
+        end, commit = feed(calibrator, face, 3.0, 0.0, tweak)
+        assert commit is None and calibrator.confidence == 0.0, label
+        # Quieto de novo: a janela precisa se limpar e cobrir min_seconds outra vez
+        _, commit = feed(calibrator, face, 4.0, end)
+        assert commit is not None, label
+        waited = commit[0] - end
+        if label != "AU variando":
+            assert waited >= min_seconds - 1.0 / FPS - 1e-9, f"{label}: confirmou {waited:.2f}s depois de aquietar"
+        print(f"OK  {label}: não confirma; quieto de novo confirma após {waited:.2f}s")
+
+    # 3. Sorriso mantido parado: estável, mas acima do teto -> adia (avisa uma vez)
+    calibrator, face = NeutralCalibrator(cfg, au_names), Face(au_names, rng)
+    face.set("AU12", 0.7)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        end, commit = feed(calibrator, face, 4.0, 0.0)
+    assert commit is None and not calibrator.committed and calibrator.confidence == 0.0
+    assert log.getvalue().count("ADIADA") == 1 and "AU12=" in log.getvalue()
+    face.set("AU12", 0.08)
+    _, commit = feed(calibrator, face, 4.0, end)
+    assert commit is not None and commit[1][0][au_names.index("AU12")] < 0.2
+    print("OK  sorriso mantido: não vira tara (avisa 1x); confirma quando relaxa")
+
+    # 4. mark_calibrated() bloqueia; reset() recomeça
+    calibrator, face = NeutralCalibrator(cfg, au_names), Face(au_names, rng)
+    calibrator.mark_calibrated()
+    end, commit = feed(calibrator, face, 3.0, 0.0)
+    assert commit is None and calibrator.confidence == 1.0
+    calibrator.reset()
+    assert not calibrator.committed and calibrator.confidence == 0.0 and len(calibrator.ring) == 0
+    _, commit = feed(calibrator, face, 3.0, end)
+    assert commit is not None and abs(commit[0] - end - min_seconds) <= 1.0 / FPS + 1e-9
+    print("OK  mark_calibrated() bloqueia; reset() recomeça a contagem")
+
+
+if __name__ == "__main__":
+    main()
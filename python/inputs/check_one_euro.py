@@ -0,0 +1,167 @@
+"""
+Verificação: OneEuroFilter vetorizado e LandmarkSmoother.
+
+- O passo vetorizado bate com uma implementação escalar de referência
+  (Casiez et al.) elemento a elemento, com dt irregular;
+- speed_axis=-1: x, y, z de um landmark compartilham o corte (norma);
+- sinal parado com jitter: a saída tem bem menos variância que a entrada;
+- degrau: a saída converge (beta alto segue rápido);
+- timestamp repetido mantém a saída; reset() recomeça do próximo valor;
+- LandmarkSmoother reinicia os filtros depois de max_gap sem rosto;
+- process_matrix(): a rotação suavizada continua uma rotação e a
+  translação passa intacta.
+
+Uso: python inputs/check_one_euro.py
+"""
+import math
+import os
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from core.signal_processing import OneEuroFilter
+from modules.landmark_smoother import LandmarkSmoother
+
+TOLERANCE = 1e-12
+
+
+class ScalarOneEuro:
+    """Referência escalar, direto do artigo."""
+    def __init__(self, min_cutoff, beta, d_cutoff):
+        self.min_cutoff, self.beta, self.d_cutoff = min_cutoff, beta, d_cutoff
+        self.x_prev = self.dx_prev = self.t_prev = None
+
+    @staticmethod
+    def alpha(cutoff, dt):
+        return 1.0 / (1.0 + 1.0 / (2.0 * math.pi * cutoff) / dt)
+
+    def __call__(self, x, t):
+        if self.x_prev is None:
+            self.x_prev, self.dx_prev, self.t_prev = x, 0.0, t
+            return x
+        dt = t - self.t_prev
+        self.t_prev = t
+        a_d = self.alpha(self.d_cutoff, dt)
+        dx_hat = a_d * (x - self.x_prev) / dt + (1.0 - a_d) * self.dx_prev
+        a = self.alpha(self.min_cutoff + self.beta * abs(dx_hat), dt)
+        self.x_prev = a * x + (1.0 - a) * self.x_prev
+        self.dx_prev = dx_hat
+        return self.x_prev
+
+
+def check_against_scalar(rng):
+    T, n = 200, 12
+    ts = np.cumsum(rng.uniform(0.02, 0.06, T))
+    signal = np.cumsum(rng.normal(0.0, 0.05, (T, n)), axis=0)
+    vec = OneEuroFilter(min_cutoff=1.5, beta=3.0, d_cutoff=1.0)
+    refs = [ScalarOneEuro(1.5, 3.0, 1.0) for _ in range(n)]
+    worst = 0.0
+    for t in range(T):
+        out = vec.process(signal[t], ts[t])
+        expected = [refs[i](signal[t, i], ts[t]) for i in range(n)]
+        worst = max(worst, float(np.max(np.abs(out - expected))))
+    assert worst <= TOLERANCE, f"vetorizado x escalar: {worst:.3e}"
+    print(f"OK  vetorizado == referência escalar          max diff = {worst:.1e}")
+
+
+def check_speed_axis():
+    # Todos os pontos andam 1 em x e quantias diferentes em y (partindo do zero):
+    # out / deslocamento = alpha, que tem que ser o mesmo em x e y de cada ponto
+    moved = np.zeros((5, 3))
+    moved[:, 0] = 1.0
+    moved[:, 1] = [0.2, 0.5, 1.0, 2.0, 4.0]
+    for speed_axis in (-1, None):
+        filt = OneEuroFilter(min_cutoff=1.0, beta=10.0, speed_axis=speed_axis)
+        filt.process(np.zeros((5, 3)), 0.0)
+        out = filt.process(moved, 0.03)
+        alpha_x, alpha_y = out[:, 0], out[:, 1] / moved[:, 1]
+        if speed_axis == -1:
+            assert np.allclose(alpha_x, alpha_y) and np.all(np.diff(alpha_x) > 0)
+        else:
+            assert np.allclose(alpha_x, alpha_x[0]) and not np.allclose(alpha_x, alpha_y)
+    print("OK  speed_axis=-1: x, y, z do mesmo ponto compartilham o corte")
+
+
+def check_behaviour(rng):
+    T = 300
+    ts = np.arange(T) / 30.0
+    noisy = 0.5 + rng.normal(0.0, 0.01, (T, 52))
+    filt = OneEuroFilter(min_cutoff=1.0, beta=0.5)
+    out = np.array([filt.process(noisy[t], ts[t]) for t in range(T)])
+    ratio = float(out[30:].std(axis=0).mean() / noisy[30:].std(axis=0).mean())
+    assert ratio < 0.5, f"jitter: razão de desvio {ratio:.2f}"
+    print(f"OK  parado com jitter: desvio da saída = {ratio:.2f} x entrada")
+
+    step = np.where(np.arange(T) < 30, 0.0, 1.0)
+    for beta in (0.0, 50.0):
+        filt = OneEuroFilter(min_cutoff=1.0, beta=beta)
+        out = np.array([filt.process([v], t)[0] for v, t in zip(step, ts)])
+        assert abs(out[-1] - 1.0) < 1e-3 and np.all(np.diff(out) >= -1e-12)
+    slow = OneEuroFilter(min_cutoff=1.0, beta=0.0)
+    fast = OneEuroFilter(min_cutoff=1.0, beta=50.0)
+    y_slow = [slow.process([v], t)[0] for v, t in zip(step[:33], ts[:33])]
+    y_fast = [fast.process([v], t)[0] for v, t in zip(step[:33], ts[:33])]
+    assert y_fast[-1] > y_slow[-1]
+    print("OK  degrau: converge sem overshoot; beta alto segue mais rápido")
+
+    filt = OneEuroFilter()
+    filt.process([1.0], 0.0)
+    a = filt.process([2.0], 0.1)
+    assert np.array_equal(filt.process([9.0], 0.1), a)
+    filt.reset()
+    assert np.array_equal(filt.process([9.0], 0.2), [9.0])
+    print("OK  timestamp repetido mantém a saída; reset() recomeça do valor atual")
+
+
+def check_smoother_gap(rng):
+    config = {"smoothing": {"max_gap_seconds": 0.5}, "system": {"fps_target": 30}}
+    smoother = LandmarkSmoother(config)
+    lm, bs = rng.uniform(0, 1, (478, 3)), rng.uniform(0, 1, 52)
+    smoother.process(lm, bs, 0.0)
+    smoother.process(lm, bs, 0.03)
+    far_lm, far_bs = lm + 0.3, np.clip(bs + 0.3, 0, 1)
+    out_lm, out_bs = smoother.process(far_lm, far_bs, 0.06)
+    assert not np.allclose(out_lm, far_lm)  # dentro do gap: suaviza
+    out_lm, out_bs = smoother.process(far_lm + 0.1, far_bs, 1.0)
+    assert np.array_equal(out_lm, far_lm + 0.1) and np.array_equal(out_bs, far_bs)
+    print("OK  LandmarkSmoother: depois de max_gap a face nova não é arrastada")
+
+
+def rotation(yaw_deg):
+    c, s = math.cos(math.radians(yaw_deg)), math.sin(math.radians(yaw_deg))
+    return np.array([[c, 0.0, s], [0.0, 1.0, 0.0], [-s, 0.0, c]])
+
+
+def check_smoother_matrix(rng):
+    config = {"smoothing": {"max_gap_seconds": 0.5}, "system": {"fps_target": 30}}
+    smoother = LandmarkSmoother(config)
+    assert smoother.process_matrix(None, 0.0) is None
+    yaws = []
+    for k in range(60):
+        matrix = np.eye(4)
+        # Parado com jitter, depois um giro de 20 graus em yaw (sem ruído)
+        matrix[:3, :3] = rotation(20.0) if k >= 10 else rotation(rng.normal(0.0, 0.5))
+        matrix[:3, 3] = [1.0, 2.0, k]
+        out = smoother.process_matrix(matrix, k / 30.0)
+        R = out[:3, :3]
+        assert np.allclose(R @ R.T, np.eye(3)) and np.isclose(np.linalg.det(R), 1.0)
+        assert np.array_equal(out[:3, 3], matrix[:3, 3])
+        yaws.append(math.degrees(math.asin(R[0, 2])))
+    assert 0.0 < yaws[10] < 20.0 and abs(yaws[-1] - 20.0) < 0.1
+    print("OK  process_matrix: rotação válida, translação intacta, segue o giro")
+
+
+def main():
+    rng = np.random.default_rng(0)
+    check_against_scalar(rng)
+    check_speed_axis()
+    check_behaviour(rng)
+    check_smoother_gap(rng)
+    check_smoother_matrix(rng)
+
+
+if __name__ == "__main__":
+    main()
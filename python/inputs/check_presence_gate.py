@@ -0,0 +1,118 @@
+"""
+Verificação: PresenceGate (landmarker em espera com a cadeira vazia).
+
+Frames sintéticos a 30 fps, sondagem pelo próprio landmarker
+(detector: landmarker, o caminho sem Haar cascade):
+- ACTIVE: o landmarker roda em todo frame; só entra em IDLE depois de
+  idle_after_seconds seguidos sem rosto;
+- IDLE com a imagem parada: sonda em probe_hz;
+- IDLE com a miniatura mudando (alguém chegando): sonda em motion_probe_hz;
+- rosto encontrado numa sondagem -> ACTIVE de novo;
+- duty_cycle(): segundos em cada estado e fração de frames com landmarker;
+- enabled: false -> sempre roda, nunca entra em IDLE.
+
+Uso: python inputs/check_presence_gate.py
+"""
+import os
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from modules.presence_gate import PresenceGate
+
+FPS = 30.0
+CONFIG = {"presence": {"enabled": True, "detector": "landmarker", "idle_after_seconds": 2.0,
+                       "probe_hz": 1.0, "motion_probe_hz": 5.0, "motion_threshold": 4.0}}
+STILL = np.full((120, 160, 3), 90, np.uint8)
+
+
+def step(gate, frame, t, face):
+    """Um frame do main5: should_run() e, se rodou, report(). Retorna se rodou."""
+    ran = gate.should_run(frame, t)
+    if ran:
+        gate.report(face, t)
+    return ran
+
+
+def probe_times(gate, t0, seconds, frames):
+    """Roda 'seconds' sem rosto; devolve os instantes em que o landmarker rodou."""
+    times = []
+    for k in range(int(round(seconds * FPS))):
+        t = t0 + k / FPS
+        if step(gate, frames(k), t, False):
+            times.append(t)
+    return np.array(times)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    gate = PresenceGate(CONFIG)
+    assert gate.detector == "landmarker" and not gate.is_idle
+
+    # 1. Rosto presente: roda em todo frame
+    for k in range(60):
+        assert step(gate, STILL, k / FPS, True)
+    t = 60 / FPS
+
+    # 2. Rosto some: continua rodando até idle_after_seconds, então IDLE
+    lost_at = t
+    while not gate.is_idle:
+        assert step(gate, STILL, t, False), "pulou o landmarker ainda ACTIVE"
+        t += 1.0 / FPS
+    idle_at = t - 1.0 / FPS
+    assert abs((idle_at - lost_at) - 2.0) <= 1.0 / FPS + 1e-9, f"IDLE após {idle_at - lost_at:.2f}s"
+    print(f"OK  ACTIVE -> IDLE {idle_at - lost_at:.2f}s após o rosto sumir (idle_after 2.0s)")
+
+    # 3. IDLE parado: sondagens a 1 Hz
+    times = probe_times(gate, t, 5.0, lambda k: STILL)
+    gaps = np.diff(np.concatenate([[idle_at], times]))
+    assert len(times) == 5 and np.all(np.abs(gaps - 1.0) <= 1.0 / FPS + 1e-9), gaps
+    assert gate.is_idle
+    print(f"OK  IDLE parado: {len(times)} sondagens em 5 s (probe_hz 1)")
+    t += 5.0
+
+    # 4. IDLE com a miniatura mudando: sondagens a 5 Hz
+    noisy = [rng.integers(0, 256, STILL.shape, dtype=np.uint8) for _ in range(2)]
+    times = probe_times(gate, t, 2.0, lambda k: noisy[k % 2])
+    gaps = np.diff(times)
+    assert gate.motion > CONFIG["presence"]["motion_threshold"]
+    assert 9 <= len(times) <= 11 and np.all(gaps <= 0.2 + 1.0 / FPS + 1e-9), gaps
+    print(f"OK  IDLE com movimento: {len(times)} sondagens em 2 s (motion_probe_hz 5)")
+    t += 2.0
+
+    # Parou de mexer: volta para 1 Hz
+    times = probe_times(gate, t, 3.0, lambda k: STILL)
+    assert len(times) <= 4 and np.all(np.diff(times) >= 1.0 - 1e-9)
+    t += 3.0
+
+    # 5. Sondagem encontra rosto -> ACTIVE, landmarker em todo frame
+    while not step(gate, STILL, t, True):
+        t += 1.0 / FPS
+    wake_at = t
+    assert not gate.is_idle
+    for k in range(1, 30):
+        assert step(gate, STILL, t + k / FPS, True)
+    t += 30 / FPS
+    print("OK  sondagem com rosto: volta a ACTIVE")
+
+    # 6. Ciclo de trabalho: IDLE do instante em que entrou até a sondagem com rosto
+    duty = gate.duty_cycle()
+    total = duty["active_seconds"] + duty["idle_seconds"]
+    assert abs(total - (t - 1.0 / FPS)) < 1e-6
+    assert abs(duty["idle_seconds"] - (wake_at - idle_at)) <= 1.0 / FPS + 1e-9
+    assert duty["detector"] == "landmarker"
+    assert gate.frames == int(round(t * FPS)) and 0.0 < duty["landmark_frame_ratio"] < 0.5
+    print(f"OK  duty_cycle: ativo {duty['active_seconds']:.1f}s, espera {duty['idle_seconds']:.1f}s, "
+          f"landmarker em {duty['landmark_frame_ratio'] * 100:.0f}% dos frames")
+
+    # 7. Desligado: roda sempre, nunca entra em IDLE
+    off = PresenceGate({"presence": dict(CONFIG["presence"], enabled=False)})
+    assert all(step(off, STILL, k / FPS, False) for k in range(200)) and not off.is_idle
+    print("OK  enabled: false -> landmarker em todo frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Verificação: TimeRingBuffer (buffer circular espelhado das 21 AUs).
+
+Comparado com uma lista simples das últimas 'capacity' amostras:
+- last(n) devolve as n mais recentes, em ordem, como view contígua
+  (sem cópia), inclusive depois de várias voltas no anel;
+- window(seconds) corta pelo tempo (timestamp >= último - seconds);
+- clear() esvazia sem realocar.
+
+Uso: python inputs/check_time_ring_buffer.py
+"""
+import os
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from core.signal_processing import TimeRingBuffer
+
+CAPACITY, CHANNELS = 16, 21
+
+
+def main():
+    rng = np.random.default_rng(0)
+    ring = TimeRingBuffer(CAPACITY, CHANNELS)
+    data, ts = ring.last()
+    assert len(ring) == 0 and data.shape == (0, CHANNELS) and ts.shape == (0,)
+    assert ring.window(1.0)[0].shape == (0, CHANNELS)
+
+    ref_data, ref_ts = [], []
+    t = 0.0
+    for step in range(5 * CAPACITY + 3):
+        t += rng.uniform(0.02, 0.08)
+        values = rng.uniform(0.0, 1.0, CHANNELS)
+        ring.append(values, t)
+        ref_data = (ref_data + [values])[-CAPACITY:]
+        ref_ts = (ref_ts + [t])[-CAPACITY:]
+        assert len(ring) == len(ref_ts)
+
+        # last(n): as n mais recentes, contíguas e sem cópia
+        for n in (None, 1, 5, CAPACITY, CAPACITY + 4):
+            data, ts = ring.last(n)
+            k = len(ref_ts) if n is None else min(n, len(ref_ts))
+            assert np.array_equal(data, np.array(ref_data[-k:])), f"last({n}) no passo {step}"
+            assert np.array_equal(ts, np.array(ref_ts[-k:]))
+            assert data.flags["C_CONTIGUOUS"] and np.shares_memory(data, ring._data)
+
+        # window(seconds): corte por tempo, não por contagem
+        for seconds in (0.0, 0.1, 0.3, 10.0):
+            data, ts = ring.window(seconds)
+            keep = [i for i, x in enumerate(ref_ts) if x >= ref_ts[-1] - seconds]
+            assert np.array_equal(ts, np.array(ref_ts)[keep]), f"window({seconds}) no passo {step}"
+            assert np.array_equal(data, np.array(ref_data)[keep])
+    print(f"OK  last()/window() == referência em {5 * CAPACITY + 3} escritas (várias voltas no anel)")
+
+    storage = ring._data
+    ring.clear()
+    assert len(ring) == 0 and ring.last()[0].shape == (0, CHANNELS) and ring._data is storage
+    ring.append(np.ones(CHANNELS), 1.0)
+    data, ts = ring.last()
+    assert data.shape == (1, CHANNELS) and ts[0] == 1.0
+    print("OK  clear() esvazia sem realocar")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import time
+import numpy as np
+from core.geometry_utils import GeometryUtils
+
+
+class AnalyzerScheduler:
+    """
+    Agendador Adaptativo de Analisadores (Motion-Adaptive Scheduling).
+
+    Decide, frame a frame, quais analisadores caros (Fluxo Óptico, Textura,
+    Física de Campo) devem rodar, para segurar o 'system.fps_target':
+    - Energia de movimento barata (deslocamento médio de alguns landmarks,
+      normalizado pela distância interocular). Rosto parado = não roda.
+    - Orçamento de tempo por frame (1 / fps_target). Se o custo médio do
+      analisador não cabe no que sobrou do frame, ele é pulado.
+    - Em frames pulados, os últimos resultados são reaproveitados com
+      decaimento (tendem a zero se o rosto continuar parado). O decaimento
+      é por tempo: 'decay' por frame de fps_target, igual a 15 ou 60 fps.
+    - Após 'max_skip_frames' pulos seguidos, uma execução é forçada.
+    """
+    # Pontos móveis + âncoras (sobrancelhas, olhos, nariz, boca)
+    MOTION_IDX = [1, 168, 33, 263, 107, 336, 66, 296, 159, 145, 386, 374, 61, 291, 13, 14]
+    IDX_EYE_L = 33
+    IDX_EYE_R = 263
+
+    def __init__(self, config):
+        fps_target = config['system']['fps_target']
+        self.frame_budget = 1.0 / fps_target
+
+        sch = config.get('scheduler', {}) or {}
+        self.enabled = sch.get('enabled', True)
+        self.motion_threshold = sch.get('motion_threshold', 0.002)
+        self.max_skip_frames = sch.get('max_skip_frames', 15)
+        self.decay = sch.get('decay', 0.7)
+
+        # Suavização da estimativa de custo de cada analisador
+        self.cost_alpha = 0.2
+
+        # Estado por analisador: custo médio, pulos seguidos e último resultado
+        self.analyzers = {}
+
+        self._points = self.MOTION_IDX + [self.IDX_EYE_L, self.IDX_EYE_R]
+        self.prev_points = None
+        self.prev_timestamp = None
+        self.motion_energy = 0.0
+        self.frame_start = time.perf_counter()
+        self.frame_dt = None  # Intervalo real entre os dois últimos begin_frame
+        self.frame_count = 0
+
+    def register(self, name):
+        self.analyzers[name] = {"cost": 0.0, "skipped": 0, "runs": 0, "last": {}}
+
+    def begin_frame(self, frame_start=None):
+        """Marca o início do frame (ideal: timestamp logo após a captura)."""
+        frame_start = frame_start if frame_start is not None else time.perf_counter()
+        if self.frame_count > 0 and frame_start > self.frame_start:
+            self.frame_dt = frame_start - self.frame_start
+        self.frame_start = frame_start
+        self.frame_count += 1
+
+    def update_motion(self, landmarks, w, h, timestamp=None):
+        """
+        landmarks: objetos do MediaPipe ou array (478, >=2) normalizados.
+        Energia de movimento = deslocamento médio (px) dos pontos de controle
+        entre frames, dividido pela distância interocular (px).
+        Com timestamp, o deslocamento é normalizado para um frame de
+        'fps_target' (o limiar vale igual a 30 ou 60 fps).
+        """
+        pts = GeometryUtils.landmarks_to_array(landmarks, self._points)[:, :2] * np.array([w, h])
+        prev_points, prev_ts = self.prev_points, self.prev_timestamp
+        self.prev_points, self.prev_timestamp = pts, timestamp
+        if prev_points is None:
+            self.motion_energy = 0.0
+            return self.motion_energy
+
+        # Os dois últimos pontos extraídos são os cantos dos olhos (IOD)
+        iod = GeometryUtils.interocular_distance(pts, left=-2, right=-1)
+        disp = np.mean(np.linalg.norm(pts[:-2] - prev_points[:-2], axis=1))
+        energy = disp / iod if iod > 0 else 0.0
+
+        if timestamp is not None and prev_ts is not None and timestamp > prev_ts:
+            energy *= self.frame_budget / (timestamp - prev_ts)
+        self.motion_energy = energy
+        return self.motion_energy
+
+    def is_moving(self):
+        return self.motion_energy > self.motion_threshold
+
+    def should_run(self, name):
+        if not self.enabled:
+            return True
+
+        state = self.analyzers[name]
+        # Refresh forçado: evita resultado "congelado" por muito tempo
+        if state["skipped"] >= self.max_skip_frames:
+            return True
+        if not self.is_moving():
+            return False
+
+        elapsed = time.perf_counter() - self.frame_start
+        return elapsed + state["cost"] <= self.frame_budget
+
+    def report(self, name, result, cost):
+        """Registra uma execução real: atualiza custo médio e último resultado."""
+        state = self.analyzers[name]
+        if state["runs"] == 0:
+            state["cost"] = cost
+        else:
+            state["cost"] = (cost * self.cost_alpha) + (state["cost"] * (1.0 - self.cost_alpha))
+        state["runs"] += 1
+        state["skipped"] = 0
+        state["last"] = dict(result)
+        return result
+
+    def reuse(self, name):
+        """Frame pulado: devolve o último resultado com decaimento (pelo tempo do frame)."""
+        state = self.analyzers[name]
+        state["skipped"] += 1
+        frames = self.frame_dt / self.frame_budget if self.frame_dt is not None else 1.0
+        decay = self.decay ** frames
+        state["last"] = {k: v * decay for k, v in state["last"].items()}
+        return dict(state["last"])
+
+    def run_ratio(self, name):
+        """Fração dos frames em que o analisador realmente rodou."""
+        if self.frame_count == 0:
+            return 0.0
+        return self.analyzers[name]["runs"] / self.frame_count
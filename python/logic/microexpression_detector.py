@@ -0,0 +1,105 @@
+import numpy as np
+
+
+class MicroExpressionDetector:
+    """
+    Detector de Eventos de Microexpressão (Streaming).
+
+    Uma máquina de estados por AU, vetorizada (custo O(1) por frame):
+      IDLE --(valor >= onset_threshold)--> ATIVO        => evento "onset"
+      ATIVO: acompanha o pico; quando cai 'apex_drop' => evento "apex"
+      ATIVO --(valor < offset_threshold)--> IDLE        => evento "offset"
+
+    Cada evento traz timestamp, duração desde o onset e intensidade de pico.
+    O offset recebe a classe final pela duração total:
+      - NOISE: < min_duration_ms (glitch)
+      - MICRO: < microexpression_threshold_ms (JSON de regras, 500 ms)
+      - MACRO: o resto
+    """
+    STATE_IDLE = 0
+    STATE_ACTIVE = 1
+
+    def __init__(self, config, au_names, micro_threshold_ms=500.0):
+        ev_cfg = config.get('events', {}) or {}
+        self.onset_threshold = ev_cfg.get('onset_threshold', 0.20)
+        self.offset_threshold = ev_cfg.get('offset_threshold', 0.12)
+        self.apex_drop = ev_cfg.get('apex_drop', 0.10)
+        self.min_duration_ms = ev_cfg.get('min_duration_ms', 40.0)
+        self.micro_threshold_ms = micro_threshold_ms
+
+        self.au_names = list(au_names)
+        n = len(self.au_names)
+
+        # Estado por AU (arrays alinhados com au_names)
+        self.state = np.full(n, self.STATE_IDLE, dtype=np.int8)
+        self.onset_ts = np.zeros(n)
+        self.peak = np.zeros(n)
+        self.peak_ts = np.zeros(n)
+        self.apex_emitted = np.zeros(n, dtype=bool)
+
+    def _classify(self, duration_ms):
+        if duration_ms < self.min_duration_ms:
+            return "NOISE"
+        if duration_ms < self.micro_threshold_ms:
+            return "MICRO"
+        return "MACRO"
+
+    def _event(self, i, kind, timestamp, label):
+        return {
+            "au": self.au_names[i],
+            "event": kind,
+            "timestamp": float(timestamp),
+            "onset_ts": float(self.onset_ts[i]),
+            "duration_ms": float((timestamp - self.onset_ts[i]) * 1000.0),
+            "peak": float(self.peak[i]),
+            "class": label,
+        }
+
+    def process(self, values, timestamp):
+        """
+        values: vetor de AUs alinhado com au_names. timestamp: captura (s).
+        Retorna a lista de eventos emitidos neste frame (normalmente vazia).
+        """
+        values = np.asarray(values, dtype=float)
+        events = []
+        active = self.state == self.STATE_ACTIVE
+
+        # 1. ONSET: IDLE -> ATIVO
+        onset = ~active & (values >= self.onset_threshold)
+        if onset.any():
+            self.state[onset] = self.STATE_ACTIVE
+            self.onset_ts[onset] = timestamp
+            self.peak[onset] = values[onset]
+            self.peak_ts[onset] = timestamp
+            self.apex_emitted[onset] = False
+            for i in np.flatnonzero(onset):
+                events.append(self._event(i, "onset", timestamp, None))
+
+        # 2. Acompanha o pico (só AUs que já estavam ativas)
+        rising = active & (values > self.peak)
+        self.peak[rising] = values[rising]
+        self.peak_ts[rising] = timestamp
+        self.apex_emitted[rising] = False
+
+        # 3. APEX: o valor caiu 'apex_drop' abaixo do pico -> o pico foi o ápice
+        apex = active & ~self.apex_emitted & (values < self.peak * (1.0 - self.apex_drop))
+        if apex.any():
+            self.apex_emitted[apex] = True
+            for i in np.flatnonzero(apex):
+                duration_ms = (self.peak_ts[i] - self.onset_ts[i]) * 1000.0
+                label = "MICRO" if duration_ms < self.micro_threshold_ms else "MACRO"
+                events.append(self._event(i, "apex", self.peak_ts[i], label))
+
+        # 4. OFFSET: ATIVO -> IDLE (histerese: offset_threshold < onset_threshold)
+        offset = active & (values < self.offset_threshold)
+        if offset.any():
+            self.state[offset] = self.STATE_IDLE
+            for i in np.flatnonzero(offset):
+                duration_ms = (timestamp - self.onset_ts[i]) * 1000.0
+                events.append(self._event(i, "offset", timestamp, self._classify(duration_ms)))
+
+        return events
+
+    def reset(self):
+        self.state[:] = self.STATE_IDLE
+        self.apex_emitted[:] = False
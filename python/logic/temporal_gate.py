@@ -1,17 +1,23 @@
+import numpy as np
+
 class TemporalGate:
     """
     Filtro Temporal: Decide se um sinal passou do limiar de 'Explosão' (Aceleração)
     e se manteve estável por tempo suficiente (Persistência).
-    
+
     Transforma sinais contínuos em EVENTOS DISCRETOS (Ex: "AU4 Disparou").
+
+    Roda sobre arrays alinhados (um índice por sinal): vetor de limiares,
+    máscara de desvio mínimo (textura) e contadores de persistência inteiros,
+    todos atualizados num único passo vetorizado.
     """
-    def __init__(self, config):
+    # Desvio mínimo absoluto dos sinais de textura (abaixo disso é ruído de sensor)
+    TEXTURE_MIN_DEVIATION = 5.0
+
+    def __init__(self, config, signal_names=None):
         self.accel_threshold = config['dynamics']['acceleration_threshold']
         self.min_persistence = config['dynamics']['min_persistence_frames']
-        
-        # Contadores de persistência para cada AU
-        self.active_counters = {}
-        
+
         # Mapeamento: Nome Técnico (Analyzers) -> Código FACS (JSON)
         self.MAPPING = {
             "au4_brow_dist": "AU4",
@@ -21,38 +27,97 @@ class TemporalGate:
             "au6_texture": "AU6",
             "au9_texture": "AU9"
         }
+        # Desvio mínimo por sinal: para textura (rugas) não basta a aceleração
+        self.MIN_DEVIATION = {
+            "au6_texture": self.TEXTURE_MIN_DEVIATION,
+            "au9_texture": self.TEXTURE_MIN_DEVIATION
+        }
+
+        self.signal_names = []
+        self.index = {}
+        self.counters = np.zeros(0, dtype=np.int32)
+        if signal_names is not None:
+            self.set_signals(signal_names)
+
+    def set_signals(self, signal_names):
+        """
+        Compila os vetores do gate para a lista de sinais (ordem fixa).
+        Contadores de sinais que já existiam são preservados.
+        """
+        old = dict(zip(self.signal_names, self.counters))
+        self.signal_names = list(signal_names)
+        self.index = {name: i for i, name in enumerate(self.signal_names)}
+
+        n = len(self.signal_names)
+        self.thresholds = np.full(n, float(self.accel_threshold))
+
+        # Para vetores (distância), importa só a aceleração (mudança rápida).
+        # Para textura (rugas), também exigimos um desvio mínimo absoluto.
+        self.min_deviation = np.array([
+            self.MIN_DEVIATION.get(name, -np.inf) for name in self.signal_names
+        ])
+
+        # Tradução para FACS (ex: au4_brow_dist -> AU4)
+        self.facs_codes = np.array([self.MAPPING.get(name) for name in self.signal_names], dtype=object)
+        self.has_code = np.array([code is not None for code in self.facs_codes], dtype=bool)
+
+        self.counters = np.array([old.get(name, 0) for name in self.signal_names], dtype=np.int32)
+
+    def process_arrays(self, deviations, accelerations, present=None):
+        """
+        deviations, accelerations: vetores (n_signals,) alinhados com signal_names.
+        present: máscara opcional dos sinais medidos neste frame; os ausentes
+        mantêm o contador (debounce) e não são validados.
+        Retorna máscara booleana dos sinais validados (já com mapeamento FACS).
+        """
+        # 1. Checagem de Intensidade/Aceleração (+ desvio mínimo da textura)
+        is_triggered = (np.abs(accelerations) > self.thresholds) & (deviations >= self.min_deviation)
+
+        # 2. Lógica de Persistência (Debounce): soma se disparou, zera se o sinal cair
+        counters = np.where(is_triggered, self.counters + 1, 0).astype(np.int32)
+        if present is not None:
+            counters = np.where(present, counters, self.counters).astype(np.int32)
+        self.counters = counters
+
+        # 3. Validação Final
+        validated = (self.counters >= self.min_persistence) & self.has_code
+        if present is not None:
+            validated &= present
+        return validated
+
+    def process_batch(self, deviations, accelerations):
+        """
+        Replay offline: deviations, accelerations com shape (T, n_signals).
+        Retorna máscara (T, n_signals) idêntica a chamar process_arrays()
+        frame a frame (os contadores continuam do estado atual).
+        """
+        deviations = np.asarray(deviations, dtype=float)
+        accelerations = np.asarray(accelerations, dtype=float)
+        is_triggered = (np.abs(accelerations) > self.thresholds) & (deviations >= self.min_deviation)
+
+        # Persistência = tamanho da sequência de disparos consecutivos (run-length)
+        T = len(is_triggered)
+        pos = np.arange(1, T + 1)[:, np.newaxis]
+        last_reset = np.maximum.accumulate(np.where(is_triggered, 0, pos), axis=0)
+        counters = pos - last_reset
+        # Antes do primeiro reset, a sequência continua o contador atual
+        counters = counters + np.where(last_reset == 0, self.counters, 0)
+
+        if T > 0:
+            self.counters = counters[-1].astype(np.int32)
+        return (counters >= self.min_persistence) & self.has_code
 
     def process(self, deviations, accelerations):
         """
         Retorna uma lista de AUs validadas neste frame.
         Ex: ["AU4", "AU7"]
         """
-        active_aus = []
-
-        for signal_name, value in deviations.items():
-            # Pega a aceleração correspondente (se existir no dict de dinâmica)
-            # Se for textura, às vezes usamos apenas magnitude, mas o ideal é aceleração.
-            acc = accelerations.get(signal_name, 0.0)
-            
-            # 1. Checagem de Intensidade/Aceleração
-            # Para vetores (distância), importa a aceleração (mudança rápida).
-            # Para textura (rugas), importa se o valor subiu rápido.
-            is_triggered = abs(acc) > self.accel_threshold
-            
-            # Se for textura, também podemos exigir um valor mínimo absoluto de desvio
-            if "texture" in signal_name and value < 5.0: # Ruído de sensor
-                is_triggered = False
-
-            # 2. Lógica de Persistência (Debounce)
-            if is_triggered:
-                self.active_counters[signal_name] = self.active_counters.get(signal_name, 0) + 1
-            else:
-                self.active_counters[signal_name] = 0 # Reseta se o sinal cair
-            
-            # 3. Validação Final
-            if self.active_counters.get(signal_name, 0) >= self.min_persistence:
-                # Traduz para nome FACS (ex: au4_brow_dist -> AU4)
-                if signal_name in self.MAPPING:
-                    active_aus.append(self.MAPPING[signal_name])
-        
-        return active_aus
+        if any(name not in self.index for name in deviations):
+            self.set_signals(self.signal_names + [n for n in deviations if n not in self.signal_names])
+
+        present = np.array([name in deviations for name in self.signal_names], dtype=bool)
+        dev = np.array([deviations.get(name, 0.0) for name in self.signal_names])
+        acc = np.array([accelerations.get(name, 0.0) for name in self.signal_names])
+
+        validated = self.process_arrays(dev, acc, present=present)
+        return self.facs_codes[validated].tolist()
@@ -5,6 +5,7 @@ import sys
 import os
 import numpy as np
 import json
+import argparse
 from collections import deque
 
 # Garante que o Python encontre as pastas locais
@@ -14,17 +15,33 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from modules.landmark_tracker import LandmarkTracker
 from modules.gaze_tracker import GazeTracker
 from modules.voice_activity import VoiceActivityDetector
+from modules.temporal_buffer import TimeSeriesAnalyzer
+from modules.landmark_smoother import LandmarkSmoother
+from modules.frame_record_store import FrameRecordStore
+from modules.calibration_store import CalibrationStore
+from modules.presence_gate import PresenceGate
+from modules.hud_renderer import HudRenderer
 
 # Analysers
 from analyzers.hybrid_engine import HybridEngine
 from analyzers.optical_flow_full import FullFaceFlowEngine
+from analyzers.field_engine import FieldEngine
+from analyzers.neutral_calibrator import NeutralCalibrator
 
 # Logic
 from logic.scoring_engine import SalesScoringEngine
+from logic.analyzer_scheduler import AnalyzerScheduler
+from logic.microexpression_detector import MicroExpressionDetector
+
+# Core
+from core.frame_tracer import FrameTracer
+from core.frame_pool import FramePool
+from core.head_pose import HeadPoseEstimator
+from core.canonical_landmarks import CanonicalLandmarks
 
 
 class SalesEngineV11_Production:
-    def __init__(self, window_seconds=4.0):
+    def __init__(self, window_seconds=4.0, client_id=None):
         print(f">>> INICIALIZANDO MAIN5.PY (21 AUs + CALIBRAÇÃO) ...")
         self.root_dir = os.path.dirname(os.path.abspath(__file__))
         self.config_path = os.path.join(
@@ -43,125 +60,137 @@ class SalesEngineV11_Production:
             self.cfg = yaml.safe_load(f)
 
         # Motores
-        self.tracker = LandmarkTracker()
+        self.tracker = LandmarkTracker(config=self.cfg)
+        # Sem rosto no quadro: landmarker em espera, só sondagens de presença
+        self.presence = PresenceGate(self.cfg)
+        self.smoother = LandmarkSmoother(self.cfg)
+        self.head_pose = HeadPoseEstimator(self.cfg)
         self.gaze_tracker = GazeTracker(self.cfg)
         self.vad = VoiceActivityDetector(self.cfg)
         self.engine = HybridEngine(self.cfg)
-        self.flow_engine = FullFaceFlowEngine()
+        self.flow_engine = FullFaceFlowEngine(self.cfg)
+        self.field_engine = FieldEngine(self.cfg)
+        # Landmarks sem movimento rígido da cabeça (entrada da Física de Campo)
+        self.canonical = CanonicalLandmarks(self.cfg)
         self.scoring_engine = SalesScoringEngine(self.rules_path)
 
-        # Buffer de Janela
+        # Agendador: roda o fluxo óptico só quando há movimento e orçamento
+        self.scheduler = AnalyzerScheduler(self.cfg)
+        self.scheduler.register("optical_flow")
+
+        # Buffers reutilizados do loop (captura e flip): sem alocar 2.7 MB por frame
+        self.pool = FramePool()
+        self.capture_buf = None
+
+        # HUD com camada estática em cache (opcionalmente a uma taxa menor)
+        self.hud = HudRenderer(self.cfg)
+
+        # Tracer de latência por frame (opt-in via config 'tracing')
+        self.tracer = FrameTracer.from_config(self.cfg, self.output_dir)
+
+        # Buffer de Janela (limitado por TEMPO de captura, não por nº de frames)
         self.window_seconds = window_seconds
-        self.fps = 30
-        self.window_size = int(window_seconds * self.fps)
-        self.buffer = deque(maxlen=self.window_size)
-        self.last_analysis_time = time.time()
+        self.buffer = FrameRecordStore(
+            capacity=int(window_seconds * 120) + 1,
+            au_names=self.engine.au_names,
+            field_names=self.field_engine.result_names,
+        )
+        self.last_analysis_time = time.perf_counter()
+
+        # Classificação temporal (Micro/Macro) de todas as AUs, a cada frame
+        self.temporal = TimeSeriesAnalyzer(
+            buffer_duration=window_seconds, au_names=self.engine.au_names
+        )
+        self.temporal_labels = {}
+
+        # Eventos onset/apex/offset em tempo real (sem esperar a janela)
+        micro_ms = self.scoring_engine.rules.get("scales", {}).get(
+            "microexpression_threshold_ms", 500
+        )
+        self.event_detector = MicroExpressionDetector(
+            self.cfg, self.engine.au_names, micro_threshold_ms=micro_ms
+        )
+        self.recent_events = deque(maxlen=50)
+        self.events_path = os.path.join(
+            self.output_dir,
+            self.cfg.get("events", {}).get("output_file", "microexpression_events.jsonl"),
+        )
+        # Converte o relógio de captura (perf_counter) para hora de parede
+        self.wall_clock_offset = time.time() - time.perf_counter()
 
         # Estado
         self.latest_strains = {}
+        self.latest_field = {}
+        self.prev_capture_ts = None
         self.current_decision = {
             "dominant_dimension": "Calibrando...",
             "dominant_value": 0,
         }
+        self.decisions_made = 0
+
+        # Calibração por cliente: restaura o snapshot salvo (warm start)
+        self.client_id = client_id
+        self.calibration_store = CalibrationStore(self.cfg, self.output_dir)
+        # Warm start só com tara restaurada (não basta o cliente ter uma entrada)
+        restored = self.calibration_store.restore(client_id, self.calibration_components())
+        self.warm_started = restored and self.engine.is_calibrated_manual
+
+        # Calibração neutra automática (dispensa a tecla C); pula se já calibrado
+        self.neutral_calibrator = NeutralCalibrator(self.cfg, self.engine.au_names)
+        if self.engine.is_calibrated_manual:
+            self.neutral_calibrator.mark_calibrated()
+
+    def calibration_components(self):
+        """Componentes com estado de calibração por cliente (get_state/load_state)."""
+        return {
+            "hybrid": self.engine,
+            "gaze": self.gaze_tracker,
+            "vad": self.vad,
+        }
 
-    def draw_hud(self, frame, aus, gaze_status):
-        h, w, _ = frame.shape
-        overlay = frame.copy()
-        # Painel lateral maior para caber as 21 AUs
-        cv2.rectangle(overlay, (0, 0), (420, h), (15, 15, 20), -1)
-        cv2.addWeighted(overlay, 0.90, frame, 0.10, 0, frame)
-
-        # Status Calibração e Barra de Progresso
-        tara_color = (0, 255, 0) if self.engine.is_calibrated_manual else (0, 0, 255)
-        cv2.putText(
-            frame,
-            f"TARA: {'ON' if self.engine.is_calibrated_manual else 'OFF (C)'}",
-            (430, 30),
-            1,
-            1,
-            tara_color,
-            2,
+    def save_calibration(self):
+        """Sem tara (saiu antes de calibrar, ou após 'r') o snapshot anterior fica intacto."""
+        self.calibration_store.save(
+            self.client_id, self.calibration_components(), calibrated=self.engine.is_calibrated_manual
         )
 
-        progress = len(self.buffer) / self.window_size
-        cv2.rectangle(frame, (430, 45), (700, 55), (40, 40, 40), -1)
-        cv2.rectangle(
-            frame, (430, 45), (430 + int(270 * progress), 55), (0, 255, 255), -1
-        )
+    def apply_neutral_calibration(self, au_levels, lm, w, h, face_matrix, baseline_div=None):
+        """Rosto neutro (tecla C ou automático): tara, olhar, VAD e referência canônica."""
+        self.engine.calibrate(au_levels, baseline_div=baseline_div)
+        self.gaze_tracker.calibrate(lm)
+        self.vad.calibrate(lm)
+        self.canonical.set_reference(lm, w, h, face_matrix)
+        self.field_engine.reset()
+        self.neutral_calibrator.mark_calibrated()
+        self.save_calibration()
+
+    def decision_ready_after(self):
+        """
+        Segundos de janela exigidos antes da próxima decisão. Com snapshot
+        restaurado, a primeira sai em warm_start_seconds (não espera a janela).
+        """
+        if self.warm_started and self.decisions_made == 0:
+            return self.calibration_store.warm_start_seconds
+        return self.window_seconds
+
+    def buffer_coverage(self):
+        """Segundos de captura cobertos pelo buffer da janela."""
+        return self.buffer.coverage()
 
-        # LISTA COMPLETA DAS 21 AUs (main4 style)
-        y = 35
-        json_aus = [
-            "AU1",
-            "AU2",
-            "AU4",
-            "AU5",
-            "AU6",
-            "AU7",
-            "AU9",
-            "AU10",
-            "AU12",
-            "AU14",
-            "AU15",
-            "AU17",
-            "AU18",
-            "AU20",
-            "AU23",
-            "AU24",
-            "AU25",
-            "AU26",
-            "AU28",
-            "AU43",
-            "AU45",
-        ]
-
-        for k in json_aus:
-            val = aus.get(k, 0.0)
-            color = (60, 60, 60)
-            if val > 0.05:
-                color = (0, 255, 255)
-            if val > 0.35:
-                color = (0, 255, 0)
-
-            # Validação Física Simplificada para o HUD
-            validated = False
-            brow_s = self.latest_strains.get("brow", 0)
-            nose_s = self.latest_strains.get("nose", 0)
-            mouth_s = abs(self.latest_strains.get("mouth", 0))
-
-            if k == "AU4" and brow_s < -2.0:
-                validated = True
-            if k in ["AU1", "AU2"] and brow_s > 2.0:
-                validated = True
-            if k == "AU9" and nose_s < -2.0:
-                validated = True
-            if k in ["AU12", "AU24", "AU25"] and mouth_s > 3.0:
-                validated = True
-
-            if validated and val > 0.1:
-                color = (255, 0, 255)  # Ponto Roxo
-
-            cv2.putText(
-                frame, k, (15, y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1
-            )
-            bar_w = int(val * 180)
-            cv2.rectangle(frame, (65, y - 10), (65 + 180, y + 2), (30, 30, 30), -1)
-            cv2.rectangle(frame, (65, y - 10), (65 + bar_w, y + 2), color, -1)
-            if validated:
-                cv2.circle(frame, (260, y - 4), 3, (255, 0, 255), -1)
-            y += 24
-
-        # Decisão Atual
-        dom = self.current_decision.get("dominant_dimension", "Analysing")
-        val = self.current_decision.get("dominant_value", 0)
-        cv2.putText(
-            frame,
-            f"DECISAO JSON: {dom.upper()} ({val})",
-            (430, h - 30),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.7,
-            (0, 255, 255),
-            2,
+    def draw_hud(self, frame, aus, gaze_status):
+        # Status Calibração
+        tara_color = (0, 255, 0) if self.engine.is_calibrated_manual else (0, 0, 255)
+        if self.engine.is_calibrated_manual:
+            tara_label = "ON"
+        elif self.neutral_calibrator.enabled:
+            tara_label = f"AUTO {int(self.neutral_calibrator.confidence * 100)}% (C)"
+        else:
+            tara_label = "OFF (C)"
+        progress = min(self.buffer_coverage() / self.decision_ready_after(), 1.0)
+
+        self.hud.draw(
+            frame, aus, self.latest_strains, self.temporal_labels,
+            tara_label, tara_color, progress, self.current_decision,
         )
 
     def run(self):
@@ -169,107 +198,236 @@ class SalesEngineV11_Production:
         cap.set(3, 1280)
         cap.set(4, 720)
 
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frame = cv2.flip(frame, 1)
-            h, w, _ = frame.shape
-
-            packet = self.tracker.process_frame(frame)
-            if packet and packet.face_blendshapes and packet.face_landmarks:
-                bs = packet.face_blendshapes[0]
-                lm = packet.face_landmarks[0]
-
-                # 1. Percepção com Calibração
-                aus, rot_pen = self.engine.process(bs, lm, w, h)
-                is_looking, _, gaze_status = self.gaze_tracker.analyze(lm, w, h)
-                is_speaking = self.vad.is_speaking(lm)
-
-                # 2. Física V10 (Boosts)
-                if rot_pen < 0.3:
-                    strains = self.flow_engine.analyze(frame, lm, w, h)
-                    self.latest_strains = strains
-                    # Aplicar os boosts nas AUs principais conforme a sua lógica de sucesso
-                    if strains.get("brow", 0) < -3.0:
-                        aus["AU4"] = max(aus["AU4"], 0.45)
-                    if strains.get("nose", 0) < -2.5:
-                        aus["AU9"] = max(aus["AU9"], 0.40)
-                    if abs(strains.get("mouth", 0)) > 4.0:
-                        for m_au in ["AU12", "AU24", "AU25"]:
-                            if aus.get(m_au, 0) > 0.1:
-                                aus[m_au] += 0.15
-
-                # 3. Buffer de Cabeça e Janela
-                nose, ear_l, ear_r = lm[1], lm[234], lm[454]
-                head_yaw = (nose.x - ear_l.x) / (ear_r.x - ear_l.x + 1e-6)
-
-                self.buffer.append(
-                    {
-                        "aus": aus.copy(),
-                        "meta": {
-                            "gaze": gaze_status,
-                            "is_speaking": is_speaking,
-                            "head_yaw": (head_yaw - 0.5) * 180,
-                            "head_pitch": (nose.y - (ear_l.y + ear_r.y) / 2) * 200,
-                        },
-                    }
-                )
-
-                # 4. Processar Janela (4s)
-                if time.time() - self.last_analysis_time >= self.window_seconds:
-                    if len(self.buffer) >= self.window_size * 0.8:
-                        # Extração estatística da janela (Percentil 95)
-                        all_keys = self.buffer[0]["aus"].keys()
-                        summary_aus = {
-                            k: float(
-                                np.percentile(
-                                    [f["aus"].get(k, 0) for f in self.buffer], 95
-                                )
-                            )
-                            for k in all_keys
-                        }
-
-                        window_payload = {
-                            "aus": summary_aus,
-                            "meta": self.buffer[-1][
-                                "meta"
-                            ],  # Usa o último meta como referência de estado
-                        }
-
-                        self.current_decision = self.scoring_engine.process(
-                            window_payload
+        tracer = self.tracer
+        events_file = open(self.events_path, "a", encoding="utf-8")
+
+        try:
+            while cap.isOpened():
+                # O frame abre antes da leitura: o span da captura pertence a ele
+                tracer.begin_frame()
+                with tracer.span("capture"):
+                    ret, raw = cap.read(image=self.capture_buf)
+                if not ret:
+                    break
+                self.capture_buf = raw
+                capture_ts = time.perf_counter()
+                self.scheduler.begin_frame(capture_ts)
+
+                with tracer.span("flip"):
+                    frame = cv2.flip(raw, 1, dst=self.pool.get("flip", raw.shape))
+                h, w, _ = frame.shape
+
+                # HUD e exibição só nos frames devidos (hud.max_fps)
+                show = self.hud.due(capture_ts)
+
+                with tracer.span("presence"):
+                    run_landmarks = self.presence.should_run(frame, capture_ts)
+                packet = None
+                if run_landmarks:
+                    with tracer.span("landmarks"):
+                        packet = self.tracker.process_frame(frame)
+                    was_idle = self.presence.is_idle
+                    self.presence.report(bool(packet and packet.face_landmarks), capture_ts)
+                    if self.presence.is_idle and not was_idle:
+                        # Cadeira vazia: um ONSET pendente não pode virar evento depois
+                        self.event_detector.reset()
+                if show and self.presence.is_idle:
+                    cv2.putText(frame, "SEM ROSTO - EM ESPERA", (20, 40),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 165, 255), 2)
+                if packet and packet.face_blendshapes and packet.face_landmarks:
+                    # Suavização One-Euro na fonte: daqui em diante lm/bs são arrays
+                    with tracer.span("smoothing"):
+                        lm, bs = self.smoother.process(
+                            packet.face_landmarks[0],
+                            self.engine.blendshape_vector(packet.face_blendshapes[0]),
+                            capture_ts,
                         )
 
-                        # Salvar em /outputs
-                        json_path = os.path.join(
-                            self.output_dir, "llm_decision_output.json"
+                    # 0. Pose da Cabeça (uma vez por frame, compartilhada), da matriz suavizada
+                    matrices = packet.facial_transformation_matrixes
+                    with tracer.span("head_pose"):
+                        face_matrix = self.smoother.process_matrix(
+                            matrices[0] if matrices else None, capture_ts
                         )
-                        with open(json_path, "w", encoding="utf-8") as f:
-                            json.dump(
-                                self.current_decision, f, indent=2, ensure_ascii=False
-                            )
+                        pose = self.head_pose.estimate(lm, w, h, face_matrix)
 
-                        self.last_analysis_time = time.time()
+                    # 1. Percepção com Calibração
+                    with tracer.span("hybrid_engine"):
+                        aus, rot_pen = self.engine.process(
+                            bs, lm, w, h, timestamp=capture_ts,
+                            rotation_penalty=pose["rotation_penalty"],
+                        )
+                    with tracer.span("gaze"):
+                        is_looking, _, gaze_status = self.gaze_tracker.analyze(
+                            lm, w, h, head_pose=pose
+                        )
+                    with tracer.span("vad"):
+                        is_speaking = self.vad.is_speaking(lm)
+                    self.scheduler.update_motion(lm, w, h, timestamp=capture_ts)
+
+                    # Calibração neutra automática: confirma quando o rosto fica quieto
+                    with tracer.span("auto_calibration"):
+                        neutral = self.neutral_calibrator.update(
+                            capture_ts, self.engine.ema_state, self.engine.last_div,
+                            self.scheduler.motion_energy, rot_pen,
+                        )
+                    if neutral is not None:
+                        au_levels, baseline_div = neutral
+                        self.apply_neutral_calibration(
+                            au_levels, lm, w, h, face_matrix, baseline_div=baseline_div
+                        )
 
-                self.draw_hud(frame, aus, gaze_status)
+                    # Física de Campo (divergência/fluxo por região): barata, roda todo frame
+                    with tracer.span("field"):
+                        dt = capture_ts - self.prev_capture_ts if self.prev_capture_ts else 0.0
+                        if dt > self.smoother.max_gap:
+                            # Rosto sumiu: o salto até a nova posição não é velocidade
+                            self.field_engine.reset()
+                            self.event_detector.reset()
+                        lm_canonical = self.canonical.transform(lm, w, h, face_matrix)
+                        self.latest_field = self.field_engine.analyze(lm_canonical, dt)
+                    self.prev_capture_ts = capture_ts
+
+                    # 2. Física V10 (Boosts)
+                    # Só roda o fluxo se o rosto se mexeu e o frame tem orçamento;
+                    # caso contrário reaproveita os últimos strains (com decaimento)
+                    if rot_pen < 0.3:
+                        if self.scheduler.should_run("optical_flow"):
+                            t0 = time.perf_counter()
+                            with tracer.span("optical_flow"):
+                                strains = self.flow_engine.analyze(frame, lm, w, h)
+                            self.scheduler.report(
+                                "optical_flow", strains, time.perf_counter() - t0
+                            )
+                        else:
+                            strains = self.scheduler.reuse("optical_flow")
+                            self.flow_engine.update_reference(frame, lm, w, h)
+                        self.latest_strains = strains
+                        # Aplicar os boosts nas AUs principais conforme a sua lógica de sucesso
+                        self.flow_engine.apply_boosts(aus, strains)
+
+                    # 3. Buffer de Cabeça e Janela
+                    au_vec = self.engine.to_vector(aus)
+                    self.buffer.append(
+                        capture_ts,
+                        au_vec,
+                        (pose["yaw"], pose["pitch"], pose["roll"]),
+                        gaze_status,
+                        is_speaking,
+                        field=self.latest_field,
+                    )
+
+                    with tracer.span("temporal"):
+                        self.temporal.update(au_vec, capture_ts)
+                        self.temporal_labels = dict(
+                            zip(self.temporal.au_names, self.temporal.classify_all())
+                        )
 
-                # Comandos de Teclado
-                key = cv2.waitKey(1) & 0xFF
+                    with tracer.span("events"):
+                        for event in self.event_detector.process(au_vec, capture_ts):
+                            event["wall_time"] = event["timestamp"] + self.wall_clock_offset
+                            self.recent_events.append(event)
+                            events_file.write(json.dumps(event) + "\n")
+                            events_file.flush()
+
+                    # Descarta frames que saíram da janela de tempo
+                    self.buffer.drop_older_than(capture_ts - self.window_seconds)
+
+                    # 4. Processar Janela (4s)
+                    ready_after = self.decision_ready_after()
+                    if capture_ts - self.last_analysis_time >= ready_after:
+                        if self.buffer_coverage() >= ready_after * 0.8:
+                            with tracer.span("window_scoring"):
+                                # Extração estatística da janela (Percentil 95), todas as AUs de uma vez
+                                window = self.buffer.window()
+                                p95 = np.percentile(window["aus"], 95, axis=0)
+                                summary_aus = {
+                                    k: float(v) for k, v in zip(self.buffer.au_names, p95)
+                                }
+
+                                window_payload = {
+                                    "aus": summary_aus,
+                                    "meta": self.buffer.latest_meta(),  # Usa o último meta como referência de estado
+                                }
+
+                                self.current_decision = self.scoring_engine.process(
+                                    window_payload
+                                )
+                                self.current_decision["temporal_classes"] = {
+                                    k: v for k, v in self.temporal_labels.items() if v
+                                }
+                                # Física de Campo: média da janela (div < 0 = compressão)
+                                field_rows = window["field"][~np.isnan(window["field"][:, 0])]
+                                if len(field_rows):
+                                    self.current_decision["field_physics"] = {
+                                        k: float(v)
+                                        for k, v in zip(self.buffer.field_names, field_rows.mean(axis=0))
+                                    }
+
+                            # Salvar em /outputs
+                            with tracer.span("json_write"):
+                                json_path = os.path.join(
+                                    self.output_dir, "llm_decision_output.json"
+                                )
+                                with open(json_path, "w", encoding="utf-8") as f:
+                                    json.dump(
+                                        self.current_decision, f, indent=2, ensure_ascii=False
+                                    )
+
+                            self.last_analysis_time = capture_ts
+                            self.decisions_made += 1
+
+                    if show:
+                        with tracer.span("hud"):
+                            self.draw_hud(frame, aus, gaze_status)
+
+                    # Comandos de Teclado (ficam na fila do highgui até o próximo frame exibido)
+                    key = cv2.waitKey(1) & 0xFF if show else 0xFF
+                    if key == ord("q"):
+                        break
+                    if key == ord("c"):
+                        self.apply_neutral_calibration(aus, lm, w, h, face_matrix)
+                    if key == ord("r"):
+                        self.engine.reset_calibration()
+                        self.gaze_tracker.reset_calibration()
+                        self.vad.reset_calibration()
+                        self.canonical.reset()
+                        self.field_engine.reset()
+                        self.neutral_calibrator.reset()
+                        self.event_detector.reset()
+                    if key == ord("t"):
+                        tracer.dump()
+
+                key = 0xFF
+                if show:
+                    with tracer.span("display"):
+                        cv2.imshow("Sales Engine V11 - Janela 4s", frame)
+                        key = cv2.waitKey(1) & 0xFF
+                tracer.end_frame()
                 if key == ord("q"):
                     break
-                if key == ord("c"):
-                    self.engine.calibrate(aus)
-                if key == ord("r"):
-                    self.engine.reset_calibration()
-
-            cv2.imshow("Sales Engine V11 - Janela 4s", frame)
-            if cv2.waitKey(1) & 0xFF == ord("q"):
-                break
-
-        cap.release()
-        cv2.destroyAllWindows()
+        finally:
+            # Também em erro: fecha o JSONL, salva o trace e a calibração
+            tracer.dump()
+            events_file.close()
+            duty = self.presence.duty_cycle()
+            print(
+                f">>> PRESENÇA ({duty['detector']}): ativo {duty['active_seconds']:.1f}s, "
+                f"espera {duty['idle_seconds']:.1f}s | landmarker em "
+                f"{duty['landmark_frame_ratio'] * 100:.0f}% dos frames"
+            )
+            # Fim de sessão: guarda a calibração (tara, baseline, EMA) do cliente
+            self.save_calibration()
+            cap.release()
+            cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
-    SalesEngineV11_Production(window_seconds=4.0).run()
+    ap = argparse.ArgumentParser(description="Sales Engine V11 (main5)")
+    ap.add_argument(
+        "--client",
+        default=None,
+        help="ID do cliente: restaura/salva a calibração dele em outputs/ (warm start).",
+    )
+    args = ap.parse_args()
+    SalesEngineV11_Production(window_seconds=4.0, client_id=args.client).run()
@@ -0,0 +1,90 @@
+import os
+import json
+import time
+from datetime import datetime
+
+
+class CalibrationStore:
+    """
+    Snapshots de calibração por cliente (warm start de sessões repetidas).
+
+    Um único JSON em /outputs, indexado pelo ID do cliente:
+      { "version": 1,
+        "clients": { "<id>": { "saved_at": ..., "saved_ts": ...,
+                               "components": { "hybrid": {...}, "gaze": {...}, ... } } } }
+
+    Cada componente é qualquer objeto com get_state() / load_state(state)
+    (HybridEngine, GazeTracker, VoiceActivityDetector...).
+
+    Só sessões calibradas (tara feita) viram snapshot: uma sessão que sai
+    antes de calibrar, ou depois de 'r', não sobrescreve o último snapshot
+    bom. Entradas sem "calibrated": true são ignoradas na leitura.
+    """
+    VERSION = 1
+
+    def __init__(self, config, output_dir):
+        store_cfg = config.get('calibration_store', {}) or {}
+        self.enabled = store_cfg.get('enabled', True)
+        self.path = os.path.join(output_dir, store_cfg.get('file', 'calibration_snapshots.json'))
+        self.max_age_seconds = store_cfg.get('max_age_days', 30) * 86400.0
+        self.warm_start_seconds = store_cfg.get('warm_start_seconds', 1.0)
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {"version": self.VERSION, "clients": {}}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f">>> AVISO: snapshot de calibração ilegível, ignorado: {self.path}")
+            return {"version": self.VERSION, "clients": {}}
+        if data.get("version") != self.VERSION:
+            return {"version": self.VERSION, "clients": {}}
+        return data
+
+    def load(self, client_id):
+        """Componentes salvos do cliente, ou None (sem snapshot / vencido)."""
+        if not self.enabled or not client_id:
+            return None
+        entry = self._read()["clients"].get(str(client_id))
+        if entry is None or not entry.get("calibrated", False):
+            return None
+        if time.time() - entry.get("saved_ts", 0.0) > self.max_age_seconds:
+            return None
+        return entry.get("components", {})
+
+    def restore(self, client_id, components):
+        """
+        Aplica o snapshot do cliente nos componentes {nome: objeto}.
+        Retorna True se algo foi restaurado.
+        """
+        saved = self.load(client_id)
+        if not saved:
+            return False
+        restored = False
+        for name, obj in components.items():
+            if name in saved:
+                obj.load_state(saved[name])
+                restored = True
+        if restored:
+            print(f">>> CALIBRAÇÃO RESTAURADA: cliente '{client_id}'")
+        return restored
+
+    def save(self, client_id, components, calibrated):
+        """
+        Grava get_state() de cada componente {nome: objeto} para o cliente
+        (escrita atômica). Sem calibração (calibrated=False) não grava nada.
+        """
+        if not self.enabled or not client_id or not calibrated:
+            return
+        data = self._read()
+        data["clients"][str(client_id)] = {
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "saved_ts": time.time(),
+            "calibrated": True,
+            "components": {name: obj.get_state() for name, obj in components.items()},
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
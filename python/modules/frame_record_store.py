@@ -0,0 +1,110 @@
+import numpy as np
+
+
+class FrameRecordStore:
+    """
+    Registros da Janela de Análise em colunas (struct-of-arrays).
+
+    Substitui a deque de dicts por frame do main5:
+    - aus: float32 (capacidade, n_AUs)
+    - meta: float32 (capacidade, n_meta) -> head_yaw, head_pitch, head_roll
+    - field: float32 (capacidade, n_field) -> NaN quando não há medida
+    - gaze: int8 (código do status do GazeTracker)
+    - is_speaking: bool
+    - ts: float64 (instante de captura)
+
+    Anel espelhado (2x capacidade), como o TimeRingBuffer: cada frame é
+    gravado em i e i+capacidade, então a janela é sempre uma fatia CONTÍGUA
+    (view sem cópia). Append O(1) e nenhum objeto novo por frame.
+    """
+    GAZE_STATUSES = ["DIRECT", "THINKING_UP", "THINKING_DOWN", "SIDEWAY", "ERROR"]
+    META_NAMES = ["head_yaw", "head_pitch", "head_roll"]
+
+    def __init__(self, capacity, au_names, field_names=()):
+        self.capacity = capacity
+        self.au_names = list(au_names)
+        self.field_names = list(field_names)
+        self.gaze_codes = {status: i for i, status in enumerate(self.GAZE_STATUSES)}
+
+        size = 2 * capacity
+        self._ts = np.zeros(size)
+        self._aus = np.zeros((size, len(self.au_names)), dtype=np.float32)
+        self._meta = np.zeros((size, len(self.META_NAMES)), dtype=np.float32)
+        self._field = np.full((size, len(self.field_names)), np.nan, dtype=np.float32)
+        self._gaze = np.zeros(size, dtype=np.int8)
+        self._speaking = np.zeros(size, dtype=bool)
+
+        self.head = 0   # Próxima posição de escrita (0..capacity-1)
+        self.count = 0  # Frames válidos
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, aus, meta, gaze_status, is_speaking, field=None):
+        """
+        aus: vetor alinhado com au_names. meta: vetor/sequência em META_NAMES.
+        field: dict do FieldEngine (opcional; chaves de field_names).
+        """
+        gaze_code = self.gaze_codes.get(gaze_status)
+        if gaze_code is None:
+            gaze_code = self.gaze_codes["ERROR"]
+
+        for i in (self.head, self.head + self.capacity):
+            self._ts[i] = timestamp
+            self._aus[i] = aus
+            self._meta[i] = meta
+            self._gaze[i] = gaze_code
+            self._speaking[i] = is_speaking
+            if field:
+                self._field[i] = [field.get(k, np.nan) for k in self.field_names]
+            else:
+                self._field[i] = np.nan
+
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _slice(self):
+        end = self.head + self.capacity
+        return slice(end - self.count, end)
+
+    @property
+    def timestamps(self):
+        return self._ts[self._slice()]
+
+    def drop_older_than(self, timestamp):
+        """Descarta (O(log n)) os frames com ts < timestamp."""
+        ts = self.timestamps
+        self.count -= int(np.searchsorted(ts, timestamp, side='left'))
+
+    def coverage(self):
+        """Segundos de captura cobertos pelos registros."""
+        if self.count < 2:
+            return 0.0
+        ts = self.timestamps
+        return float(ts[-1] - ts[0])
+
+    def window(self):
+        """Views (sem cópia) de todas as colunas válidas, do mais antigo ao mais novo."""
+        s = self._slice()
+        return {
+            "ts": self._ts[s],
+            "aus": self._aus[s],
+            "meta": self._meta[s],
+            "field": self._field[s],
+            "gaze": self._gaze[s],
+            "is_speaking": self._speaking[s],
+        }
+
+    def latest_meta(self):
+        """Meta do último frame no formato do scoring (dict com strings/bools)."""
+        i = self.head - 1 + self.capacity
+        meta = {
+            "gaze": self.GAZE_STATUSES[self._gaze[i]],
+            "is_speaking": bool(self._speaking[i]),
+        }
+        meta.update({name: float(v) for name, v in zip(self.META_NAMES, self._meta[i])})
+        return meta
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
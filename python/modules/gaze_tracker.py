@@ -15,42 +15,52 @@ class GazeTracker:
         self.IDX_EYE_L_CORNERS = (33, 133)   # Canto interno, externo
         self.IDX_EYE_R_CORNERS = (362, 263)
         
+        # Pose em graus (HeadPoseEstimator) -> escala antiga de desvio
+        # (razão nariz/orelhas x 200). Calibrado nos clipes HEAD51/HEAD52.
+        self.YAW_DEVIATION_PER_DEGREE = 3.35
+
         # Índices para estimativa de pose da cabeça (Simplificado)
         self.IDX_NOSE = 1
         self.IDX_FACE_EDGES = (234, 454) # Orelha esq, Orelha dir
 
-    def analyze(self, landmarks, frame_width, frame_height):
+        # Pontos usados (ordem esperada por _measure)
+        self._points = [self.IDX_NOSE, *self.IDX_FACE_EDGES, self.IDX_IRIS_L, *self.IDX_EYE_L_CORNERS]
+
+        # Normalização por cliente: posição da íris olhando para a câmera
+        # (0.5 = centro geométrico do olho) e offset vertical de repouso
+        self.iris_center = 0.5
+        self.vertical_offset = 0.0
+
+    def _coords(self, landmarks):
+        """(x, y) dos pontos de _points: floats (objetos) ou arrays (..., ) para (T, 478, 3)."""
+        if isinstance(landmarks, np.ndarray):
+            pts = GeometryUtils.landmarks_to_array(landmarks, self._points)
+            return [(pts[..., i, 0], pts[..., i, 1]) for i in range(len(self._points))]
+        return [(landmarks[i].x, landmarks[i].y) for i in self._points]
+
+    def _measure(self, coords, head_yaw=None):
         """
-        Retorna:
-          - is_looking (bool): True se estiver olhando para a câmera/tela.
-          - deviation (float): Grau de desvio estimado (0 a 100).
-          - status (str): "DIRECT", "THINKING_UP", "THINKING_DOWN", "SIDEWAY"
+        Desvio total (0 a 100+) e diferença vertical da íris.
+        Funciona igual para um frame (floats) ou uma sequência (arrays (T,)).
+        head_yaw (graus, opcional): yaw do HeadPoseEstimator.
         """
-        
+        (nose, _), (left_ear, _), (right_ear, _), (iris_l, iris_y), eye_l_start, eye_l_end = coords
+
         # 1. Estimativa de Pose da Cabeça (Yaw - Rotação Lateral)
-        nose = landmarks[self.IDX_NOSE].x
-        left_ear = landmarks[self.IDX_FACE_EDGES[0]].x
-        right_ear = landmarks[self.IDX_FACE_EDGES[1]].x
-        
-        # Razão de simetria do nariz em relação às orelhas
-        face_width = right_ear - left_ear
-        if face_width == 0: return False, 0.0, "ERROR"
-        
-        # 0.5 = Centro. <0.5 Esquerda, >0.5 Direita
-        head_yaw_ratio = (nose - left_ear) / face_width
-        head_yaw_deviation = abs(head_yaw_ratio - 0.5) * 200 # Escala aprox 0-100
-        
+        if head_yaw is not None:
+            head_yaw_deviation = abs(head_yaw) * self.YAW_DEVIATION_PER_DEGREE
+        else:
+            # Razão de simetria do nariz em relação às orelhas
+            # 0.5 = Centro. <0.5 Esquerda, >0.5 Direita
+            face_width = right_ear - left_ear
+            head_yaw_ratio = GeometryUtils.safe_ratio(nose - left_ear, face_width, 0.5)
+            head_yaw_deviation = abs(head_yaw_ratio - 0.5) * 200 # Escala aprox 0-100
+
         # 2. Rastreamento de Íris (Ajuste fino)
-        # Calcula onde a íris está dentro do olho
-        iris_l = landmarks[self.IDX_IRIS_L].x
-        eye_l_start, eye_l_end = landmarks[self.IDX_EYE_L_CORNERS[0]].x, landmarks[self.IDX_EYE_L_CORNERS[1]].x
-        eye_l_width = eye_l_end - eye_l_start
-        
         # Posição normalizada da íris (0.0 a 1.0 dentro do olho)
-        if eye_l_width == 0: iris_ratio = 0.5
-        else: iris_ratio = (iris_l - eye_l_start) / eye_l_width
-        
-        iris_deviation = abs(iris_ratio - 0.5) * 200 # Escala aprox 0-100
+        eye_l_width = eye_l_end[0] - eye_l_start[0]
+        iris_ratio = GeometryUtils.safe_ratio(iris_l - eye_l_start[0], eye_l_width, self.iris_center)
+        iris_deviation = abs(iris_ratio - self.iris_center) * 200 # Escala aprox 0-100
 
         # 3. Fusão (Score Total de Desvio)
         # Se a cabeça gira, o olho costuma compensar. Se ambos giram, desvio é alto.
@@ -58,10 +68,48 @@ class GazeTracker:
 
         # 4. Classificação Vertical (Olhar Cima/Baixo)
         # Importante para diferenciar "Pensando" (Cima/Lado) de "Tristeza" (Baixo)
-        iris_y = landmarks[self.IDX_IRIS_L].y
-        eye_y_center = (landmarks[self.IDX_EYE_L_CORNERS[0]].y + landmarks[self.IDX_EYE_L_CORNERS[1]].y) / 2
-        vertical_diff = (iris_y - eye_y_center) * 1000
-        
+        eye_y_center = (eye_l_start[1] + eye_l_end[1]) / 2
+        vertical_diff = (iris_y - eye_y_center) * 1000 - self.vertical_offset
+        return total_deviation, vertical_diff
+
+    def calibrate(self, landmarks):
+        """Frame neutro (cliente olhando para a câmera) vira o centro do olhar."""
+        (_, _), _, _, (iris_l, iris_y), eye_l_start, eye_l_end = self._coords(landmarks)
+        self.iris_center = float(GeometryUtils.safe_ratio(
+            iris_l - eye_l_start[0], eye_l_end[0] - eye_l_start[0], 0.5
+        ))
+        self.vertical_offset = float((iris_y - (eye_l_start[1] + eye_l_end[1]) / 2) * 1000)
+
+    def reset_calibration(self):
+        self.iris_center = 0.5
+        self.vertical_offset = 0.0
+
+    def get_state(self):
+        return {"iris_center": self.iris_center, "vertical_offset": self.vertical_offset}
+
+    def load_state(self, state):
+        self.iris_center = float(state.get("iris_center", 0.5))
+        self.vertical_offset = float(state.get("vertical_offset", 0.0))
+
+    def analyze(self, landmarks, frame_width, frame_height, head_pose=None):
+        """
+        head_pose (opcional): dict do HeadPoseEstimator; o yaw em graus
+        substitui a estimativa simplificada nariz/orelhas.
+
+        Retorna:
+          - is_looking (bool): True se estiver olhando para a câmera/tela.
+          - deviation (float): Grau de desvio estimado (0 a 100).
+          - status (str): "DIRECT", "THINKING_UP", "THINKING_DOWN", "SIDEWAY"
+        """
+        coords = self._coords(landmarks)
+
+        # Sem largura de rosto (orelha dir - orelha esq) não há referência de pose
+        if coords[2][0] - coords[1][0] == 0: return False, 0.0, "ERROR"
+
+        head_yaw = head_pose["yaw"] if head_pose is not None else None
+        total_deviation, vertical_diff = self._measure(coords, head_yaw)
+        total_deviation, vertical_diff = float(total_deviation), float(vertical_diff)
+
         status = "DIRECT"
         if total_deviation > self.max_deviation:
             if vertical_diff < -15: status = "THINKING_UP"   # Olhando p/ cima
@@ -71,3 +119,25 @@ class GazeTracker:
             return False, total_deviation, status
             
         return True, total_deviation, "DIRECT"
+
+    def analyze_batch(self, landmarks, head_yaw=None):
+        """
+        Sequência (T, 478, 3): retorna (is_looking (T,), deviation (T,), status (T,)).
+        head_yaw (T,) em graus é opcional. Frames sem largura de rosto saem como "ERROR".
+        """
+        coords = self._coords(np.asarray(landmarks, dtype=float))
+        if head_yaw is not None:
+            head_yaw = np.asarray(head_yaw, dtype=float)
+        total_deviation, vertical_diff = self._measure(coords, head_yaw)
+
+        is_looking = total_deviation <= self.max_deviation
+        status = np.select(
+            [is_looking, vertical_diff < -15, vertical_diff > 15],
+            ["DIRECT", "THINKING_UP", "THINKING_DOWN"], default="SIDEWAY"
+        ).astype(object)
+
+        invalid = (coords[2][0] - coords[1][0]) == 0
+        status[invalid] = "ERROR"
+        is_looking = is_looking & ~invalid
+        total_deviation = np.where(invalid, 0.0, total_deviation)
+        return is_looking, total_deviation, status
@@ -0,0 +1,133 @@
+import cv2
+import numpy as np
+
+
+class HudRenderer:
+    """
+    HUD do main5 com camada estática em cache.
+
+    A camada estática (painel escuro, nomes das 21 AUs, fundos das barras)
+    é desenhada UMA vez por altura de frame. A cada frame:
+    - o escurecimento (90% painel / 10% vídeo) roda só na ROI do painel;
+    - os pixels opacos da camada (textos/fundos) são copiados por máscara;
+    - só barras, marcadores e textos dinâmicos são redesenhados.
+
+    max_fps > 0 desacopla o HUD (e a exibição) da análise: due() indica os
+    frames em que vale desenhar/mostrar; nos demais a análise segue sem custo
+    de renderização.
+    """
+    AUS = [
+        "AU1", "AU2", "AU4", "AU5", "AU6", "AU7", "AU9", "AU10", "AU12", "AU14",
+        "AU15", "AU17", "AU18", "AU20", "AU23", "AU24", "AU25", "AU26", "AU28",
+        "AU43", "AU45",
+    ]
+    PANEL_WIDTH = 421  # cv2.rectangle((0, 0), (420, h)) inclui a coluna 420
+    PANEL_COLOR = (15, 15, 20)
+    PANEL_ALPHA = 0.90
+    BAR_X, BAR_W = 65, 180
+    ROW_Y0, ROW_STEP = 35, 24
+
+    def __init__(self, config):
+        hud_cfg = config.get('hud', {}) or {}
+        max_fps = hud_cfg.get('max_fps', 0)
+        self.min_interval = 1.0 / max_fps if max_fps and max_fps > 0 else 0.0
+        self.last_render_ts = None
+
+        self.layer_height = None
+        self.panel = None   # Cor do painel já multiplicada pelo alpha
+        self.static = None  # Pixels opacos da camada estática
+        self.mask = None
+
+    def due(self, timestamp):
+        """True se o HUD deve ser desenhado (e exibido) neste frame."""
+        if self.last_render_ts is not None and timestamp - self.last_render_ts < self.min_interval:
+            return False
+        self.last_render_ts = timestamp
+        return True
+
+    def _build_layer(self, h):
+        pw = self.PANEL_WIDTH
+        self.panel = np.empty((h, pw, 3), np.uint8)
+        self.panel[:] = [round(c * self.PANEL_ALPHA) for c in self.PANEL_COLOR]
+        # Desenhada sobre a cor do painel: bordas suavizadas do texto já saem misturadas
+        self.static = self.panel.copy()
+
+        y = self.ROW_Y0
+        for k in self.AUS:
+            cv2.putText(self.static, k, (15, y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
+            cv2.rectangle(self.static, (self.BAR_X, y - 10), (self.BAR_X + self.BAR_W, y + 2),
+                          (30, 30, 30), -1)
+            y += self.ROW_STEP
+        self.mask = np.any(self.static != self.panel, axis=2).astype(np.uint8)
+        self.layer_height = h
+
+    def _au_color(self, k, val, strains):
+        color = (60, 60, 60)
+        if val > 0.05:
+            color = (0, 255, 255)
+        if val > 0.35:
+            color = (0, 255, 0)
+
+        # Validação Física Simplificada para o HUD
+        validated = False
+        brow_s = strains.get("brow", 0)
+        nose_s = strains.get("nose", 0)
+        mouth_s = abs(strains.get("mouth", 0))
+
+        if k == "AU4" and brow_s < -2.0:
+            validated = True
+        if k in ["AU1", "AU2"] and brow_s > 2.0:
+            validated = True
+        if k == "AU9" and nose_s < -2.0:
+            validated = True
+        if k in ["AU12", "AU24", "AU25"] and mouth_s > 3.0:
+            validated = True
+
+        if validated and val > 0.1:
+            color = (255, 0, 255)  # Ponto Roxo
+        return color, validated
+
+    def draw(self, frame, aus, strains, temporal_labels, tara_label, tara_color, progress, decision):
+        h, w, _ = frame.shape
+        if self.layer_height != h:
+            self._build_layer(h)
+
+        # Camada estática: blend só na ROI do painel + cópia dos pixels opacos
+        pw = min(self.panel.shape[1], w)
+        roi = frame[:, :pw]
+        cv2.addWeighted(roi, 1.0 - self.PANEL_ALPHA, self.panel[:, :pw], 1.0, 0, dst=roi)
+        cv2.copyTo(self.static[:, :pw], self.mask[:, :pw], roi)
+
+        # Status Calibração e Barra de Progresso
+        cv2.putText(frame, f"TARA: {tara_label}", (430, 30), 1, 1, tara_color, 2)
+        cv2.rectangle(frame, (430, 45), (700, 55), (40, 40, 40), -1)
+        cv2.rectangle(frame, (430, 45), (430 + int(270 * progress), 55), (0, 255, 255), -1)
+
+        # Barras dinâmicas das 21 AUs
+        y = self.ROW_Y0
+        for k in self.AUS:
+            val = aus.get(k, 0.0)
+            color, validated = self._au_color(k, val, strains)
+            bar_w = int(val * self.BAR_W)
+            cv2.rectangle(frame, (self.BAR_X, y - 10), (self.BAR_X + bar_w, y + 2), color, -1)
+            if validated:
+                cv2.circle(frame, (260, y - 4), 3, (255, 0, 255), -1)
+            tag = temporal_labels.get(k)
+            if tag:
+                cv2.putText(
+                    frame, tag[:5], (272, y), cv2.FONT_HERSHEY_SIMPLEX, 0.35, (0, 200, 255), 1
+                )
+            y += self.ROW_STEP
+
+        # Decisão Atual
+        dom = decision.get("dominant_dimension", "Analysing")
+        val = decision.get("dominant_value", 0)
+        cv2.putText(
+            frame,
+            f"DECISAO JSON: {dom.upper()} ({val})",
+            (430, h - 30),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.7,
+            (0, 255, 255),
+            2,
+        )
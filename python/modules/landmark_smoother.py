@@ -0,0 +1,83 @@
+import numpy as np
+from core.geometry_utils import GeometryUtils
+from core.signal_processing import OneEuroFilter
+
+
+class LandmarkSmoother:
+    """
+    Suavização na FONTE: filtro One-Euro sobre os 478 landmarks (x, y, z)
+    e os 52 blendshapes, um passo vetorizado por frame (dt real).
+    Todo o resto do pipeline (AUs, pose, física, VAD, olhar) recebe os
+    sinais já sem o jitter do FaceLandmarker.
+
+    Saída: (landmarks (478, 3), blendshapes (52,)) como arrays, que todos
+    os consumidores aceitam.
+
+    A matriz de transformação facial (pose da cabeça, referência canônica)
+    passa pelo mesmo filtro em process_matrix(): a rotação é suavizada
+    elemento a elemento e reprojetada numa rotação (SVD).
+    """
+    def __init__(self, config):
+        sm_cfg = config.get('smoothing', {}) or {}
+        self.enabled = sm_cfg.get('enabled', True)
+        self.max_gap = sm_cfg.get('max_gap_seconds', 0.5)
+        fps = config.get('system', {}).get('fps_target', 30)
+        d_cutoff = sm_cfg.get('d_cutoff', 1.0)
+
+        lm_cfg = sm_cfg.get('landmarks', {}) or {}
+        bs_cfg = sm_cfg.get('blendshapes', {}) or {}
+        rot_cfg = sm_cfg.get('rotation', {}) or {}
+
+        # Landmarks: a velocidade é a norma por ponto (x, y, z compartilham o corte)
+        self.landmark_filter = OneEuroFilter(
+            min_cutoff=lm_cfg.get('min_cutoff', 1.0), beta=lm_cfg.get('beta', 50.0),
+            d_cutoff=d_cutoff, freq=fps, speed_axis=-1
+        )
+        self.blendshape_filter = OneEuroFilter(
+            min_cutoff=bs_cfg.get('min_cutoff', 3.0), beta=bs_cfg.get('beta', 3.0),
+            d_cutoff=d_cutoff, freq=fps
+        )
+        self.rotation_filter = OneEuroFilter(
+            min_cutoff=rot_cfg.get('min_cutoff', 1.0), beta=rot_cfg.get('beta', 20.0),
+            d_cutoff=d_cutoff, freq=fps
+        )
+        self.last_timestamp = None
+
+    def process(self, landmarks, blendshape_scores, timestamp=None):
+        """
+        landmarks: objetos do MediaPipe ou array (478, 3).
+        blendshape_scores: vetor (52,) (ver HybridEngine.blendshape_vector).
+        """
+        lm = GeometryUtils.landmarks_to_array(landmarks)
+        bs = np.asarray(blendshape_scores, dtype=float)
+        if not self.enabled:
+            return lm, bs
+
+        # Rosto sumiu por muito tempo: não "arrasta" a face antiga até a nova
+        if (timestamp is not None and self.last_timestamp is not None
+                and timestamp - self.last_timestamp > self.max_gap):
+            self.reset()
+        self.last_timestamp = timestamp
+
+        return (self.landmark_filter.process(lm, timestamp),
+                self.blendshape_filter.process(bs, timestamp))
+
+    def process_matrix(self, transformation_matrix, timestamp=None):
+        """
+        Matriz 4x4 do MediaPipe (ou None) com a rotação suavizada. Chamar
+        depois de process() no mesmo frame (o reinício por gap vem de lá).
+        """
+        if transformation_matrix is None or not self.enabled:
+            return transformation_matrix
+        matrix = np.array(transformation_matrix, dtype=float)
+        R = self.rotation_filter.process(matrix[:3, :3], timestamp)
+        # A média de rotações não é uma rotação: volta para a mais próxima
+        U, _, Vt = np.linalg.svd(R)
+        matrix[:3, :3] = U @ Vt
+        return matrix
+
+    def reset(self):
+        self.landmark_filter.reset()
+        self.blendshape_filter.reset()
+        self.rotation_filter.reset()
+        self.last_timestamp = None
@@ -4,9 +4,14 @@ from mediapipe.tasks.python import vision
 import cv2
 import os
 import numpy as np
+from core.frame_pool import FramePool
 
 class LandmarkTracker:
-    def __init__(self, model_path='face_landmarker.task'):
+    # Cantos externos dos olhos (IOD - Interocular Distance)
+    IDX_EYE_L = 33
+    IDX_EYE_R = 263
+
+    def __init__(self, model_path='face_landmarker.task', config=None):
         # Garante que o caminho do modelo está correto
         if not os.path.exists(model_path):
             if os.path.exists(os.path.join(os.getcwd(), model_path)):
@@ -15,35 +20,123 @@ class LandmarkTracker:
                 print(f"ERRO CRÍTICO: Modelo '{model_path}' não encontrado.")
 
         base_options = python.BaseOptions(model_asset_path=model_path)
-        
+
+        # Matriz de transformação facial (pose da cabeça "de graça", ver core/head_pose.py)
+        pose_cfg = (config or {}).get('head_pose', {}) or {}
+        self.output_matrix = config is not None and pose_cfg.get('source', 'matrix') == 'matrix'
+
         # --- CONFIGURAÇÃO CORRIGIDA ---
         options = vision.FaceLandmarkerOptions(
             base_options=base_options,
             output_face_blendshapes=True,  # Precisamos disso para as AUs (V0/V32)
             # output_face_landmarks=True,  <-- REMOVIDO (Landmarks vêm por padrão)
+            output_facial_transformation_matrixes=self.output_matrix,
             num_faces=1,
-            running_mode=vision.RunningMode.IMAGE 
+            running_mode=vision.RunningMode.IMAGE
         )
         self.detector = vision.FaceLandmarker.create_from_options(options)
 
+        # --- RECORTE DA FACE (ROI) ---
+        # Em vez de mandar o frame inteiro (1280x720) para a inferência,
+        # recortamos uma margem em volta da face do frame anterior e, se a face
+        # estiver grande (IOD alta), reduzimos o recorte.
+        tracker_cfg = (config or {}).get('tracker', {}) or {}
+        self.roi_crop = tracker_cfg.get('roi_crop', config is not None)
+        self.roi_margin = tracker_cfg.get('roi_margin', 0.35)
+        self.target_iod = tracker_cfg.get('target_iod_pixels', 0)
+        self.min_iod = (config or {}).get('safety', {}).get('min_iod_pixels', 40)
+
+        # Caixa da face no frame anterior (pixels): x1, y1, x2, y2
+        self.prev_box = None
+        self.prev_iod = 0.0
+
+        # Buffers reutilizados (RGB e recorte reduzido): sem alocação por frame
+        self.pool = FramePool()
+
+    def _detect(self, frame):
+        # Converte para formato MediaPipe (RGB)
+        # (o mp.Image copia os pixels, então o buffer pode ser reutilizado)
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.pool.get('rgb', frame.shape))
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+
+        # Detecção Síncrona
+        detection_result = self.detector.detect(mp_image)
+
+        # Verifica se detectou rosto
+        if detection_result.face_landmarks:
+            return detection_result
+        return None
+
+    def _crop_from_prev_box(self, w, h):
+        """Retorna (x1, y1, x2, y2) da face anterior com margem, recortado à imagem."""
+        x1, y1, x2, y2 = self.prev_box
+        pad = self.roi_margin * max(x2 - x1, y2 - y1)
+        x1, y1 = max(0, int(x1 - pad)), max(0, int(y1 - pad))
+        x2, y2 = min(w, int(x2 + pad)), min(h, int(y2 + pad))
+        return x1, y1, x2, y2
+
+    def _downscale_factor(self):
+        """
+        Fator de redução do recorte. Só reduz quando a IOD passa do alvo,
+        e nunca deixa a IOD reduzida abaixo de 'min_iod_pixels' (config).
+        """
+        if not self.target_iod or self.prev_iod <= 0:
+            return 1.0
+        target = max(self.target_iod, self.min_iod)
+        return min(1.0, target / self.prev_iod)
+
+    def _update_face_box(self, landmarks, w, h):
+        xs = np.array([lm.x for lm in landmarks]) * w
+        ys = np.array([lm.y for lm in landmarks]) * h
+        self.prev_box = (xs.min(), ys.min(), xs.max(), ys.max())
+
+        eye_l, eye_r = landmarks[self.IDX_EYE_L], landmarks[self.IDX_EYE_R]
+        self.prev_iod = float(np.hypot((eye_r.x - eye_l.x) * w, (eye_r.y - eye_l.y) * h))
+
     def process_frame(self, frame):
         """
         Processa o frame e retorna o resultado COMPLETO do MediaPipe.
+        Os landmarks são sempre devolvidos normalizados no frame INTEIRO,
+        mesmo quando a inferência rodou sobre o recorte da face.
         """
         try:
-            # Converte para formato MediaPipe (RGB)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
-            
-            # Detecção Síncrona
-            detection_result = self.detector.detect(mp_image)
-            
-            # Verifica se detectou rosto
-            if detection_result.face_landmarks:
-                return detection_result
-            else:
+            h, w = frame.shape[:2]
+            detection_result = None
+
+            # 1. Tentativa rápida: recorte em volta da face anterior
+            if self.roi_crop and self.prev_box is not None:
+                x1, y1, x2, y2 = self._crop_from_prev_box(w, h)
+                cw, ch = x2 - x1, y2 - y1
+                if cw > 0 and ch > 0:
+                    crop = frame[y1:y2, x1:x2]
+                    scale = self._downscale_factor()
+                    if scale < 1.0:
+                        size = (max(1, round(cw * scale)), max(1, round(ch * scale)))
+                        crop = cv2.resize(crop, size, dst=self.pool.get('crop', (size[1], size[0], 3)),
+                                          interpolation=cv2.INTER_AREA)
+
+                    detection_result = self._detect(crop)
+                    if detection_result:
+                        # Mapeia de volta: coordenadas do recorte -> frame inteiro
+                        for face in detection_result.face_landmarks:
+                            for lm in face:
+                                lm.x = (x1 + lm.x * cw) / w
+                                lm.y = (y1 + lm.y * ch) / h
+                                lm.z = lm.z * cw / w
+
+            # 2. Fallback: tracking perdido (ou primeiro frame) -> frame inteiro
+            if detection_result is None:
+                detection_result = self._detect(frame)
+
+            if detection_result is None:
+                self.prev_box = None
                 return None
-                
+
+            if self.roi_crop:
+                self._update_face_box(detection_result.face_landmarks[0], w, h)
+            return detection_result
+
         except Exception as e:
             print(f"Erro no Tracker: {e}")
+            self.prev_box = None
             return None
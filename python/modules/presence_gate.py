@@ -0,0 +1,137 @@
+import os
+import cv2
+
+
+class PresenceGate:
+    """
+    Portão de Presença: desliga o FaceLandmarker com a cadeira vazia.
+
+    Estados:
+    - ACTIVE: rosto presente, o landmarker roda em todo frame.
+    - IDLE: sem rosto há 'idle_after_seconds'. A cada frame só roda uma
+      diferença de quadros numa miniatura em cinza (~64 px, custo desprezível);
+      uma SONDAGEM de presença roda em 'probe_hz' (ou até 'motion_probe_hz'
+      se a miniatura mudou, ex: alguém sentando).
+
+    Sondagem: Haar cascade do OpenCV (cv2.data) num frame reduzido, quando o
+    arquivo existe; senão, o próprio landmarker roda naquele frame.
+    Rosto encontrado -> ACTIVE.
+
+    duty_cycle() informa o tempo em cada estado e a fração de frames em que
+    o landmarker rodou.
+    """
+    ACTIVE = "ACTIVE"
+    IDLE = "IDLE"
+    HAAR_FILE = "haarcascade_frontalface_default.xml"
+
+    def __init__(self, config):
+        gate_cfg = config.get('presence', {}) or {}
+        self.enabled = gate_cfg.get('enabled', True)
+        self.idle_after = gate_cfg.get('idle_after_seconds', 2.0)
+        self.probe_interval = 1.0 / max(gate_cfg.get('probe_hz', 1.0), 1e-3)
+        self.motion_probe_interval = 1.0 / max(gate_cfg.get('motion_probe_hz', 5.0), 1e-3)
+        self.motion_threshold = gate_cfg.get('motion_threshold', 4.0)
+        self.thumb_width = gate_cfg.get('thumb_width', 64)
+        self.detect_width = gate_cfg.get('detect_width', 320)
+
+        self.cascade = None
+        if gate_cfg.get('detector', 'auto') in ('auto', 'haar'):
+            # Wheels do OpenCV 5 não trazem mais os XML em cv2.data
+            cascade_dir = getattr(getattr(cv2, 'data', None), 'haarcascades', '')
+            path = os.path.join(cascade_dir, self.HAAR_FILE)
+            if cascade_dir and os.path.exists(path):
+                self.cascade = cv2.CascadeClassifier(path)
+        self.detector = "haar" if self.cascade is not None else "landmarker"
+
+        self.state = self.ACTIVE
+        self.prev_thumb = None
+        self.last_face_ts = None
+        self.last_probe_ts = None
+        self.motion = 0.0
+
+        # Ciclo de trabalho
+        self.prev_ts = None
+        self.seconds = {self.ACTIVE: 0.0, self.IDLE: 0.0}
+        self.frames = 0
+        self.landmark_frames = 0
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        tw = self.thumb_width
+        th = max(1, int(round(h * tw / w)))
+        small = cv2.resize(frame, (tw, th), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _haar_face(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.detect_width / w)
+        small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=1.2, minNeighbors=4, minSize=(24, 24))
+        return len(faces) > 0
+
+    def should_run(self, frame, timestamp):
+        """
+        Decide se o landmarker roda neste frame. Chamar uma vez por frame,
+        seguido de report() quando ele rodar.
+        """
+        if self.prev_ts is not None:
+            self.seconds[self.state] += max(timestamp - self.prev_ts, 0.0)
+        self.prev_ts = timestamp
+        self.frames += 1
+
+        if not self.enabled or self.state == self.ACTIVE:
+            self.landmark_frames += 1
+            return True
+
+        # IDLE: diferença de quadros na miniatura (intensidade média, 0..255)
+        thumb = self._thumbnail(frame)
+        if self.prev_thumb is not None and self.prev_thumb.shape == thumb.shape:
+            self.motion = float(cv2.absdiff(thumb, self.prev_thumb).mean())
+        self.prev_thumb = thumb
+
+        interval = self.motion_probe_interval if self.motion > self.motion_threshold else self.probe_interval
+        if self.last_probe_ts is not None and timestamp - self.last_probe_ts < interval:
+            return False
+        self.last_probe_ts = timestamp
+
+        if self.cascade is not None:
+            if not self._haar_face(frame):
+                return False
+            self._wake(timestamp)
+
+        self.landmark_frames += 1
+        return True
+
+    def report(self, face_found, timestamp):
+        """Resultado do landmarker no frame: mantém ACTIVE ou entra em IDLE."""
+        if not self.enabled:
+            return
+        if face_found:
+            self._wake(timestamp)
+        elif self.state == self.ACTIVE:
+            if self.last_face_ts is None:
+                self.last_face_ts = timestamp
+            if timestamp - self.last_face_ts >= self.idle_after:
+                self.state = self.IDLE
+                self.prev_thumb = None
+                self.last_probe_ts = timestamp
+
+    def _wake(self, timestamp):
+        self.state = self.ACTIVE
+        self.last_face_ts = timestamp
+
+    @property
+    def is_idle(self):
+        return self.state == self.IDLE
+
+    def duty_cycle(self):
+        """Tempo em cada estado e fração de frames com landmarker."""
+        total = self.seconds[self.ACTIVE] + self.seconds[self.IDLE]
+        return {
+            "active_seconds": self.seconds[self.ACTIVE],
+            "idle_seconds": self.seconds[self.IDLE],
+            "active_ratio": self.seconds[self.ACTIVE] / total if total > 0 else 1.0,
+            "landmark_frame_ratio": self.landmark_frames / self.frames if self.frames else 1.0,
+            "detector": self.detector,
+        }
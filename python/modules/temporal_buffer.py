@@ -1,5 +1,5 @@
 import numpy as np
-from collections import deque
+from core.signal_processing import TimeRingBuffer
 
 class TimeSeriesAnalyzer:
     """
@@ -8,61 +8,100 @@ class TimeSeriesAnalyzer:
     - Ruído (< 40ms)
     - Microexpressão (40ms - 500ms)
     - Macroexpressão (> 500ms)
+
+    Todas as AUs ficam num único buffer circular (amostras x AUs), e a
+    classificação roda para todas de uma vez (pico, duração ativa, cauda).
     """
-    def __init__(self, buffer_duration=4.0, fps=30):
+    LABEL_MICRO = "MICRO"
+    LABEL_MACRO = "MACRO"
+    LABEL_ANALYSING = "ANALISANDO..."
+
+    def __init__(self, buffer_duration=4.0, fps=30, au_names=None, max_fps=120):
+        # O buffer é limitado por TEMPO (segundos), não por nº de frames:
+        # funciona igual a 30 fps, 60 fps ou com frames pulados.
+        self.buffer_duration = buffer_duration
+        # fps só é usado como relógio sintético quando update() não recebe timestamp
         self.fps = fps
-        self.maxlen = int(buffer_duration * fps) # Ex: 120 frames
-        
-        # Buffer para cada AU: {'AU4': deque([...]), 'AU12': deque([...])}
-        self.buffers = {}
+        # Capacidade física do anel: suficiente para 'max_fps' durante a janela
+        self.capacity = int(buffer_duration * max_fps) + 1
+
+        self.au_names = list(au_names) if au_names is not None else None
+        self.ring = None
+        if self.au_names is not None:
+            self._create_ring()
+
+    def _create_ring(self):
+        self.au_index = {au: i for i, au in enumerate(self.au_names)}
+        self.ring = TimeRingBuffer(self.capacity, len(self.au_names))
 
-    def update(self, current_aus):
+    def update(self, current_aus, timestamp=None):
         """
-        Recebe o dicionário de AUs do frame atual e adiciona ao histórico.
+        Recebe as AUs do frame atual (dict ou vetor alinhado com au_names)
+        e grava in-place no buffer circular.
+        timestamp (s): instante real de captura do frame.
         """
-        for au, value in current_aus.items():
-            if au not in self.buffers:
-                self.buffers[au] = deque(maxlen=self.maxlen)
-            
-            self.buffers[au].append(value)
+        if self.ring is None:
+            # Sem lista de AUs explícita: adota as chaves do primeiro frame
+            self.au_names = list(current_aus.keys())
+            self._create_ring()
 
-    def get_classification(self, au_name, threshold=0.35):
+        if timestamp is None:
+            _, ts = self.ring.last(1)
+            timestamp = (ts[-1] if len(ts) else 0.0) + 1.0 / self.fps
+
+        if isinstance(current_aus, dict):
+            values = [current_aus.get(au, 0.0) for au in self.au_names]
+        else:
+            values = current_aus
+        self.ring.append(values, timestamp)
+
+    def classify_all(self, threshold=0.35):
         """
-        Analisa o histórico da AU específica.
-        Retorna: 
-        - None (Nada relevante)
-        - "MICRO" (Expressão rápida/involuntária)
-        - "MACRO" (Expressão sustentada/consciente)
+        Classifica todas as AUs de uma vez.
+        Retorna array (n_AUs,) com None, "MICRO", "MACRO" ou "ANALISANDO...".
         """
-        if au_name not in self.buffers or len(self.buffers[au_name]) < 10:
-            return None
+        labels = np.full(len(self.au_names or []), None, dtype=object)
+        if self.ring is None:
+            return labels
+
+        data, ts = self.ring.window(self.buffer_duration)
+        if len(ts) < 10:
+            return labels
 
-        # Converte para array numpy para análise vetorizada (rápida)
-        data = np.array(self.buffers[au_name])
-        
         # 1. Verifica se houve algum pico relevante nos últimos 4s
-        peak = np.max(data)
-        if peak < threshold:
-            return None
+        peak = data.max(axis=0)
+        relevant = peak >= threshold
 
         # 2. Calcula a "Largura do Pulso" (Duração)
-        # Quantos frames ficaram acima de 60% do pico máximo?
+        # Quanto tempo ficou acima de 60% do pico máximo?
         # Usamos 60% para medir a largura à meia altura (FWHM aproximado)
         cut_level = peak * 0.6
-        frames_active = np.sum(data > cut_level)
-        
-        duration_ms = (frames_active / self.fps) * 1000.0
+        active = data > cut_level
+
+        # Cada amostra "dura" até a próxima captura (a última usa o dt mediano)
+        dts = np.diff(ts)
+        dts = np.append(dts, np.median(dts))
+        duration_ms = (dts @ active) * 1000.0
 
         # 3. Classificação Temporal
-        if duration_ms < 40:
-            return None # Ruído muito rápido (glitch)
-            
-        elif 40 <= duration_ms < 500:
-            # Se o pico já passou (último valor é baixo), confirmamos que foi Micro
-            if data[-1] < cut_level:
-                return "MICRO"
-            # Se ainda está alto, pode estar se tornando uma Macro... esperamos.
-            return "ANALISANDO..." 
-            
-        else: # > 500ms
-            return "MACRO"
+        # < 40ms: Ruído muito rápido (glitch) -> None
+        micro_zone = relevant & (duration_ms >= 40) & (duration_ms < 500)
+        # Se o pico já passou (último valor é baixo), confirmamos que foi Micro.
+        # Se ainda está alto, pode estar se tornando uma Macro... esperamos.
+        tail_low = data[-1] < cut_level
+        labels[micro_zone & tail_low] = self.LABEL_MICRO
+        labels[micro_zone & ~tail_low] = self.LABEL_ANALYSING
+        labels[relevant & (duration_ms >= 500)] = self.LABEL_MACRO
+        return labels
+
+    def get_classification(self, au_name, threshold=0.35):
+        """
+        Analisa o histórico da AU específica.
+        Retorna: 
+        - None (Nada relevante)
+        - "MICRO" (Expressão rápida/involuntária)
+        - "MACRO" (Expressão sustentada/consciente)
+        """
+        if self.ring is None or au_name not in self.au_index:
+            return None
+        return self.classify_all(threshold)[self.au_index[au_name]]
@@ -17,27 +17,46 @@ class VoiceActivityDetector:
         self.IDX_NOSE = 1
         self.IDX_CHIN = 152
 
-    def is_speaking(self, landmarks):
+        # Pares medidos: (lábio sup, lábio inf) e (nariz, queixo)
+        self._pairs = [(self.IDX_LIP_TOP, self.IDX_LIP_BOTTOM), (self.IDX_NOSE, self.IDX_CHIN)]
+
+        # Normalização por cliente: abertura dos lábios em repouso (boca fechada = 0)
+        self.rest_ratio = 0.0
+
+    def opening_ratio(self, landmarks):
         """
-        Retorna True se a abertura da boca indicar fala.
+        Abertura dos lábios normalizada pela altura do rosto inferior.
+        Aceita objetos do MediaPipe (float) ou arrays (478, 3) / (T, 478, 3).
         """
         # 1. Distância vertical dos lábios (Abertura)
-        lip_dist = GeometryUtils.euclidean_distance(
-            landmarks[self.IDX_LIP_TOP],
-            landmarks[self.IDX_LIP_BOTTOM]
-        )
-        
         # 2. Distância de referência (Altura do rosto inferior)
         # Necessário para que funcione se a pessoa estiver longe ou perto da câmera
-        face_ref_dist = GeometryUtils.euclidean_distance(
-            landmarks[self.IDX_NOSE],
-            landmarks[self.IDX_CHIN]
-        )
-        
-        if face_ref_dist == 0: return False
-        
-        # 3. Razão de Abertura Normalizada
-        opening_ratio = lip_dist / face_ref_dist
-        
-        # Se a abertura for maior que o limiar configurado (ex: 0.05), está falando/boca aberta
-        return opening_ratio > self.threshold
+        if isinstance(landmarks, np.ndarray):
+            d = GeometryUtils.pairwise_distances(landmarks, self._pairs)
+            lip_dist, face_ref_dist = d[..., 0], d[..., 1]
+        else:
+            lip_dist, face_ref_dist = GeometryUtils.euclidean_distances(landmarks, self._pairs)
+
+        # 3. Razão de Abertura Normalizada (referência zero -> 0.0)
+        return GeometryUtils.safe_ratio(lip_dist, face_ref_dist)
+
+    def is_speaking(self, landmarks):
+        """
+        Retorna True se a abertura da boca indicar fala.
+        Para uma sequência (T, 478, 3), retorna um array booleano (T,).
+        """
+        # Se a abertura (acima do repouso do cliente) passar do limiar, está falando/boca aberta
+        return self.opening_ratio(landmarks) - self.rest_ratio > self.threshold
+
+    def calibrate(self, landmarks):
+        """Frame neutro: a abertura atual dos lábios vira o repouso do cliente."""
+        self.rest_ratio = float(self.opening_ratio(landmarks))
+
+    def reset_calibration(self):
+        self.rest_ratio = 0.0
+
+    def get_state(self):
+        return {"rest_ratio": self.rest_ratio}
+
+    def load_state(self, state):
+        self.rest_ratio = float(state.get("rest_ratio", 0.0))
@@ -9,7 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from modules.landmark_tracker import LandmarkTracker
 from analyzers.vector_engine import VectorEngine
 from analyzers.texture_engine import TextureEngine
-from core.signal_processing import TemporalDerivative
+from core.signal_processing import SavitzkyGolayDerivative
 
 # Configuração Mínima para o Profiler rodar sem o arquivo YAML
 MOCK_CONFIG = {
@@ -18,18 +18,37 @@ MOCK_CONFIG = {
     'dynamics': {'temporal_buffer_size': 5}
 }
 
+# Vídeo alvo -> sinal monitorado (na ordem de prioridade: 'AU4' casa antes de 'AU12')
+TARGET_SIGNALS = {
+    "AU4": "au4_brow_dist",
+    "AU12": "au12_mouth_dist",
+    "AU6": "au6_texture",
+    "AU15": "au15_chin_dist",
+    "AU9": "au9_texture",
+}
+
 def analyze_video_flux(video_path, au_target):
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         print(f"ERRO: Não foi possível abrir {video_path}")
         return 0.0
 
+    # Escolhe o sinal certo baseado no nome do arquivo
+    # (Ex: se o vídeo é AU4.mp4, monitoramos 'au4_brow_dist')
+    target_signal = next((sig for au, sig in TARGET_SIGNALS.items() if au in au_target), None)
+    if target_signal is None:
+        cap.release()
+        return 0.0
+
     tracker = LandmarkTracker()
     vec_engine = VectorEngine(MOCK_CONFIG)
     tex_engine = TextureEngine(MOCK_CONFIG)
     
-    # Processadores de Derivada (Aceleração)
-    derivative_calc = TemporalDerivative(5)
+    # Derivadas (Aceleração) de todos os sinais monitorados num único buffer
+    signal_names = list(TARGET_SIGNALS.values())
+    derivative_calc = SavitzkyGolayDerivative(
+        n_signals=len(signal_names), buffer_size=5, signal_names=signal_names
+    )
     
     max_accel = 0.0
     
@@ -37,34 +56,25 @@ def analyze_video_flux(video_path, au_target):
         ret, frame = cap.read()
         if not ret: break
         
-        # Simula 30 FPS para padronizar a física (já que é video gravado)
-        dt = 0.033 
+        # Timestamp real do frame no vídeo (s): a física não depende do fps do arquivo
+        timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
         
-        landmarks = tracker.process_frame(frame)
-        if landmarks:
-            lm = landmarks.landmark
+        result = tracker.process_frame(frame)
+        if result:
+            lm = result.face_landmarks[0]
             
             # Extrai Sinais
             vecs = vec_engine.analyze(lm)
             texs = tex_engine.analyze(frame, lm)
             signals = {**vecs, **texs}
             
-            # Escolhe o sinal certo baseado no nome do arquivo 
-            # (Ex: se o vídeo é AU4.mp4, monitoramos 'au4_brow_dist')
-            target_signal = None
-            if "AU4" in au_target: target_signal = signals.get("au4_brow_dist")
-            elif "AU12" in au_target: target_signal = signals.get("au12_mouth_dist")
-            elif "AU6" in au_target: target_signal = signals.get("au6_texture")
-            elif "AU15" in au_target: target_signal = signals.get("au15_chin_dist")
-            elif "AU9" in au_target: target_signal = signals.get("au9_texture")
+            # Calcula Fluxo (Aceleração) de todos os sinais de uma vez
+            _, accels = derivative_calc.process(signals, timestamp)
+            accel = accels[target_signal]
             
-            if target_signal is not None:
-                # Calcula Fluxo (Aceleração)
-                _, accel = derivative_calc.process(target_signal, dt)
-                
-                # Guarda o pico de aceleração (ignorando se é negativo/positivo)
-                if abs(accel) > max_accel:
-                    max_accel = abs(accel)
+            # Guarda o pico de aceleração (ignorando se é negativo/positivo)
+            if abs(accel) > max_accel:
+                max_accel = abs(accel)
                     
     cap.release()
     return max_accel